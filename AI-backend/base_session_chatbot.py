@@ -3,10 +3,176 @@ Base class for session-based RAG chatbots.
 Provides common functionality for all coaching sessions.
 """
 from rag_dynamic import UnifiedRAGChatbot
+from utils.unified_storage import (
+    append_history_log, clear_history_log, load_history_log, rewrite_history_log
+)
 from typing import Dict, Any, List
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import heapq
+import json
+import logging
+import os
+import random
+import re
 import time
 
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Runs RAG retrieval alongside memory-summary building on turns that need it
+_RETRIEVAL_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-retrieval")
+# Marks the history message that stands in for the summarized oldest messages
+_SUMMARY_PREFIX = "[PRIOR_SUMMARY]: "
+
+# Topic keywords used to score older exchanges for relevance
+_KEYWORDS = (
+    'goal', 'exercise', 'eat', 'sleep', 'weight', 'health',
+    'walk', 'run', 'diet', 'nutrition', 'water', 'stress',
+    'challenge', 'success', 'difficult', 'accomplished',
+)
+_KEYWORD_BITS = {k: 1 << i for i, k in enumerate(_KEYWORDS)}
+# Substring match (no word boundaries) so "goals" and "walking" still count
+_KEYWORD_RE = re.compile("|".join(re.escape(k) for k in _KEYWORDS))
+
+# Base coaching prompt shared by all sessions
+_BASE_SYSTEM_PROMPT = """You are Nala, a supportive AI health and wellness coach. Your coaching style should be:
+- Warm, empathetic, and encouraging
+- Ask open-ended questions to promote reflection
+- Help users set SMART goals (Specific, Measurable, Achievable, Relevant, Time-bound)
+- Acknowledge their feelings and validate their experiences
+- Provide actionable suggestions based on their specific situation
+- Celebrate their wins and progress
+- Keep responses concise and conversational (2-4 sentences)
+- Ask only 1 question at a time
+
+CRITICAL ACCURACY RULES:
+- NEVER assume, infer, or fill in details the user didn't explicitly state
+- If you're unsure about something they said, ASK for clarification
+- Repeat back what you heard to confirm accuracy: "So you said X, is that right?"
+- Don't do math or count things unless the user gave you exact numbers
+- Always verify your understanding before moving forward
+
+CRITICAL WRITING STYLE:
+- Write like a human having a natural conversation
+- NO markdown formatting (no #, **, *, _, etc.)
+- NO emojis (no 😊, 👋, 🌟, etc.)
+- NO special characters for emphasis
+- Use plain text only
+- Sound natural, warm, and conversational
+- Write in complete sentences with normal punctuation
+
+CRITICAL PROGRAM CONSTRAINTS:
+- This is a 4-session program (Session 1, 2, 3, and 4)
+- Sessions happen ONCE PER WEEK - exactly 1 week apart
+- There are NO check-ins, calls, emails, or contact between sessions
+- You CANNOT promise to "check in", "follow up", "send reminders", or "reach out" between sessions
+- The participant is responsible for their own tracking and accountability between sessions
+- Next contact will be at the next scheduled weekly session
+
+Instead of promising check-ins, encourage:
+- Self-tracking methods (journal, app, calendar reminders)
+- Building their own accountability systems
+- Support from friends/family
+- Looking forward to discussing progress at next week's session"""
+
+
+def _compute_mask(text_lower: str) -> int:
+    """Bitmask of the topic keywords present in already-lowercased text"""
+    mask = 0
+    for keyword in _KEYWORD_RE.findall(text_lower):
+        mask |= _KEYWORD_BITS[keyword]
+    return mask
+
+
+def _is_overloaded(e: Exception) -> bool:
+    return 'overloaded' in str(e).lower()
+
+
+def _is_retryable_api_error(e: Exception) -> bool:
+    """True for 5xx responses and overloaded errors"""
+    status = getattr(e, "status_code", None)
+    return (isinstance(status, int) and 500 <= status < 600) or _is_overloaded(e)
+
+
+def _retry_llm_call(fn, max_retries: int, should_retry=_is_overloaded, label: str = "API error"):
+    """
+    Call fn() with exponential backoff plus jitter on retryable errors.
+    Non-retryable errors and the final failed attempt are re-raised immediately.
+    """
+    retry_delay = 1
+    for attempt in range(max_retries):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries - 1 or not should_retry(e):
+                raise
+            sleep_for = retry_delay + random.random() * retry_delay
+            logger.warning("%s; retrying in %.1fs", label, sleep_for)
+            time.sleep(sleep_for)
+            retry_delay *= 2
+
+
+class LLMEvaluator:
+    """LLM client wrapper used by session managers for SMART goal evaluation"""
+    
+    def __init__(self, parent):
+        self.parent = parent
+    
+    @property
+    def model_id(self):
+        """Model currently used for evaluation (part of the SMART eval cache key)"""
+        return self.parent.model_info.get('model_id', self.parent.model)
+    
+    def evaluate_goal(self, prompt, system=None):
+        """
+        Quick evaluation call to LLM for SMART goal checking.
+        A static system prompt is sent as a cache-controlled block so repeated
+        evaluations only pay full price for the short user message.
+        """
+        return _retry_llm_call(
+            lambda: self._evaluate_once(prompt, system),
+            max_retries=3,
+            label="API overloaded during SMART eval",
+        )
+    
+    def _evaluate_once(self, prompt, system=None):
+        if self.parent.model_info['provider'] == 'anthropic':
+            model_id = self.parent.model_info.get('model_id', self.parent.model)
+            kwargs = {}
+            if system:
+                kwargs["system"] = [{
+                    "type": "text",
+                    "text": system,
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            response = self.parent.anthropic_client.messages.create(
+                model=model_id,
+                max_tokens=1000,
+                temperature=0.1,
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }],
+                **kwargs
+            )
+            return response.content[0].text
+        else:  # OpenAI
+            # OpenAI caches repeated prompt prefixes automatically; keep the system message first
+            response = self.parent.openai_client.chat.completions.create(
+                model=self.parent.model,
+                messages=[
+                    {"role": "system", "content": system or "You are a SMART goal evaluator. Respond only with valid JSON. Never include markdown formatting."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,
+                max_tokens=1000,
+                response_format={"type": "json_object"}
+            )
+            return response.choices[0].message.content
+
 
 class BaseSessionRAGChatbot(UnifiedRAGChatbot, ABC):
     """
@@ -15,6 +181,15 @@ class BaseSessionRAGChatbot(UnifiedRAGChatbot, ABC):
     Session managers remain unchanged in subclasses.
     """
     
+    # Semantic retrieval cache: reuse results for near-duplicate queries
+    RAG_CACHE_SIZE = 64
+    RAG_CACHE_SIMILARITY = 0.92
+    
+    # Rolling summarization: once more than HISTORY_HARD_CAP messages follow the
+    # summary message, fold the oldest HISTORY_SUMMARY_CHUNK (even) into it
+    HISTORY_HARD_CAP = 40
+    HISTORY_SUMMARY_CHUNK = 20
+    
     def __init__(self, model='claude-sonnet-4.5', top_k=3, 
                  recent_messages=6, relevant_history_count=4, 
                  validate_constraints=True):
@@ -34,108 +209,239 @@ class BaseSessionRAGChatbot(UnifiedRAGChatbot, ABC):
         self.relevant_history_count = relevant_history_count
         self.validate_constraints = validate_constraints
         self.session_manager = None  # Set by subclass
+        self._llm_evaluator = LLMEvaluator(self)  # Shared across session resets
+        self._bind_generate_api()
+        self._history_keyword_masks = []  # Parallel to conversation_history
+        self._masked_history = None  # The conversation_history list the masks belong to
+        # Row i of _rag_cache_vectors is the unit query embedding for
+        # _rag_cache[i] = (retrieved examples, rag context)
+        self._rag_cache = []
+        self._rag_cache_vectors = None
+        self._rag_cache_lru = []  # Indices into _rag_cache, least recently used first
+        self._saved_filename = None  # Last full snapshot written by save_session
+        self._last_saved_index = 0  # conversation_history length covered by saves
+        self._snapshot_history_len = 0  # Messages held in the snapshot itself, the rest are logged
+        self._saved_content_hash = None  # _content_hash() of the last save stored in file and database
+        self._last_assistant_response = None
+        # History list and its length when the field above was set
+        self._last_assistant_history = None
+        self._last_assistant_history_len = 0
+        self._history_log_stale = False  # Summarization rewrote messages already in the log
+        self._user_name_raw = None
+        self._user_name_lower = None
+        self._last_retrieved_key = None  # Identity of the examples behind _last_rag_context
+        self._last_rag_context = ""
     
-    def _create_llm_evaluator(self):
-        """Create an LLM client wrapper for SMART goal evaluation"""
-        class LLMEvaluator:
-            def __init__(self, parent):
-                self.parent = parent
-            
-            def evaluate_goal(self, prompt):
-                """Quick evaluation call to LLM for SMART goal checking"""
-                max_retries = 3
-                retry_delay = 1
-                
-                for attempt in range(max_retries):
-                    try:
-                        if self.parent.model_info['provider'] == 'anthropic':
-                            model_id = self.parent.model_info.get('model_id', self.parent.model)
-                            response = self.parent.anthropic_client.messages.create(
-                                model=model_id,
-                                max_tokens=1000,
-                                temperature=0.1,
-                                messages=[{
-                                    "role": "user",
-                                    "content": prompt
-                                }]
-                            )
-                            return response.content[0].text
-                        else:  # OpenAI
-                            response = self.parent.openai_client.chat.completions.create(
-                                model=self.parent.model,
-                                messages=[
-                                    {"role": "system", "content": "You are a SMART goal evaluator. Respond only with valid JSON. Never include markdown formatting."},
-                                    {"role": "user", "content": prompt}
-                                ],
-                                temperature=0.1,
-                                max_tokens=1000,
-                                response_format={"type": "json_object"}
-                            )
-                            return response.choices[0].message.content
-                    except Exception as e:
-                        error_str = str(e)
-                        if 'overloaded' in error_str.lower() and attempt < max_retries - 1:
-                            print(f"\n[API Overloaded during SMART eval - Retrying in {retry_delay}s...]", flush=True)
-                            time.sleep(retry_delay)
-                            retry_delay *= 2
-                        else:
-                            raise
-        
-        return LLMEvaluator(self)
-    
-    def _select_relevant_history(self, current_message: str, max_relevant: int = 4):
-        """Cherry-pick relevant messages from older history"""
-        if len(self.conversation_history) <= self.recent_messages:
+    def _retrieve_with_cache(self, user_message: str):
+        """Retrieve examples and context, reusing a cached result for near-identical queries"""
+        embedding = self.searcher.embed_query(user_message)
+        # Stored rows are unit length, so cosine similarity is one matrix-vector product
+        query_unit = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query_unit)
+        if norm:
+            query_unit /= norm
+        
+        if self._rag_cache:
+            similarities = self._rag_cache_vectors[:len(self._rag_cache)] @ query_unit
+            best_index = int(similarities.argmax())
+            if similarities[best_index] >= self.RAG_CACHE_SIMILARITY:
+                self._rag_cache_lru.remove(best_index)
+                self._rag_cache_lru.append(best_index)
+                return self._rag_cache[best_index]
+        
+        retrieved_examples = self.retrieve(user_message, query_embedding=embedding)
+        rag_context = self.build_context(retrieved_examples)
+        entry = (retrieved_examples, rag_context)
+        
+        if self._rag_cache_vectors is None:
+            self._rag_cache_vectors = np.empty(
+                (self.RAG_CACHE_SIZE, query_unit.shape[0]), dtype=np.float32
+            )
+        if len(self._rag_cache) < self.RAG_CACHE_SIZE:
+            index = len(self._rag_cache)
+            self._rag_cache.append(entry)
+        else:
+            index = self._rag_cache_lru.pop(0)
+            self._rag_cache[index] = entry
+        self._rag_cache_vectors[index] = query_unit
+        self._rag_cache_lru.append(index)
+        
+        return retrieved_examples, rag_context
+    
+    def _set_last_assistant_response(self, response):
+        """Record the latest coach message as of the current history list and length"""
+        self._last_assistant_response = response
+        self._last_assistant_history = self.conversation_history
+        self._last_assistant_history_len = len(self.conversation_history)
+    
+    def _get_last_assistant_response(self):
+        """
+        Latest coach message, rescanning only if history was replaced or
+        changed length since it was recorded
+        """
+        history = self.conversation_history
+        if (self._last_assistant_history is history
+                and self._last_assistant_history_len == len(history)):
+            return self._last_assistant_response
+        
+        response = None
+        for msg in reversed(history):
+            if msg['role'] == 'assistant':
+                response = msg.get('content', '')
+                break
+        self._set_last_assistant_response(response)
+        return response
+    
+    def _sync_history_masks(self):
+        """
+        Bring keyword masks in line with conversation_history, masking only
+        new messages. Masks are rebuilt when the history list was replaced.
+        """
+        history = self.conversation_history
+        masks = self._history_keyword_masks
+        if self._masked_history is not history or len(masks) > len(history):
+            masks.clear()
+            self._masked_history = history
+        for msg in history[len(masks):]:
+            masks.append(_compute_mask((msg.get('content') or '').lower()))
+        return masks
+    
+    def _stable_rag_context(self, retrieved_examples, rag_context):
+        """
+        Reuse last turn's context text when the same examples were retrieved.
+        
+        Similarity scores vary per query, so rebuilding the text would change
+        the cached RAG system block even when the examples are identical.
+        """
+        key = tuple(
+            (example['participant_response'], example['coach_response'])
+            for example in retrieved_examples
+        )
+        if key == self._last_retrieved_key:
+            return self._last_rag_context
+        
+        self._last_retrieved_key = key
+        self._last_rag_context = rag_context
+        return rag_context
+    
+    def _history_window_start(self):
+        """Index of the first message after the summary message, if history starts with one"""
+        history = self.conversation_history
+        if history and (history[0].get('content') or '').startswith(_SUMMARY_PREFIX):
+            return 1
+        return 0
+    
+    def _summarize_messages(self, messages, prior_summary=None):
+        """Ask the LLM to compress messages (plus any existing summary) into one paragraph"""
+        transcript = "\n".join(
+            f"{'Participant' if msg['role'] == 'user' else 'Coach'}: {msg.get('content') or ''}"
+            for msg in messages
+        )
+        prompt = (
+            "Summarize this part of a health coaching conversation in one short paragraph. "
+            "Keep names, goals, numbers, and commitments exactly as stated.\n\n"
+        )
+        if prior_summary:
+            prompt += f"Summary so far:\n{prior_summary}\n\n"
+        prompt += f"Conversation:\n{transcript}"
+        
+        if self.model_info['provider'] == 'anthropic':
+            model_id = self.model_info.get('model_id', self.model)
+            response = self.anthropic_client.messages.create(
+                model=model_id,
+                max_tokens=300,
+                temperature=0.2,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return response.content[0].text
+        else:  # OpenAI
+            response = self.openai_client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+                max_tokens=300
+            )
+            return response.choices[0].message.content
+    
+    def _maybe_summarize_history(self):
+        """
+        Once past the cap, replace the oldest HISTORY_SUMMARY_CHUNK messages
+        (and any earlier summary) with a single summary message.
+        Makes at most one summarization call per turn.
+        """
+        history = self.conversation_history
+        start = self._history_window_start()
+        if len(history) - start <= self.HISTORY_HARD_CAP:
+            return
+        
+        end = start + self.HISTORY_SUMMARY_CHUNK
+        prior_summary = history[0]['content'][len(_SUMMARY_PREFIX):] if start else None
+        try:
+            summary = self._summarize_messages(history[start:end], prior_summary)
+        except Exception as e:
+            logger.warning("History summarization failed: %s", e)
+            return
+        
+        content = _SUMMARY_PREFIX + summary
+        masks = self._sync_history_masks()
+        history[:end] = [{"role": "user", "content": content}]
+        masks[:end] = [_compute_mask(content.lower())]
+        self._history_log_stale = True
+    
+    def _get_user_name_lower(self):
+        """Lowercased participant name, recomputed only when session_data's user_name changes"""
+        user_name = self.session_manager.session_data.get('user_name')
+        if user_name is not self._user_name_raw:
+            self._user_name_raw = user_name
+            self._user_name_lower = user_name.lower() if user_name else None
+        return self._user_name_lower
+    
+    def _select_relevant_history(self, current_message: str, max_relevant: int = 4,
+                                 current_lower: str = None, current_mask: int = None):
+        """
+        Cherry-pick relevant messages from older history.
+        current_lower/current_mask may be passed in when already computed for this turn.
+        """
+        start = self._history_window_start()
+        if len(self.conversation_history) - start <= self.recent_messages:
             return []
         
-        older_history = self.conversation_history[:-self.recent_messages]
+        older_history = self.conversation_history[start:-self.recent_messages]
         
         if not older_history:
             return []
         
         try:
             relevant_exchanges = []
+            masks = self._sync_history_masks()
+            if current_lower is None:
+                current_lower = current_message.lower()
+            if current_mask is None:
+                current_mask = _compute_mask(current_lower)
+            session_name = self._get_user_name_lower()
+            name_in_current = bool(session_name) and session_name in current_lower
             
-            for i in range(0, len(older_history), 2):
-                if i + 1 < len(older_history):
-                    user_msg = older_history[i]
-                    assistant_msg = older_history[i + 1]
-                    
-                    if user_msg['role'] == 'user' and assistant_msg['role'] == 'assistant':
-                        user_content = user_msg.get('content', '')
-                        if user_content is None:
-                            user_content = ''
-                        
-                        user_content_lower = user_content.lower()
-                        current_lower = current_message.lower()
-                        
-                        keywords = ['goal', 'exercise', 'eat', 'sleep', 'weight', 'health', 
-                                  'walk', 'run', 'diet', 'nutrition', 'water', 'stress',
-                                  'challenge', 'success', 'difficult', 'accomplished']
-                        
-                        user_keywords = [k for k in keywords if k in user_content_lower]
-                        current_keywords = [k for k in keywords if k in current_lower]
-                        
-                        overlap = set(user_keywords) & set(current_keywords)
-                        
-                        session_name = self.session_manager.session_data.get('user_name')
-                        if session_name:
-                            session_name = session_name.lower()
-                            has_personal_ref = session_name and (session_name in current_lower or session_name in user_content_lower)
-                        else:
-                            has_personal_ref = False
-                        
-                        if overlap or has_personal_ref:
-                            relevance_score = len(overlap) + (2 if has_personal_ref else 0)
-                            relevant_exchanges.append({
-                                'score': relevance_score,
-                                'messages': [user_msg, assistant_msg],
-                                'index': i
-                            })
-            
-            relevant_exchanges.sort(key=lambda x: x['score'], reverse=True)
-            selected = relevant_exchanges[:max_relevant]
+            pairs = zip(older_history[0::2], older_history[1::2])
+            for pair_idx, (user_msg, assistant_msg) in enumerate(pairs):
+                if user_msg['role'] != 'user' or assistant_msg['role'] != 'assistant':
+                    continue
+                
+                i = pair_idx * 2
+                overlap = (masks[start + i] & current_mask).bit_count()
+                
+                has_personal_ref = bool(session_name) and (
+                    name_in_current or session_name in (user_msg.get('content') or '').lower()
+                )
+                
+                if overlap or has_personal_ref:
+                    relevance_score = overlap + (2 if has_personal_ref else 0)
+                    relevant_exchanges.append({
+                        'score': relevance_score,
+                        'messages': [user_msg, assistant_msg],
+                        'index': i
+                    })
             
+            selected = heapq.nlargest(max_relevant, relevant_exchanges, key=lambda x: x['score'])
             selected.sort(key=lambda x: x['index'])
             
             result = []
@@ -147,11 +453,23 @@ class BaseSessionRAGChatbot(UnifiedRAGChatbot, ABC):
         except Exception as e:
             return []
     
-    def _build_context_messages(self, current_message: str):
+    def _build_context_messages(self, current_message: str,
+                                current_lower: str = None, current_mask: int = None):
         """Build context messages for LLM"""
+        # Early-session fast path: everything fits in the recent window
+        if len(self.conversation_history) <= self.recent_messages and self._history_window_start() == 0:
+            return list(self.conversation_history)
+        
         messages = []
         
-        relevant_old = self._select_relevant_history(current_message, self.relevant_history_count)
+        relevant_old = self._select_relevant_history(
+            current_message, self.relevant_history_count,
+            current_lower=current_lower, current_mask=current_mask
+        )
+        
+        # The summary message stands in for everything before the window
+        if self._history_window_start():
+            messages.append(self.conversation_history[0])
         
         if relevant_old:
             messages.append({
@@ -172,137 +490,128 @@ class BaseSessionRAGChatbot(UnifiedRAGChatbot, ABC):
     
     def get_base_system_prompt(self) -> str:
         """Get base coaching prompt - same for all sessions"""
-        return """You are Nala, a supportive AI health and wellness coach. Your coaching style should be:
-- Warm, empathetic, and encouraging
-- Ask open-ended questions to promote reflection
-- Help users set SMART goals (Specific, Measurable, Achievable, Relevant, Time-bound)
-- Acknowledge their feelings and validate their experiences
-- Provide actionable suggestions based on their specific situation
-- Celebrate their wins and progress
-- Keep responses concise and conversational (2-4 sentences)
-- Ask only 1 question at a time
-
-CRITICAL ACCURACY RULES:
-- NEVER assume, infer, or fill in details the user didn't explicitly state
-- If you're unsure about something they said, ASK for clarification
-- Repeat back what you heard to confirm accuracy: "So you said X, is that right?"
-- Don't do math or count things unless the user gave you exact numbers
-- Always verify your understanding before moving forward
-
-CRITICAL WRITING STYLE:
-- Write like a human having a natural conversation
-- NO markdown formatting (no #, **, *, _, etc.)
-- NO emojis (no 😊, 👋, 🌟, etc.)
-- NO special characters for emphasis
-- Use plain text only
-- Sound natural, warm, and conversational
-- Write in complete sentences with normal punctuation
-
-CRITICAL PROGRAM CONSTRAINTS:
-- This is a 4-session program (Session 1, 2, 3, and 4)
-- Sessions happen ONCE PER WEEK - exactly 1 week apart
-- There are NO check-ins, calls, emails, or contact between sessions
-- You CANNOT promise to "check in", "follow up", "send reminders", or "reach out" between sessions
-- The participant is responsible for their own tracking and accountability between sessions
-- Next contact will be at the next scheduled weekly session
-
-Instead of promising check-ins, encourage:
-- Self-tracking methods (journal, app, calendar reminders)
-- Building their own accountability systems
-- Support from friends/family
-- Looking forward to discussing progress at next week's session"""
+        return _BASE_SYSTEM_PROMPT
     
-    def get_system_prompt(self, context):
-        """Build system prompt with RAG context and session state"""
-        base_prompt = self.get_base_system_prompt()
+    def get_system_prompt(self, context, session_context="", memory_summary=""):
+        """
+        Build system prompt blocks with RAG context and session state.
+        
+        Static and retrieved content come first with cache_control so
+        Anthropic can reuse the prefix; volatile session state goes in a
+        trailing uncached block.
+        """
+        blocks = [{
+            "type": "text",
+            "text": self.get_base_system_prompt(),
+            "cache_control": {"type": "ephemeral"}
+        }]
         
         if context:
-            base_prompt += f"\n\n{context}\n\nUse these examples as guidance for your coaching style and responses."
+            blocks.append({
+                "type": "text",
+                "text": f"{context}\n\nUse these examples as guidance for your coaching style and responses.",
+                "cache_control": {"type": "ephemeral"}
+            })
         
+        volatile_parts = []
         state_prompt = self.session_manager.get_system_prompt_addition()
         if state_prompt:
-            base_prompt += f"\n\n--- SESSION CONTEXT ---{state_prompt}"
+            volatile_parts.append(f"--- SESSION CONTEXT ---{state_prompt}")
+        if session_context:
+            volatile_parts.append(f"--- ADDITIONAL CONTEXT ---\n{session_context}")
+        if memory_summary:
+            volatile_parts.append(f"--- PERSISTENT MEMORY ---\n{memory_summary}")
+        
+        if volatile_parts:
+            blocks.append({"type": "text", "text": "\n\n".join(volatile_parts)})
         
-        return base_prompt
+        return blocks
     
     def _check_and_warn_constraints(self, response: str) -> str:
         """Check if response violates program constraints"""
         return response
     
-    def _call_llm(self, user_message: str, system_prompt: str) -> str:
-        """Call LLM API - handles both Anthropic and OpenAI with retry logic"""
+    def _bind_generate_api(self):
+        """Bind the provider-specific generate call so each turn skips the provider check"""
         if self.model_info['provider'] == 'anthropic':
-            context_messages = self._build_context_messages(user_message)
-            context_messages.append({"role": "user", "content": user_message})
-            
-            model_id = self.model_info.get('model_id', self.model)
+            self._generate_api = self._generate_anthropic
+        else:
+            self._generate_api = self._generate_openai
+    
+    def switch_model(self, new_model):
+        """Switch to a different model and rebind the generate call"""
+        switched = super().switch_model(new_model)
+        if switched:
+            self._bind_generate_api()
+        return switched
+    
+    def _call_llm(self, user_message: str, system_blocks: List[Dict[str, Any]],
+                  current_lower: str = None, current_mask: int = None) -> str:
+        """Call LLM API via the provider-specific path bound in __init__"""
+        return self._generate_api(user_message, system_blocks, current_lower, current_mask)
+    
+    def _generate_anthropic(self, user_message: str, system_blocks: List[Dict[str, Any]],
+                            current_lower: str = None, current_mask: int = None) -> str:
+        """Stream a response from Anthropic with retry logic"""
+        context_messages = self._build_context_messages(user_message, current_lower, current_mask)
+        context_messages.append({"role": "user", "content": user_message})
+        
+        model_id = self.model_info.get('model_id', self.model)
+        
+        def stream_once():
             full_response = ""
-            
-            max_retries = 4
-            retry_delay = 1
-            
-            for attempt in range(max_retries):
-                try:
-                    with self.anthropic_client.messages.stream(
-                        model=model_id,
-                        max_tokens=500,
-                        temperature=0.7,
-                        system=[
-                            {
-                                "type": "text",
-                                "text": system_prompt,
-                                "cache_control": {"type": "ephemeral"}
-                            }
-                        ],
-                        messages=context_messages
-                    ) as stream:
-                        try:
-                            for text in stream.text_stream:
-                                print(text, end="", flush=True)
-                                full_response += text
-                        except Exception as stream_err:
-                            raise RuntimeError(f"SSE chunk error: {stream_err}")
-                    
-                    return full_response
-                    
-                except Exception as e:
-                    error_str = str(e)
-                    is_server_error = (
-                        hasattr(e, "status_code") and
-                        isinstance(e.status_code, int) and
-                        500 <= e.status_code < 600
-                    )
-                    
-                    if (is_server_error or 'overloaded' in error_str.lower()) and attempt < max_retries - 1:
-                        print(f"\n[API Error - Retrying in {retry_delay}s...]", flush=True)
-                        time.sleep(retry_delay)
-                        retry_delay *= 2
-                    else:
-                        raise
-            
-        else:  # OpenAI
-            messages = [{"role": "system", "content": system_prompt}]
-            context_messages = self._build_context_messages(user_message)
-            messages.extend(context_messages)
-            messages.append({"role": "user", "content": user_message})
-            
-            openai_response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=messages,
+            with self.anthropic_client.messages.stream(
+                model=model_id,
+                max_tokens=500,
                 temperature=0.7,
-                max_tokens=400
-            )
-            return openai_response.choices[0].message.content
+                system=system_blocks,
+                messages=context_messages
+            ) as stream:
+                try:
+                    for text in stream.text_stream:
+                        print(text, end="", flush=True)
+                        full_response += text
+                except Exception as stream_err:
+                    raise RuntimeError(f"SSE chunk error: {stream_err}")
+            return full_response
+        
+        return _retry_llm_call(stream_once, max_retries=4, should_retry=_is_retryable_api_error)
+    
+    def _generate_openai(self, user_message: str, system_blocks: List[Dict[str, Any]],
+                         current_lower: str = None, current_mask: int = None) -> str:
+        """Stream a response from OpenAI"""
+        system_prompt = "\n\n".join(block["text"] for block in system_blocks)
+        messages = [{"role": "system", "content": system_prompt}]
+        context_messages = self._build_context_messages(user_message, current_lower, current_mask)
+        messages.extend(context_messages)
+        messages.append({"role": "user", "content": user_message})
+        
+        openai_response = self.openai_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=400,
+            stream=True
+        )
+        
+        full_response = ""
+        for chunk in openai_response:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                print(text, end="", flush=True)
+                full_response += text
+        return full_response
     
     def generate_response(self, user_message, use_history=True, debug_history=False):
         """Generate response with session management"""
         # Get last coach response for state detection
-        last_coach_response = None
-        if self.conversation_history:
-            for msg in reversed(self.conversation_history):
-                if msg['role'] == 'assistant':
-                    last_coach_response = msg.get('content', '')
-                    break
+        last_coach_response = self._get_last_assistant_response()
+        
+        # Lowercase and keyword-scan the message once for this turn
+        current_lower = user_message.lower()
+        current_mask = _compute_mask(current_lower)
         
         # Process through session manager
         session_result = self.session_manager.process_user_input(
@@ -315,27 +624,30 @@ Instead of promising check-ins, encourage:
         if session_result["next_state"]:
             self.session_manager.set_state(session_result["next_state"])
         
-        # Retrieve examples only if RAG needed
+        # Retrieve examples only if RAG needed, overlapping with the memory summary
+        retrieval = None
+        if session_result["trigger_rag"]:
+            retrieval = _RETRIEVAL_POOL.submit(self._retrieve_with_cache, user_message)
+        
+        # ALWAYS add memory summary
+        memory_summary = self._get_memory_summary()
+        
         retrieved_examples = []
         rag_context = ""
         
-        if session_result["trigger_rag"]:
-            retrieved_examples = self.retrieve(user_message)
-            rag_context = self.build_context(retrieved_examples)
+        if retrieval is not None:
+            retrieved_examples, rag_context = retrieval.result()
+            rag_context = self._stable_rag_context(retrieved_examples, rag_context)
         
         # Build system prompt with RAG + session context
-        system_prompt = self.get_system_prompt(rag_context)
-        
-        if session_result["context"]:
-            system_prompt += f"\n\n--- ADDITIONAL CONTEXT ---\n{session_result['context']}"
-        
-        # ALWAYS add memory summary
-        memory_summary = self._get_memory_summary()
-        if memory_summary:
-            system_prompt += f"\n\n--- PERSISTENT MEMORY ---\n{memory_summary}"
+        system_blocks = self.get_system_prompt(
+            rag_context,
+            session_context=session_result["context"],
+            memory_summary=memory_summary
+        )
         
         # Call LLM
-        response = self._call_llm(user_message, system_prompt)
+        response = self._call_llm(user_message, system_blocks, current_lower, current_mask)
         
         # Validate constraints if enabled
         if self.validate_constraints:
@@ -351,17 +663,85 @@ Instead of promising check-ins, encourage:
                 "role": "assistant",
                 "content": response
             })
+            self._sync_history_masks()
+            self._set_last_assistant_response(response)
+            self._maybe_summarize_history()
         
         return response, retrieved_examples, self.model_info['name']
     
-    def save_session(self, filename=None):
-        """Save current session including conversation history"""
-        return self.session_manager.save_session(filename, self.conversation_history)
+    def save_session(self, filename=None, checkpoint=False):
+        """
+        Save current session including conversation history.
+        
+        With checkpoint=True, once a full snapshot exists the messages added
+        since the last save are appended to its history log and the snapshot
+        is rewritten with state and session data only. The first checkpoint
+        after a full save moves the snapshot's messages into the log.
+        A full save is skipped when the content matches the last save that
+        reached both the file and the database.
+        """
+        history = self.conversation_history
+        same_target = self._saved_filename and filename in (None, self._saved_filename)
+        if checkpoint and same_target and (len(history) >= self._last_saved_index
+                                           or self._history_log_stale):
+            # Log first: until the snapshot is rewritten, loading merges it with the log
+            if self._snapshot_history_len or self._history_log_stale:
+                rewrite_history_log(self._saved_filename, history)
+            else:
+                append_history_log(self._saved_filename, history[self._last_saved_index:],
+                                   self._last_saved_index)
+            content_hash = self._content_hash()
+            self.session_manager.save_session(self._saved_filename, history, snapshot_history=[])
+            self._last_saved_index = len(history)
+            self._snapshot_history_len = 0
+            self._history_log_stale = False
+            # Only skip later saves once the database has this data too
+            self._saved_content_hash = content_hash if self.session_manager.db_saved else None
+            return self._saved_filename
+        
+        content_hash = self._content_hash()
+        if (same_target and content_hash is not None
+                and content_hash == self._saved_content_hash
+                and os.path.exists(self._saved_filename)):
+            return self._saved_filename
+        
+        filename = self.session_manager.save_session(filename, history)
+        clear_history_log(filename)
+        self._history_log_stale = False
+        self._saved_filename = filename
+        self._last_saved_index = len(history)
+        self._snapshot_history_len = len(history)
+        self._saved_content_hash = content_hash if self.session_manager.db_saved else None
+        return filename
+    
+    def _content_hash(self):
+        """
+        Digest of what a save writes: session state, session data and the
+        conversation history. None if the data can't be serialized to hash.
+        """
+        manager = self.session_manager
+        try:
+            # default=str covers non-dict session data (Session 2's dataclass repr)
+            payload = json.dumps(
+                [manager.get_state().value, manager.session_data, self.conversation_history],
+                default=str
+            )
+        except (TypeError, ValueError):
+            return None
+        return hashlib.blake2b(payload.encode(), digest_size=16).digest()
     
     def load_session(self, filename):
         """Load session including conversation history"""
         history = self.session_manager.load_session(filename)
+        snapshot_len = len(history)
+        history.extend(load_history_log(filename, snapshot_len))
         self.conversation_history = history
+        self._saved_filename = filename
+        self._last_saved_index = len(history)
+        self._snapshot_history_len = snapshot_len
+        self._saved_content_hash = None
+        self._history_log_stale = False
+        self._sync_history_masks()
         return history
     
     # Abstract methods that must be implemented by subclasses
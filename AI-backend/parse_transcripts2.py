@@ -482,7 +482,8 @@ def process_all_files(folder_path='.'):
     # Create CSV in root folder (not in transcripts folder)
     output_file = Path('.') / 'coach_responses.csv'
     
-    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+    # One large buffer so the rows are flushed in a few big writes
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
         fieldnames = ['participant_response', 'coach_response', 'context_category', 
                      'goal_type', 'confidence_level', 'keywords', 'source_file']
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
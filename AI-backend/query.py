@@ -245,15 +245,24 @@ class VectorSearch:
             for r in results
         ]
     
-    def search_with_details(self, query, limit=3, min_similarity=0.4):
+    def embed_query(self, query):
         """
-        Pure vector search (faster than hybrid) with detailed results
+        Generate the embedding used by search_with_details for a query
         """
-        
-        query_embedding = self.client.Embedding.create(
+        return self.client.Embedding.create(
             model="text-embedding-3-small",
             input=query
         ).data[0].embedding
+    
+    def search_with_details(self, query, limit=3, min_similarity=0.4, query_embedding=None):
+        """
+        Pure vector search (faster than hybrid) with detailed results
+        
+        Pass query_embedding to reuse an embedding from embed_query().
+        """
+        
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
         
         conn = self.get_db_connection()
         cur = conn.cursor()
@@ -53,7 +53,7 @@ class UnifiedRAGChatbot:
         elif self.model_info['provider'] == 'anthropic':
             self.anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
     
-    def retrieve(self, query, min_similarity=0.4):
+    def retrieve(self, query, min_similarity=0.4, query_embedding=None):
         """
         Retrieve relevant coaching examples from vector database
         """
@@ -61,7 +61,8 @@ class UnifiedRAGChatbot:
         results = self.searcher.search_with_details(
             query, 
             limit=self.top_k,
-            min_similarity=min_similarity
+            min_similarity=min_similarity,
+            query_embedding=query_embedding
         )
         return results
     
@@ -3,6 +3,7 @@ import os
 import re
 from datetime import datetime
 from enum import Enum
+from types import MappingProxyType
 from typing import Any, Dict, Optional, Tuple
 
 from utils.database import save_session_to_db
@@ -92,7 +93,14 @@ class Session1Manager:
         }
         self.program_info_file = program_info_file
         self.program_info = load_program_info(program_info_file)
+        self.db_saved = False  # Whether the last save_session reached the database
         self.llm_client = llm_client
+        self._summary = {
+            "current_state": None,
+            "session_data": None,
+            "duration_turns": 0,
+            "goals_summary": None,
+        }
         self._log_debug(f"Session 1 initialized with UID: {self.uid}")
 
     def _log_debug(self, message: str):
@@ -171,7 +179,7 @@ class Session1Manager:
         result = create_state_result()
 
         # State machine logic
-        if self.state == SessionState.GREETINGS:
+        if self.state is SessionState.GREETINGS:
             if user_input.strip() == "[START_SESSION]":
                 result["next_state"] = None
                 result[
@@ -189,7 +197,7 @@ class Session1Manager:
                 "context"
             ] = f"User's name: {self.session_data.get('user_name', 'Not provided')}\n\nExplain program details."
 
-        elif self.state == SessionState.PROGRAM_DETAILS:
+        elif self.state is SessionState.PROGRAM_DETAILS:
             if any(
                 word in user_lower
                 for word in ["yes", "yeah", "yep", "sure", "i do", "i have"]
@@ -210,7 +218,7 @@ class Session1Manager:
                 result["next_state"] = SessionState.AWAITING_YES_NO
                 result["context"] = "Ask if they have questions about the program."
 
-        elif self.state == SessionState.QUESTIONS_ABOUT_PROGRAM:
+        elif self.state is SessionState.QUESTIONS_ABOUT_PROGRAM:
             is_asking = "?" in user_input or len(user_input.split()) > 3
             no_more = any(
                 word in user_lower
@@ -243,7 +251,7 @@ class Session1Manager:
             else:
                 result["context"] = "Ask if they have any questions about the program."
 
-        elif self.state == SessionState.AWAITING_YES_NO:
+        elif self.state is SessionState.AWAITING_YES_NO:
             coach_asking_about_questions = False
             if self.session_data.get("last_coach_response"):
                 coach_lower = self.session_data["last_coach_response"].lower()
@@ -300,7 +308,7 @@ class Session1Manager:
                         "context"
                     ] = "Ask user to clarify: do they have questions about the program? (yes/no)"
 
-        elif self.state == SessionState.ANSWERING_QUESTION:
+        elif self.state is SessionState.ANSWERING_QUESTION:
             has_more = any(
                 word in user_lower
                 for word in [
@@ -343,13 +351,13 @@ class Session1Manager:
                     "context"
                 ] = "Ask if they have any other questions about the program before starting."
 
-        elif self.state == SessionState.PROMPT_TALK_ABOUT_SELF:
+        elif self.state is SessionState.PROMPT_TALK_ABOUT_SELF:
             result["next_state"] = SessionState.GETTING_TO_KNOW_YOU
             result[
                 "context"
             ] = "Transition to discovery. Explain you'll ask questions to know them."
 
-        elif self.state == SessionState.GETTING_TO_KNOW_YOU:
+        elif self.state is SessionState.GETTING_TO_KNOW_YOU:
             discovery = self.session_data["discovery"]
             asked = discovery["questions_asked"]
 
@@ -441,7 +449,7 @@ Remaining: {', '.join(next_questions)}
 Acknowledge their response warmly, then ask:
 {question_prompts.get(next_topic, 'Ask next discovery question')}"""
 
-        elif self.state == SessionState.GOALS:
+        elif self.state is SessionState.GOALS:
             goal_candidate = user_input.strip()
 
             if is_likely_goal(goal_candidate):
@@ -475,7 +483,7 @@ Explain what's missing and guide refinement."""
                     "context"
                 ] = "Not a clear goal. Ask them to describe what they'd like to achieve."
 
-        elif self.state == SessionState.CHECK_SMART:
+        elif self.state is SessionState.CHECK_SMART:
             smart_analysis = self.session_data.get("goal_smart_analysis", {})
             is_smart = smart_analysis.get("is_smart", False)
 
@@ -497,7 +505,7 @@ Suggestions: {suggestions}
 
 Guide them to make it more SMART. Be specific about what's missing."""
 
-        elif self.state == SessionState.REFINE_GOAL:
+        elif self.state is SessionState.REFINE_GOAL:
             goal_candidate = user_input.strip()
 
             # First, check if coach summarized a refined goal in their last response
@@ -753,7 +761,7 @@ Ask specific question to get the missing piece. What exactly do they need to add
                 else:
                     result["context"] = "Ask user to refine their goal."
 
-        elif self.state == SessionState.CONFIDENCE_CHECK:
+        elif self.state is SessionState.CONFIDENCE_CHECK:
             confidence = extract_number(user_input)
             if confidence:
                 self.session_data["confidence_level"] = confidence
@@ -774,7 +782,7 @@ Ask specific question to get the missing piece. What exactly do they need to add
             else:
                 result["context"] = "Ask for numeric confidence (1-10)"
 
-        elif self.state == SessionState.LOW_CONFIDENCE:
+        elif self.state is SessionState.LOW_CONFIDENCE:
             if (
                 "rework" in user_lower
                 or "change" in user_lower
@@ -790,13 +798,13 @@ Ask specific question to get the missing piece. What exactly do they need to add
                     "context"
                 ] = "Acknowledge concerns. Move to asking about more goals."
 
-        elif self.state == SessionState.HIGH_CONFIDENCE:
+        elif self.state is SessionState.HIGH_CONFIDENCE:
             result["next_state"] = SessionState.ASK_MORE_GOALS
             result[
                 "context"
             ] = "High confidence confirmed. Ask if they want to set another goal."
 
-        elif self.state == SessionState.ASK_MORE_GOALS:
+        elif self.state is SessionState.ASK_MORE_GOALS:
             wants_more = any(
                 word in user_lower
                 for word in [
@@ -944,7 +952,7 @@ Acknowledge their plan. Before ending, ask the user: 'Is there anything else you
                     "context"
                 ] = "Ask user to clarify: would they like to set another goal or focus on this one?"
 
-        elif self.state == SessionState.REMEMBER_GOAL:
+        elif self.state is SessionState.REMEMBER_GOAL:
             tracking_methods = [
                 "calendar",
                 "reminder",
@@ -1046,7 +1054,7 @@ Before ending, ask the user: 'Is there anything else you'd like to discuss befor
             else:
                 result["context"] = "Acknowledge and prepare to wrap up session."
 
-        elif self.state == SessionState.CONFIRM_END_SESSION:
+        elif self.state is SessionState.CONFIRM_END_SESSION:
             # Confirmation gate before truly ending the session
             confirm_done_phrases = [
                 "yes",
@@ -1099,7 +1107,7 @@ Address what the user said. They may have a new topic, question, or goal to disc
                     "context"
                 ] = "User confirmed they are done. Provide a warm, brief goodbye and confirm next session is in 1 week."
 
-        elif self.state == SessionState.END_SESSION:
+        elif self.state is SessionState.END_SESSION:
             # Session is complete - stay in END_SESSION
             result[
                 "context"
@@ -1151,16 +1159,30 @@ Address what the user said. They may have a new topic, question, or goal to disc
                 )
 
     def get_session_summary(self) -> Dict[str, Any]:
-        """Get summary of session data"""
-        return {
-            "current_state": self.state.value,
-            "session_data": self.session_data,
-            "duration_turns": self.session_data["turn_count"],
-            "goals_summary": format_goals_summary(self.session_data["goal_details"]),
-        }
+        """
+        Get summary of session data. The same dict is refreshed and returned
+        on every call, so read it rather than keeping or mutating it;
+        its session_data is a read-only view of the live session data.
+        """
+        summary = self._summary
+        summary["current_state"] = self.state.value
+        summary["session_data"] = MappingProxyType(self.session_data)
+        summary["duration_turns"] = self.session_data["turn_count"]
+        summary["goals_summary"] = format_goals_summary(self.session_data["goal_details"])
+        return summary
+
+    def save_session(
+        self,
+        filename: str = None,
+        conversation_history: list = None,
+        snapshot_history: list = None,
+    ):
+        """
+        Save session using unified storage format and database.
 
-    def save_session(self, filename: str = None, conversation_history: list = None):
-        """Save session using unified storage format and database"""
+        snapshot_history, when given, is the chat history written to the file
+        instead of conversation_history (the database always gets the full one).
+        """
         self._log_debug("Saving session with unified format")
 
         # Prepare discovery data
@@ -1217,7 +1239,8 @@ Address what the user said. They may have a new topic, question, or goal to disc
         }
 
         # Save to PostgreSQL database
-        if save_session_to_db(self.uid, 1, full_data):
+        self.db_saved = save_session_to_db(self.uid, 1, full_data)
+        if self.db_saved:
             self._log_debug(f"Session saved to database for UID: {self.uid}")
         else:
             self._log_debug("Warning: Failed to save to database")
@@ -1231,7 +1254,9 @@ Address what the user said. They may have a new topic, question, or goal to disc
             discovery=discovery,
             goals=goals,
             session_metadata=session_metadata,
-            conversation_history=conversation_history,
+            conversation_history=(
+                conversation_history if snapshot_history is None else snapshot_history
+            ),
             filename=filename,
         )
 
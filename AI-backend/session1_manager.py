@@ -31,7 +31,7 @@ class SessionBasedRAGChatbot(BaseSessionRAGChatbot):
         # Session 1 specific setup
         self.program_info_file = program_info_file
         self.session_manager = Session1Manager(program_info_file=program_info_file, uid=uid)
-        self.session_manager.set_llm_client(self._create_llm_evaluator())
+        self.session_manager.set_llm_client(self._llm_evaluator)
     
     def _get_memory_summary(self):
         """Generate Session 1 specific memory summary"""
@@ -133,7 +133,7 @@ class SessionBasedRAGChatbot(BaseSessionRAGChatbot):
     def reset_session(self):
         """Reset Session 1 to beginning"""
         self.session_manager = Session1Manager(self.program_info_file)
-        self.session_manager.set_llm_client(self._create_llm_evaluator())
+        self.session_manager.set_llm_client(self._llm_evaluator)
         self.conversation_history = []
         print("✓ Session reset to beginning")
 
@@ -203,7 +203,7 @@ def interactive_session_chat():
             continue
         
         if user_input.lower() == 'save':
-            filename = chatbot.save_session()
+            filename = chatbot.save_session(checkpoint=True)
             print(f"✓ Session saved to {filename}\n")
             continue
         
@@ -222,7 +222,7 @@ def interactive_session_chat():
             print("\n")
             
             session_state = chatbot.session_manager.get_state()
-            if session_state == SessionState.END_SESSION:
+            if session_state is SessionState.END_SESSION:
                 print("\n" + "=" * 80)
                 print("SESSION 1 COMPLETE!")
                 print("=" * 80)
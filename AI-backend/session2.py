@@ -1,8 +1,12 @@
+import functools
 import json
 import os
 import re
+import time
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from enum import Enum
+from enum import Enum, IntFlag
+from types import MappingProxyType
 from typing import Any, Dict, List, Optional
 
 from utils.database import save_session_to_db
@@ -11,24 +15,58 @@ from utils.goal_detection import is_likely_goal
 # Utilities
 from utils.smart_evaluation import (
     create_concise_goal,
+    evaluate_smart_goal_delta_with_llm,
     evaluate_smart_goal_with_llm,
+    goal_addition,
     heuristic_smart_check,
 )
 from utils.state_helpers import (
     check_affirmative,
-    check_done,
     check_negative,
     check_wants_more,
     create_state_result,
     extract_number,
 )
-from utils.state_prompts import get_session2_prompt
+from utils.state_prompts import session2_prompt_renderer
 from utils.unified_storage import (
     extract_user_profile,
     get_active_goals,
     save_unified_session,
 )
 
+# Keyword matchers used by process_user_input. Word boundaries avoid hits
+# inside unrelated words ("and" in "understand", "no" in "know"); verb stems
+# take \w* so inflections like "keeping" or "changing" still match.
+_SAME_KW_RE = re.compile(r"\b(?:same|current\w*|keep\w*|continu\w*|stick\w*|focusing)\b")
+_ADD_KW_RE = re.compile(r"\b(?:add\w*|plus|also|another|new|and)\b")
+_DIFFERENT_KW_RE = re.compile(r"\b(?:different\w*|chang\w*|fresh|switch\w*)\b")
+_WANTS_CHANGE_RE = re.compile(
+    r"\b(?:yes|yeah|chang\w*|modif\w*|adjust\w*|different\w*|worr\w*|concerned|fear\w*|harder)\b"
+)
+_NO_CHANGE_RE = re.compile(r"\b(?:no|not|nope|nothing|none|good|fine|keep\w*|same)\b")
+# Numbers are matched as substrings so "30min" still counts as a specific change
+_SPECIFIC_CHANGE_RE = re.compile(r"30|20|15|mins|minutes|reduce|instead|maybe")
+_KEEP_ALL_RE = re.compile(r"\b(?:all|both|current\w*|same)\b")
+_CONVERSATIONAL_RE = re.compile(
+    r"\b(?:like i said|i told you|as i mentioned|i already said|its going to be fun"
+    r"|it's fun|i want to do this|i will want to|that makes sense|i understand|i like|because)\b"
+)
+_USER_DONE_RE = re.compile(
+    r"\b(?:yes|yeah|yep|sure|no|not|nope|nothing|none|nah|i'm good|im good"
+    r"|that's all|thats all|all set|bye|goodbye|see you|thanks|thank you|take care)\b"
+)
+_NEW_GOAL_AFFIRMATIONS = frozenset({"yes", "yeah", "yep", "no", "nope", "ok", "okay"})
+_REFINE_AFFIRMATIONS = _NEW_GOAL_AFFIRMATIONS | {"correct", "right"}
+_NUM_RE = re.compile(r"\d+")
+_CONFIDENCE_NUM_RE = re.compile(r"\b([1-9]|10)\b")
+
+# Module-wide switch for [DEBUG] output; SESSION2_DEBUG=0 silences every
+# manager regardless of its own debug setting
+DEBUG_ENABLED = os.getenv("SESSION2_DEBUG", "1") != "0"
+
+# Bookkeeping fields left out of get_session_summary
+_SUMMARY_INTERNAL_FIELDS = ("session_start_ns", "smart_eval_cache_stats", "prev_goal_candidate")
+
 
 class Session2State(Enum):
     """States for Session 2 conversation flow"""
@@ -66,10 +104,111 @@ class Session2State(Enum):
     CONFIRM_END_SESSION = "confirm_end_session"
     END_SESSION = "end_session"
 
+    # Members are singletons compared with `is`, so hash by identity in C
+    # rather than Enum's Python-level hash(self._name_) on every dict lookup
+    __hash__ = object.__hash__
+
+
+@functools.lru_cache(maxsize=len(Session2State))
+def _state_from_value(value: str) -> Session2State:
+    """Session2State for a saved state value (memoized, as loads repeat the same values)"""
+    return Session2State(value)
+
+
+class AskedQuestion(IntFlag):
+    """Questions already asked this session, tracked as a bitmask"""
+
+    GREETING = 1
+    CHECK_IN = 2
+    STRESS_LEVEL = 4
+    GOAL_COMPLETION = 8
+    SUCCESSES_CHALLENGES = 16
+
+
+@dataclass(slots=True)
+class Session2Data:
+    """Per-session conversation state for Session 2"""
+
+    uid: Optional[str] = None
+    user_name: Optional[str] = None
+    previous_goals: List[Dict[str, Any]] = field(default_factory=list)
+    discovery_info: Dict[str, Any] = field(default_factory=dict)
+    discovery_questions: List[str] = field(default_factory=list)
+    discovery_responses: List[Dict[str, Any]] = field(default_factory=list)
+    discovery_question_index: int = 0
+    stress_level: Optional[int] = None
+    # Path-specific containers stay None until something fills them, so a
+    # session that never takes that path doesn't allocate them
+    goal_completion_status: Optional[Dict[str, Any]] = None
+    successes: Optional[List[str]] = None
+    challenges: Optional[List[str]] = None
+    path_chosen: Optional[str] = None
+    goals_to_keep: List[str] = field(default_factory=list)
+    goals_to_keep_identified: bool = False
+    new_goals: List[str] = field(default_factory=list)
+    goals_completed_count: int = 0
+    current_goal: Optional[str] = None
+    goal_parts: List[str] = field(default_factory=list)
+    goal_smart_analysis: Optional[Dict[str, Any]] = None
+    smart_refinement_attempts: int = 0
+    confidence_level: Optional[int] = None
+    changes_needed: Optional[Dict[str, Any]] = None
+    solutions: Optional[Dict[str, Any]] = None
+    challenges_discussed: bool = False
+    adjustments_discussed: bool = False
+    session_start_ns: int = field(default_factory=time.monotonic_ns)
+    turn_count: int = 0
+    last_coach_response: Optional[str] = None
+    tracking_method_discussed: bool = False
+    anything_else_asked: bool = False
+    confidence_asked_for_same_goal: bool = False
+    explored_low_confidence: bool = False
+    questions_asked: AskedQuestion = AskedQuestion(0)
+    final_goodbye_given: bool = False
+    smart_eval_cache_stats: Dict[str, int] = field(
+        default_factory=lambda: {"hits": 0, "misses": 0}
+    )
+    prev_goal_candidate: Optional[str] = None
+
+    @property
+    def session_start(self) -> str:
+        """Wall-clock ISO timestamp of session start, derived only when serializing"""
+        elapsed = (time.monotonic_ns() - self.session_start_ns) / 1e9
+        return datetime.fromtimestamp(time.time() - elapsed).isoformat()
+
+    # Mapping-style reads for shared helpers (e.g. state prompts) that take a dict
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
 
 class Session2Manager:
     """Manages conversation flow for Session 2"""
 
+    # One manager per live session; fixed slots keep instances small
+    __slots__ = (
+        "debug",
+        "state",
+        "uid",
+        "session_data",
+        "data_version",
+        "db_saved",
+        "llm_client",
+        "_state_handlers",
+        "_goal_keyword_index",
+        "_goal_keyword_re",
+        "_new_goal_keys",
+        "_prompt_state",
+        "_render_state_prompt",
+        "_frozen_prompt",
+        "_summary_cache",
+    )
+
     def __init__(self, user_profile: Dict = None, llm_client=None, debug=True):
         self.debug = debug
         self.state = Session2State.GREETINGS
@@ -102,62 +241,137 @@ class Session2Manager:
         # Extract discovery questions (placeholder - can be expanded)
         discovery_questions = []
 
-        self.session_data = {
-            "uid": self.uid,
-            "user_name": user_name,
-            "previous_goals": previous_goals,
-            "discovery_info": discovery_info,  # Store for later use
-            "discovery_questions": discovery_questions,
-            "discovery_responses": [],
-            "discovery_question_index": 0,
-            "stress_level": None,
-            "goal_completion_status": {},
-            "successes": [],
-            "challenges": [],
-            "path_chosen": None,
-            "goals_to_keep": [],
-            "goals_to_keep_identified": False,
-            "new_goals": [],
-            "goals_completed_count": 0,
-            "current_goal": None,
-            "goal_parts": [],
-            "goal_smart_analysis": None,
-            "smart_refinement_attempts": 0,
-            "confidence_level": None,
-            "changes_needed": {},
-            "solutions": {},
-            "challenges_discussed": False,
-            "adjustments_discussed": False,
-            "session_start": datetime.now().isoformat(),
-            "turn_count": 0,
-            "last_coach_response": None,
-            "tracking_method_discussed": False,
-            "anything_else_asked": False,
-            "confidence_asked_for_same_goal": False,
-            "explored_low_confidence": False,
-            "questions_asked": set(),
-            "final_goodbye_given": False,
-        }
+        self.session_data = Session2Data(
+            uid=self.uid,
+            user_name=user_name,
+            previous_goals=previous_goals,
+            discovery_info=discovery_info,  # Store for later use
+            discovery_questions=discovery_questions,
+        )
+        # Bumped whenever session_data may have changed so callers can cache derived views
+        self.data_version = 0
+        self._summary_cache = (None, None)  # ((data_version, state), summary)
+        self.db_saved = False  # Whether the last save_session reached the database
         self.llm_client = llm_client
+        # One dict lookup per turn instead of walking an if/elif chain over every state
+        self._state_handlers = {
+            Session2State.GREETINGS: self._handle_greetings,
+            Session2State.CHECK_IN_GOALS: self._handle_check_in_goals,
+            Session2State.STRESS_LEVEL: self._handle_stress_level,
+            Session2State.DISCOVERY_QUESTIONS: self._handle_discovery_questions,
+            Session2State.GOAL_COMPLETION: self._handle_goal_completion,
+            Session2State.GOALS_FOR_NEXT_WEEK: self._handle_goals_for_next_week,
+            Session2State.SAME_GOALS_SUCCESSES_CHALLENGES: self._handle_same_goals_successes_challenges,
+            Session2State.SAME_ANYTHING_TO_CHANGE: self._handle_same_anything_to_change,
+            Session2State.SAME_WHAT_CONCERNS: self._handle_same_what_concerns,
+            Session2State.SAME_EXPLORE_SOLUTIONS: self._handle_same_explore_solutions,
+            Session2State.SAME_NOT_SUCCESSFUL: self._handle_same_not_successful,
+            Session2State.SAME_SUCCESSFUL: self._handle_same_successful,
+            Session2State.DIFFERENT_WHICH_GOALS: self._handle_different_which_goals,
+            Session2State.DIFFERENT_KEEPING_AND_NEW: self._handle_different_keeping_and_new,
+            Session2State.JUST_NEW_GOALS: self._handle_just_new_goals,
+            Session2State.REFINE_GOAL: self._handle_refine_goal,
+            Session2State.CONFIDENCE_CHECK: self._handle_confidence_check,
+            Session2State.LOW_CONFIDENCE: self._handle_low_confidence,
+            Session2State.HIGH_CONFIDENCE: self._handle_high_confidence,
+            Session2State.MAKE_ACHIEVABLE: self._handle_make_achievable,
+            Session2State.REMEMBER_GOAL: self._handle_remember_goal,
+            Session2State.MORE_GOALS_CHECK: self._handle_more_goals_check,
+            Session2State.CONFIRM_END_SESSION: self._handle_confirm_end_session,
+            Session2State.END_SESSION: self._handle_end_session,
+        }
+        self._build_goal_keyword_index()
+        self._rebuild_new_goal_keys()
+        self._prompt_state = None
+        self._render_state_prompt = None
+        self._frozen_prompt = None
         self._log_debug(
-            f"Session 2 initialized with user: {user_name}, UID: {self.uid}"
+            "Session 2 initialized with user: %s, UID: %s",
+            user_name,
+            self.uid,
         )
-        self._log_debug(f"Previous goals loaded: {len(previous_goals)}")
+        self._log_debug("Previous goals loaded: %s", len(previous_goals))
+
+    def _build_goal_keyword_index(self):
+        """
+        Index the words (longer than 4 chars) of each previous goal so
+        DIFFERENT_WHICH_GOALS can find every mentioned goal in one regex pass.
+        Matching is by substring, as with checking each word against the input.
+        """
+        keyword_goals: Dict[str, set] = {}
+        for i, goal_info in enumerate(self.session_data.previous_goals):
+            for word in goal_info["goal"].lower().split():
+                if len(word) > 4:
+                    keyword_goals.setdefault(word, set()).add(i)
+
+        # A match on a keyword also counts for every keyword contained in it
+        self._goal_keyword_index = {
+            word: set().union(
+                *(goals for other, goals in keyword_goals.items() if other in word)
+            )
+            for word in keyword_goals
+        }
+        if keyword_goals:
+            alternation = "|".join(
+                re.escape(w) for w in sorted(keyword_goals, key=len, reverse=True)
+            )
+            # Zero-width lookahead so overlapping keyword occurrences are all seen
+            self._goal_keyword_re = re.compile(f"(?=({alternation}))")
+        else:
+            self._goal_keyword_re = None
+
+    @staticmethod
+    def _goal_key(goal: Optional[str]) -> str:
+        """Normalized goal text for duplicate checks (case and spacing ignored)"""
+        return " ".join((goal or "").lower().split())
+
+    def _rebuild_new_goal_keys(self):
+        """Recompute the duplicate-check keys of everything in new_goals"""
+        self._new_goal_keys = {self._goal_key(g) for g in self.session_data.new_goals}
+
+    def _add_new_goal(self, goal: str):
+        """
+        Append goal to new_goals unless an equivalent goal is already there.
+        A repeated goal is moved to the end instead, since refinement
+        updates new_goals[-1].
+        """
+        key = self._goal_key(goal)
+        new_goals = self.session_data.new_goals
+        if key not in self._new_goal_keys:
+            self._new_goal_keys.add(key)
+            new_goals.append(goal)
+            return
+
+        for i, existing in enumerate(new_goals):
+            if self._goal_key(existing) == key:
+                new_goals.append(new_goals.pop(i))
+                break
+
+    def _set_last_new_goal(self, goal: str):
+        """Replace the goal being refined (new_goals[-1]) with its final wording"""
+        new_goals = self.session_data.new_goals
+        if new_goals:
+            self._new_goal_keys.discard(self._goal_key(new_goals[-1]))
+            new_goals[-1] = goal
+        else:
+            new_goals.append(goal)
+        self._new_goal_keys.add(self._goal_key(goal))
 
     def _create_concise_goal(self, full_goal: str) -> str:
         """Create a concise version of the goal for storage"""
         return create_concise_goal(full_goal)
 
-    def _log_debug(self, message: str):
-        if self.debug:
-            print(f"[DEBUG] {message}", flush=True)
+    def _log_debug(self, message: str, *args):
+        # %-style args are only formatted when debug output is on
+        if DEBUG_ENABLED and self.debug:
+            print("[DEBUG] " + (message % args if args else message), flush=True)
 
-    def _mark_question_asked(self, question_key: str):
-        self.session_data["questions_asked"].add(question_key)
-        self._log_debug(f"Marked question asked: {question_key}")
+    def _mark_question_asked(self, question: AskedQuestion):
+        self.session_data.questions_asked |= question
+        self._log_debug("Marked question asked: %s", question.name.lower())
 
-    def _has_asked_question(self, question_key: str) -> bool:
-        return question_key in self.session_data["questions_asked"]
+    def _has_asked_question(self, question: AskedQuestion) -> bool:
+        return bool(self.session_data.questions_asked & question)
 
     def set_llm_client(self, llm_client):
         self.llm_client = llm_client
@@ -165,29 +379,106 @@ class Session2Manager:
 
     def evaluate_smart_goal(self, goal: str) -> Dict[str, Any]:
         """Use LLM to evaluate if a goal is SMART"""
-        self._log_debug(f"Evaluating SMART goal: '{goal}'")
+        self._log_debug("Evaluating SMART goal: '%s'", goal)
 
         if not self.llm_client:
             self._log_debug("No LLM client, using heuristic check")
             return heuristic_smart_check(goal)
 
         try:
-            result = evaluate_smart_goal_with_llm(goal, self.llm_client)
+            result = evaluate_smart_goal_with_llm(
+                goal, self.llm_client, stats=self.session_data.smart_eval_cache_stats
+            )
             self._log_debug(
-                f"SMART evaluation result: is_smart={result['is_smart']}, missing={result['missing_criteria']}"
+                "SMART evaluation result: is_smart=%s, missing=%s",
+                result["is_smart"],
+                result["missing_criteria"],
             )
             return result
         except Exception as e:
-            self._log_debug(f"SMART evaluation error: {e}")
+            self._log_debug("SMART evaluation error: %s", e)
             return heuristic_smart_check(goal)
 
+    def _evaluate_refined_goal(self, goal: str) -> Dict[str, Any]:
+        """
+        Evaluate a goal built up during refinement. When it only extends the
+        previously evaluated candidate by a few words, ask only about the
+        criteria the previous verdict left unmet.
+        """
+        prev_goal = self.session_data.prev_goal_candidate
+        prev_eval = self.session_data.goal_smart_analysis
+        self.session_data.prev_goal_candidate = goal
+
+        added_text = goal_addition(prev_goal, goal)
+        if not (self.llm_client and prev_eval and added_text):
+            return self.evaluate_smart_goal(goal)
+
+        self._log_debug("Delta SMART evaluation for addition: '%s'", added_text)
+        result = evaluate_smart_goal_delta_with_llm(
+            goal,
+            added_text,
+            prev_eval,
+            self.llm_client,
+            stats=self.session_data.smart_eval_cache_stats,
+        )
+        self._log_debug(
+            "SMART evaluation result: is_smart=%s, missing=%s",
+            result["is_smart"],
+            result["missing_criteria"],
+        )
+        return result
+
+    def _start_new_goal(
+        self,
+        goal: str,
+        smart_eval: Dict[str, Any],
+        result: Dict[str, Any],
+        smart_context: str,
+        refine_context: str,
+    ):
+        """
+        Make goal the current new goal and route on its SMART evaluation:
+        straight to the confidence check, or to refinement otherwise.
+        refine_context may use {goal} and {missing} placeholders.
+        """
+        sd = self.session_data
+        sd.current_goal = goal
+        self._add_new_goal(goal)
+        sd.goal_smart_analysis = smart_eval
+        sd.smart_refinement_attempts = 0
+
+        if smart_eval["is_smart"]:
+            result["next_state"] = Session2State.CONFIDENCE_CHECK
+            result["context"] = smart_context
+        else:
+            result["next_state"] = Session2State.REFINE_GOAL
+            result["context"] = refine_context.format(
+                goal=goal, missing=", ".join(smart_eval["missing_criteria"])
+            )
+
+    def _accept_refined_goal(
+        self, complete_goal: str, result: Dict[str, Any], context: str
+    ):
+        """Store the concise form of a refined goal and move to the confidence check"""
+        sd = self.session_data
+        concise_goal = self._create_concise_goal(complete_goal)
+        sd.current_goal = concise_goal
+
+        self._set_last_new_goal(concise_goal)
+
+        # Clear goal parts for next goal
+        sd.goal_parts = []
+
+        result["next_state"] = Session2State.CONFIDENCE_CHECK
+        result["context"] = context
+
     def get_state(self) -> Session2State:
         return self.state
 
     def set_state(self, new_state: Session2State):
         old_state = self.state
         self.state = new_state
-        self._log_debug(f"STATE TRANSITION: {old_state.value} -> {new_state.value}")
+        self._log_debug("STATE TRANSITION: %s -> %s", old_state.value, new_state.value)
 
     def process_user_input(
         self,
@@ -196,20 +487,33 @@ class Session2Manager:
         conversation_history: list = None,
     ) -> Dict[str, Any]:
         """Process user input and determine state transitions"""
+        sd = self.session_data
+
+        # The opening sentinel isn't a user turn: answer it before any per-turn bookkeeping
+        if (
+            self.state is Session2State.GREETINGS
+            and user_input.strip() == "[START_SESSION]"
+        ):
+            return create_state_result(
+                context=f"Welcome {sd.user_name or 'them'} back warmly. Keep it brief."
+            )
+
         user_lower = user_input.lower().strip()
-        self.session_data["turn_count"] += 1
+        sd.turn_count += 1
+        self.data_version += 1
 
-        self._log_debug(f"Processing input in state: {self.state.value}")
-        self._log_debug(f"User input: {user_input[:100]}...")
+        self._log_debug("Processing input in state: %s", self.state.value)
+        self._log_debug("User input: %s...", user_input[:100])
 
         if last_coach_response:
-            self.session_data["last_coach_response"] = last_coach_response
+            sd.last_coach_response = last_coach_response
 
         result = create_state_result()
 
         # CRITICAL: If we're in END_SESSION and goodbye was already given, stay there
-        if self.state == Session2State.END_SESSION and self.session_data.get(
-            "final_goodbye_given"
+        if (
+            self.state is Session2State.END_SESSION
+            and sd.final_goodbye_given
         ):
             result[
                 "context"
@@ -217,525 +521,449 @@ class Session2Manager:
             result["trigger_rag"] = False
             return result
 
-        if self.state == Session2State.GREETINGS:
-            if user_input.strip() == "[START_SESSION]":
-                result[
-                    "context"
-                ] = f"Welcome {self.session_data.get('user_name', 'them')} back warmly. Keep it brief."
-                return result
-
-            result["next_state"] = Session2State.CHECK_IN_GOALS
-            result["context"] = "Acknowledge briefly. Move to check-in."
-            self._mark_question_asked("greeting")
-
-        elif self.state == Session2State.CHECK_IN_GOALS:
-            result["next_state"] = Session2State.STRESS_LEVEL
-            result["context"] = "Acknowledge briefly. Ask stress level (1-10 scale)."
-            self._mark_question_asked("check_in")
-
-        elif self.state == Session2State.STRESS_LEVEL:
-            stress = extract_number(user_input)
-            if stress:
-                self.session_data["stress_level"] = stress
-                self._mark_question_asked("stress_level")
-
-                if self.session_data.get("discovery_questions"):
-                    result["next_state"] = Session2State.DISCOVERY_QUESTIONS
-                    result[
-                        "context"
-                    ] = f"Note stress: {stress}/10. Ask ONE discovery question."
-                else:
-                    result["next_state"] = Session2State.GOAL_COMPLETION
-                    result[
-                        "context"
-                    ] = f"Note stress: {stress}/10. Ask about goal completion."
-            else:
-                result["context"] = "Ask for stress level as a number (1-10)."
+        handler = self._state_handlers.get(self.state)
+        if handler:
+            handler(user_input, user_lower, result)
 
-        elif self.state == Session2State.DISCOVERY_QUESTIONS:
-            current_q_index = self.session_data["discovery_question_index"]
-            if current_q_index < len(self.session_data.get("discovery_questions", [])):
-                self.session_data["discovery_responses"].append(
-                    {
-                        "question": self.session_data["discovery_questions"][
-                            current_q_index
-                        ],
-                        "response": user_input,
-                    }
-                )
-                self.session_data["discovery_question_index"] += 1
+        if result["next_state"]:
+            self._log_debug("Next state will be: %s", result["next_state"].value)
+
+        return result
 
-            if self.session_data["discovery_question_index"] < 2 and self.session_data[
-                "discovery_question_index"
-            ] < len(self.session_data.get("discovery_questions", [])):
+    def _handle_greetings(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session2State.CHECK_IN_GOALS
+        result["context"] = "Acknowledge briefly. Move to check-in."
+        self._mark_question_asked(AskedQuestion.GREETING)
+
+    def _handle_check_in_goals(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session2State.STRESS_LEVEL
+        result["context"] = "Acknowledge briefly. Ask stress level (1-10 scale)."
+        self._mark_question_asked(AskedQuestion.CHECK_IN)
+
+    def _handle_stress_level(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        stress = extract_number(user_input)
+        if stress:
+            self.session_data.stress_level = stress
+            self._mark_question_asked(AskedQuestion.STRESS_LEVEL)
+
+            if self.session_data.discovery_questions:
+                result["next_state"] = Session2State.DISCOVERY_QUESTIONS
                 result[
                     "context"
-                ] = "Acknowledge briefly. Ask ONE more discovery question."
+                ] = f"Note stress: {stress}/10. Ask ONE discovery question."
             else:
                 result["next_state"] = Session2State.GOAL_COMPLETION
-                result["context"] = "Acknowledge. Ask about goal completion."
+                result[
+                    "context"
+                ] = f"Note stress: {stress}/10. Ask about goal completion."
+        else:
+            result["context"] = "Ask for stress level as a number (1-10)."
+
+    def _handle_discovery_questions(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        sd = self.session_data
+        current_q_index = sd.discovery_question_index
+        if current_q_index < len(sd.discovery_questions):
+            sd.discovery_responses.append(
+                {
+                    "question": sd.discovery_questions[
+                        current_q_index
+                    ],
+                    "response": user_input,
+                }
+            )
+            sd.discovery_question_index += 1
 
-        elif self.state == Session2State.GOAL_COMPLETION:
-            self._mark_question_asked("goal_completion")
-            result["next_state"] = Session2State.GOALS_FOR_NEXT_WEEK
+        if sd.discovery_question_index < 2 and (
+            sd.discovery_question_index
+            < len(sd.discovery_questions)
+        ):
             result[
                 "context"
-            ] = "Acknowledge their progress. Ask about next week's goals (same, keep some + add new, or completely new)."
-
-        elif self.state == Session2State.GOALS_FOR_NEXT_WEEK:
-            same_keywords = ["same", "current", "keep", "continue", "stick", "focusing"]
-            add_keywords = ["add", "plus", "also", "another", "new", "and"]
-            different_keywords = ["different", "change", "fresh", "switch"]
-
-            has_same = any(k in user_lower for k in same_keywords)
-            has_add = any(k in user_lower for k in add_keywords)
-            has_different = any(k in user_lower for k in different_keywords)
-
-            # If they said "add" while on same path, switch to different
-            if self.session_data.get("path_chosen") == "same" and has_add:
-                self.session_data["path_chosen"] = "different"
-                if self.session_data.get("previous_goals"):
-                    self.session_data["goals_to_keep"] = [
-                        g["goal"] for g in self.session_data["previous_goals"]
+            ] = "Acknowledge briefly. Ask ONE more discovery question."
+        else:
+            result["next_state"] = Session2State.GOAL_COMPLETION
+            result["context"] = "Acknowledge. Ask about goal completion."
+
+    def _handle_goal_completion(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        self._mark_question_asked(AskedQuestion.GOAL_COMPLETION)
+        result["next_state"] = Session2State.GOALS_FOR_NEXT_WEEK
+        result[
+            "context"
+        ] = "Acknowledge their progress. Ask about next week's goals (same, keep some + add new, or completely new)."
+
+    def _handle_goals_for_next_week(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        sd = self.session_data
+        has_same = bool(_SAME_KW_RE.search(user_lower))
+        has_add = bool(_ADD_KW_RE.search(user_lower))
+        has_different = bool(_DIFFERENT_KW_RE.search(user_lower))
+
+        # If they said "add" while on same path, switch to different
+        if sd.path_chosen == "same" and has_add:
+            sd.path_chosen = "different"
+            if sd.previous_goals:
+                sd.goals_to_keep = [
+                    g["goal"] for g in sd.previous_goals
+                ]
+                sd.goals_to_keep_identified = True
+            result["next_state"] = Session2State.DIFFERENT_KEEPING_AND_NEW
+            result["context"] = "They want to add a new goal. Ask what new goal."
+            return
+
+        # First time choosing path
+        if not sd.path_chosen:
+            # "Keep current and add new" = different path
+            if (has_same or has_add) and has_add:
+                sd.path_chosen = "different"
+                # Auto-identify they're keeping previous goals
+                if sd.previous_goals:
+                    sd.goals_to_keep = [
+                        g["goal"] for g in sd.previous_goals
                     ]
-                    self.session_data["goals_to_keep_identified"] = True
+                    sd.goals_to_keep_identified = True
                 result["next_state"] = Session2State.DIFFERENT_KEEPING_AND_NEW
-                result["context"] = "They want to add a new goal. Ask what new goal."
-                return result
-
-            # First time choosing path
-            if not self.session_data.get("path_chosen"):
-                # "Keep current and add new" = different path
-                if (has_same or has_add) and has_add:
-                    self.session_data["path_chosen"] = "different"
-                    # Auto-identify they're keeping previous goals
-                    if self.session_data.get("previous_goals"):
-                        self.session_data["goals_to_keep"] = [
-                            g["goal"] for g in self.session_data["previous_goals"]
-                        ]
-                        self.session_data["goals_to_keep_identified"] = True
-                    result["next_state"] = Session2State.DIFFERENT_KEEPING_AND_NEW
-                    result[
-                        "context"
-                    ] = "They want to keep current goals and add new. Ask what new goal."
-                # "Same goal only" = same path
-                elif has_same and not has_add and not has_different:
-                    self.session_data["path_chosen"] = "same"
-                    if self.session_data.get("previous_goals"):
-                        self.session_data["goals_to_keep"] = [
-                            g["goal"] for g in self.session_data["previous_goals"]
-                        ]
-                    result["next_state"] = Session2State.SAME_GOALS_SUCCESSES_CHALLENGES
-                    result[
-                        "context"
-                    ] = "Keeping same goal. Ask what went well and what was challenging."
-                # "Completely new" = new path
-                elif has_different and not has_same:
-                    self.session_data["path_chosen"] = "new"
-                    result["next_state"] = Session2State.JUST_NEW_GOALS
-                    result["context"] = "New goals. Ask what they'd like to focus on."
-                else:
-                    result[
-                        "context"
-                    ] = "Clarify: same goal, keep some + add new, or completely new?"
-            else:
-                result["context"] = "Path already chosen. Continue."
-
-        elif self.state == Session2State.SAME_GOALS_SUCCESSES_CHALLENGES:
-            if self._has_asked_question("successes_challenges"):
-                # They responded to successes/challenges - now ask if anything needs changing
-                result["next_state"] = Session2State.SAME_ANYTHING_TO_CHANGE
-                result[
-                    "context"
-                ] = "Acknowledge their response briefly (1 sentence). Ask: 'Is there anything about this goal that needs to be changed or worked on?'"
-            else:
-                # First time - ask the question
-                self._mark_question_asked("successes_challenges")
-                result["context"] = "Ask: What went well? What was challenging?"
-
-        elif self.state == Session2State.SAME_ANYTHING_TO_CHANGE:
-            wants_change = any(
-                w in user_lower
-                for w in [
-                    "yes",
-                    "yeah",
-                    "change",
-                    "modify",
-                    "adjust",
-                    "different",
-                    "worry",
-                    "concerned",
-                    "fear",
-                    "harder",
-                ]
-            )
-            no_change = any(
-                w in user_lower for w in ["no", "nope", "good", "fine", "keep", "same"]
-            )
-
-            if wants_change:
-                result["next_state"] = Session2State.SAME_WHAT_CONCERNS
                 result[
                     "context"
-                ] = "They want to make changes. Ask what concerns they have or what solutions they're thinking about."
-            elif no_change:
-                result["next_state"] = Session2State.CONFIRM_END_SESSION
+                ] = "They want to keep current goals and add new. Ask what new goal."
+            # "Same goal only" = same path
+            elif has_same and not has_add and not has_different:
+                sd.path_chosen = "same"
+                if sd.previous_goals:
+                    sd.goals_to_keep = [
+                        g["goal"] for g in sd.previous_goals
+                    ]
+                result["next_state"] = Session2State.SAME_GOALS_SUCCESSES_CHALLENGES
                 result[
                     "context"
-                ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
+                ] = "Keeping same goal. Ask what went well and what was challenging."
+            # "Completely new" = new path
+            elif has_different and not has_same:
+                sd.path_chosen = "new"
+                result["next_state"] = Session2State.JUST_NEW_GOALS
+                result["context"] = "New goals. Ask what they'd like to focus on."
             else:
                 result[
                     "context"
-                ] = "Clarify: Do they want to change anything about their goal? Yes or no?"
-
-        elif self.state == Session2State.SAME_WHAT_CONCERNS:
-            # They're expressing concerns or proposing solutions
-            result["next_state"] = Session2State.SAME_EXPLORE_SOLUTIONS
+                ] = "Clarify: same goal, keep some + add new, or completely new?"
+        else:
+            result["context"] = "Path already chosen. Continue."
+
+    def _handle_same_goals_successes_challenges(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        if self._has_asked_question(AskedQuestion.SUCCESSES_CHALLENGES):
+            # They responded to successes/challenges - now ask if anything needs changing
+            result["next_state"] = Session2State.SAME_ANYTHING_TO_CHANGE
             result[
                 "context"
-            ] = "Acknowledge their concerns. Ask what solutions or adjustments they're thinking about."
-
-        elif self.state == Session2State.SAME_EXPLORE_SOLUTIONS:
-            # Check if they're proposing a specific modification
-            has_specific_change = any(
-                word in user_lower
-                for word in [
-                    "30",
-                    "20",
-                    "15",
-                    "mins",
-                    "minutes",
-                    "reduce",
-                    "instead",
-                    "maybe",
-                ]
-            )
-
-            if has_specific_change:
-                self._log_debug("User proposing specific goal modification")
-                # Extract the modified goal
-                goal_candidate = user_input.strip()
-                self.session_data["current_goal"] = goal_candidate
-
-                # Add to new goals
-                if (
-                    not self.session_data["new_goals"]
-                    or self.session_data["new_goals"][-1] != goal_candidate
-                ):
-                    self.session_data["new_goals"].append(goal_candidate)
-
-                # Evaluate if SMART
-                smart_eval = self.evaluate_smart_goal(goal_candidate)
-                self.session_data["goal_smart_analysis"] = smart_eval
-                self.session_data["smart_refinement_attempts"] = 0
-
-                if smart_eval["is_smart"]:
-                    result["next_state"] = Session2State.CONFIDENCE_CHECK
-                    result["context"] = "Modified goal is SMART! Ask confidence (1-10)."
-                else:
-                    result["next_state"] = Session2State.REFINE_GOAL
-                    result[
-                        "context"
-                    ] = f"Modified goal missing: {', '.join(smart_eval['missing_criteria'])}. Help refine it."
-            else:
-                # Still exploring - help them think through solutions
-                result[
-                    "context"
-                ] = "Guide them toward a specific adjustment. What would make it more achievable?"
-
-        elif self.state == Session2State.SAME_NOT_SUCCESSFUL:
+            ] = "Acknowledge their response briefly (1 sentence). Ask: 'Is there anything about this goal that needs to be changed or worked on?'"
+        else:
+            # First time - ask the question
+            self._mark_question_asked(AskedQuestion.SUCCESSES_CHALLENGES)
+            result["context"] = "Ask: What went well? What was challenging?"
+
+    def _handle_same_anything_to_change(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        wants_change = bool(_WANTS_CHANGE_RE.search(user_lower))
+        no_change = bool(_NO_CHANGE_RE.search(user_lower))
+
+        if wants_change:
+            result["next_state"] = Session2State.SAME_WHAT_CONCERNS
+            result[
+                "context"
+            ] = "They want to make changes. Ask what concerns they have or what solutions they're thinking about."
+        elif no_change:
             result["next_state"] = Session2State.CONFIRM_END_SESSION
             result[
                 "context"
             ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
+        else:
+            result[
+                "context"
+            ] = "Clarify: Do they want to change anything about their goal? Yes or no?"
+
+    def _handle_same_what_concerns(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # They're expressing concerns or proposing solutions
+        result["next_state"] = Session2State.SAME_EXPLORE_SOLUTIONS
+        result[
+            "context"
+        ] = "Acknowledge their concerns. Ask what solutions or adjustments they're thinking about."
+
+    def _handle_same_explore_solutions(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Check if they're proposing a specific modification
+        has_specific_change = bool(_SPECIFIC_CHANGE_RE.search(user_lower))
+
+        if has_specific_change:
+            self._log_debug("User proposing specific goal modification")
+            # Extract the modified goal and evaluate if SMART
+            goal_candidate = user_input.strip()
+            self._start_new_goal(
+                goal_candidate,
+                self.evaluate_smart_goal(goal_candidate),
+                result,
+                "Modified goal is SMART! Ask confidence (1-10).",
+                "Modified goal missing: {missing}. Help refine it.",
+            )
+        else:
+            # Still exploring - help them think through solutions
+            result[
+                "context"
+            ] = "Guide them toward a specific adjustment. What would make it more achievable?"
+
+    def _handle_same_not_successful(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session2State.CONFIRM_END_SESSION
+        result[
+            "context"
+        ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
+
+    def _handle_same_successful(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session2State.CONFIRM_END_SESSION
+        result[
+            "context"
+        ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
+
+    def _handle_different_which_goals(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        sd = self.session_data
+
+        # Check if we already identified which goals to keep
+        if sd.goals_to_keep_identified:
+            # Already know which goals - this is them describing the new goal
+            result["next_state"] = Session2State.DIFFERENT_KEEPING_AND_NEW
+            result["context"] = "Process their new goal idea."
+            return
+
+        # First time in this state - identify which goals to keep
+        goals_mentioned = []
+        if self._goal_keyword_re:
+            # Check for keywords from the goals
+            matched = set()
+            for word in set(self._goal_keyword_re.findall(user_lower)):
+                matched |= self._goal_keyword_index[word]
+            goals_mentioned = [
+                goal_info["goal"]
+                for i, goal_info in enumerate(sd.previous_goals)
+                if i in matched
+            ]
 
-        elif self.state == Session2State.SAME_SUCCESSFUL:
-            result["next_state"] = Session2State.CONFIRM_END_SESSION
+        # Check for "all" or "both" or "current"
+        if _KEEP_ALL_RE.search(user_lower):
+            goals_mentioned = [
+                g["goal"] for g in sd.previous_goals
+            ]
+
+        if goals_mentioned:
+            sd.goals_to_keep = goals_mentioned
+            sd.goals_to_keep_identified = True
+            result["next_state"] = Session2State.DIFFERENT_KEEPING_AND_NEW
             result[
                 "context"
-            ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
+            ] = f"Noted keeping: {', '.join(goals_mentioned)}. Now ask what new goal they want to add."
+        else:
+            result[
+                "context"
+            ] = "Ask which specific previous goals they want to keep."
+
+    def _handle_different_keeping_and_new(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        goal_candidate = user_input.strip()
+
+        # Check if this is a substantial goal description (not just "yes" or single words)
+        if is_likely_goal(goal_candidate):
+            self._start_new_goal(
+                goal_candidate,
+                self.evaluate_smart_goal(goal_candidate),
+                result,
+                "Goal is SMART! Ask confidence (1-10).",
+                "Goal needs refinement. Missing: {missing}. Guide them to make it more specific.",
+            )
+        else:
+            # Still exploring what the new goal should be - don't add anything to goals list yet
+            result[
+                "context"
+            ] = "Ask what new goal they'd like to add. Get more detail about what they want to focus on."
+
+    def _handle_just_new_goals(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        goal_candidate = user_input.strip()
+
+        # Check if this is a substantial goal description
+        is_affirmation = user_lower in _NEW_GOAL_AFFIRMATIONS
+
+        if not is_affirmation and len(goal_candidate.split()) > 3:
+            self._start_new_goal(
+                goal_candidate,
+                self.evaluate_smart_goal(goal_candidate),
+                result,
+                "Goal is SMART! Ask confidence (1-10).",
+                "Missing: {missing}. Guide refinement.",
+            )
+        else:
+            # Not a goal yet, keep asking
+            result["context"] = "Ask what goal they'd like to focus on."
+
+    def _handle_refine_goal(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        sd = self.session_data
+        goal_candidate = user_input.strip()
+
+        # Check if this is a substantial goal statement (not just "yes" or very short responses)
+        is_affirmation = user_lower in _REFINE_AFFIRMATIONS
+        is_conversational = bool(_CONVERSATIONAL_RE.search(user_lower))
+        is_confidence_response = (
+            _CONFIDENCE_NUM_RE.search(user_input)
+            and "confident"
+            in (sd.last_coach_response or "").lower()
+        )
 
-        elif self.state == Session2State.DIFFERENT_WHICH_GOALS:
-            # Check if we already identified which goals to keep
-            if self.session_data.get("goals_to_keep_identified"):
-                # Already know which goals - this is them describing the new goal
-                result["next_state"] = Session2State.DIFFERENT_KEEPING_AND_NEW
-                result["context"] = "Process their new goal idea."
-                return result
-
-            # First time in this state - identify which goals to keep
-            goals_mentioned = []
-            for goal_info in self.session_data.get("previous_goals", []):
-                goal_text = goal_info["goal"].lower()
-                # Check for keywords from the goal
-                if any(
-                    word in user_lower for word in goal_text.split() if len(word) > 4
-                ):
-                    goals_mentioned.append(goal_info["goal"])
+        # If they're giving a confidence number, capture it and transition
+        if is_confidence_response:
+            confidence = extract_number(user_input)
+            sd.confidence_level = confidence
 
-            # Check for "all" or "both" or "current"
-            if any(w in user_lower for w in ["all", "both", "current", "same"]):
-                goals_mentioned = [
-                    g["goal"] for g in self.session_data.get("previous_goals", [])
-                ]
+            # Complete the goal with what we have
+            self._accept_refined_goal(
+                " ".join(sd.goal_parts),
+                result,
+                f"Confidence captured as {confidence}. Transition to handle confidence level.",
+            )
+            return
 
-            if goals_mentioned:
-                self.session_data["goals_to_keep"] = goals_mentioned
-                self.session_data["goals_to_keep_identified"] = True
-                result["next_state"] = Session2State.DIFFERENT_KEEPING_AND_NEW
-                result[
-                    "context"
-                ] = f"Noted keeping: {', '.join(goals_mentioned)}. Now ask what new goal they want to add."
+        # If it's a substantive response (not affirmation/conversational), add to goal parts
+        if (
+            not is_affirmation
+            and not is_conversational
+            and len(goal_candidate.split()) >= 2
+        ):
+            # Add this piece to the goal parts
+            if goal_candidate not in sd.goal_parts:
+                sd.goal_parts.append(goal_candidate)
+
+            # Build the complete goal from all parts
+            complete_goal = " ".join(sd.goal_parts)
+
+            # Evaluate the complete goal
+            smart_eval = self._evaluate_refined_goal(complete_goal)
+            sd.goal_smart_analysis = smart_eval
+            sd.smart_refinement_attempts += 1
+
+            # If SMART, create a concise version and save it
+            if smart_eval["is_smart"]:
+                self._accept_refined_goal(
+                    complete_goal, result, "Goal is SMART! Ask confidence (1-10)."
+                )
+            elif sd.smart_refinement_attempts >= 4:
+                # After 4 attempts, accept what we have
+                self._accept_refined_goal(
+                    complete_goal, result, "Move to confidence check after 4 attempts."
+                )
             else:
+                # Still needs more work
+                sd.current_goal = complete_goal
                 result[
                     "context"
-                ] = "Ask which specific previous goals they want to keep."
-
-        elif self.state == Session2State.DIFFERENT_KEEPING_AND_NEW:
-            goal_candidate = user_input.strip()
-
-            # Check if this is a substantial goal description (not just "yes" or single words)
-            if is_likely_goal(goal_candidate):
-                self.session_data["current_goal"] = goal_candidate
+                ] = f"Building goal: '{complete_goal}'. Still missing: {', '.join(smart_eval['missing_criteria'])}. Ask specific questions to get those details. DO NOT ask about confidence yet."
+        elif is_affirmation:
+            # They're confirming - check if current goal is good enough
+            if sd.goal_parts:
+                complete_goal = " ".join(sd.goal_parts)
+                smart_eval = self.evaluate_smart_goal(complete_goal)
 
-                # Only add to new_goals list if it's not already there
                 if (
-                    not self.session_data["new_goals"]
-                    or self.session_data["new_goals"][-1] != goal_candidate
+                    smart_eval["is_smart"]
+                    or sd.smart_refinement_attempts >= 3
                 ):
-                    self.session_data["new_goals"].append(goal_candidate)
-
-                smart_eval = self.evaluate_smart_goal(goal_candidate)
-                self.session_data["goal_smart_analysis"] = smart_eval
-                self.session_data["smart_refinement_attempts"] = 0
-
-                if smart_eval["is_smart"]:
-                    result["next_state"] = Session2State.CONFIDENCE_CHECK
-                    result["context"] = "Goal is SMART! Ask confidence (1-10)."
+                    # Good enough, move on
+                    self._accept_refined_goal(
+                        complete_goal, result, "Goal confirmed. Ask confidence (1-10)."
+                    )
                 else:
-                    result["next_state"] = Session2State.REFINE_GOAL
                     result[
                         "context"
-                    ] = f"Goal needs refinement. Missing: {', '.join(smart_eval['missing_criteria'])}. Guide them to make it more specific."
+                    ] = f"Still missing: {', '.join(smart_eval['missing_criteria'])}. Ask for those details."
             else:
-                # Still exploring what the new goal should be - don't add anything to goals list yet
-                result[
-                    "context"
-                ] = "Ask what new goal they'd like to add. Get more detail about what they want to focus on."
-
-        elif self.state == Session2State.JUST_NEW_GOALS:
-            goal_candidate = user_input.strip()
-
-            # Check if this is a substantial goal description
-            is_affirmation = user_lower in [
-                "yes",
-                "yeah",
-                "yep",
-                "no",
-                "nope",
-                "ok",
-                "okay",
-            ]
-
-            if not is_affirmation and len(goal_candidate.split()) > 3:
-                self.session_data["current_goal"] = goal_candidate
-
-                # Only add if it's not already there
-                if (
-                    not self.session_data["new_goals"]
-                    or self.session_data["new_goals"][-1] != goal_candidate
-                ):
-                    self.session_data["new_goals"].append(goal_candidate)
-
-                smart_eval = self.evaluate_smart_goal(goal_candidate)
-                self.session_data["goal_smart_analysis"] = smart_eval
-                self.session_data["smart_refinement_attempts"] = 0
-
-                if smart_eval["is_smart"]:
-                    result["next_state"] = Session2State.CONFIDENCE_CHECK
-                    result["context"] = "Goal is SMART! Ask confidence (1-10)."
-                else:
-                    result["next_state"] = Session2State.REFINE_GOAL
+                result["context"] = "Ask them to describe their goal."
+        else:
+            # Conversational response - don't add to goal, keep asking for goal details
+            result[
+                "context"
+            ] = "That was conversational. Continue refining. Ask specific questions to make the goal SMART (numbers, frequency, timeframe). DO NOT ask about confidence."
+
+    def _handle_confidence_check(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        sd = self.session_data
+
+        # Check if we already have confidence stored
+        if sd.confidence_level is not None:
+            # Already have confidence - this is a follow-up response
+            confidence = sd.confidence_level
+
+            if confidence <= 7:
+                # Low confidence path
+                if not sd.explored_low_confidence:
+                    sd.explored_low_confidence = True
+                    result["next_state"] = Session2State.LOW_CONFIDENCE
                     result[
                         "context"
-                    ] = f"Missing: {', '.join(smart_eval['missing_criteria'])}. Guide refinement."
+                    ] = "Explore what would help increase confidence."
+                else:
+                    # Already explored, move on
+                    result["next_state"] = Session2State.MAKE_ACHIEVABLE
+                    result["context"] = "Help make goal more achievable."
             else:
-                # Not a goal yet, keep asking
-                result["context"] = "Ask what goal they'd like to focus on."
-
-        elif self.state == Session2State.REFINE_GOAL:
-            goal_candidate = user_input.strip()
-
-            # Check if this is a substantial goal statement (not just "yes" or very short responses)
-            is_affirmation = user_lower in [
-                "yes",
-                "yeah",
-                "yep",
-                "no",
-                "nope",
-                "ok",
-                "okay",
-                "correct",
-                "right",
-            ]
-            is_conversational = any(
-                phrase in user_lower
-                for phrase in [
-                    "like i said",
-                    "i told you",
-                    "as i mentioned",
-                    "i already said",
-                    "its going to be fun",
-                    "it's fun",
-                    "i want to do this",
-                    "i will want to",
-                    "that makes sense",
-                    "i understand",
-                    "i like",
-                    "because",
-                ]
-            )
-            is_confidence_response = (
-                re.search(r"\b([1-9]|10)\b", user_input)
-                and "confident"
-                in self.session_data.get("last_coach_response", "").lower()
-            )
-
-            # If they're giving a confidence number, capture it and transition
-            if is_confidence_response:
-                numbers = re.findall(r"\d+", user_input)
-                if numbers:
-                    confidence = int(numbers[0])
-                    self.session_data["confidence_level"] = confidence
-
-                    # Complete the goal with what we have
-                    complete_goal = " ".join(self.session_data["goal_parts"])
-                    concise_goal = self._create_concise_goal(complete_goal)
-                    self.session_data["current_goal"] = concise_goal
-
-                    if self.session_data["new_goals"]:
-                        self.session_data["new_goals"][-1] = concise_goal
-                    else:
-                        self.session_data["new_goals"].append(concise_goal)
-
-                    self.session_data["goal_parts"] = []
-
-                    result["next_state"] = Session2State.CONFIDENCE_CHECK
+                # High confidence (8-10) - move to tracking
+                is_same = sd.path_chosen == "same"
+                if is_same:
+                    result["next_state"] = Session2State.CONFIRM_END_SESSION
                     result[
                         "context"
-                    ] = f"Confidence captured as {confidence}. Transition to handle confidence level."
-                    return result
-
-            # If it's a substantive response (not affirmation/conversational), add to goal parts
-            if (
-                not is_affirmation
-                and not is_conversational
-                and len(goal_candidate.split()) >= 2
-            ):
-                # Add this piece to the goal parts
-                if goal_candidate not in self.session_data["goal_parts"]:
-                    self.session_data["goal_parts"].append(goal_candidate)
-
-                # Build the complete goal from all parts
-                complete_goal = " ".join(self.session_data["goal_parts"])
-
-                # Evaluate the complete goal
-                smart_eval = self.evaluate_smart_goal(complete_goal)
-                self.session_data["goal_smart_analysis"] = smart_eval
-                self.session_data["smart_refinement_attempts"] += 1
-
-                # If SMART, create a concise version and save it
-                if smart_eval["is_smart"]:
-                    # Create concise version of goal
-                    concise_goal = self._create_concise_goal(complete_goal)
-                    self.session_data["current_goal"] = concise_goal
-
-                    if self.session_data["new_goals"]:
-                        self.session_data["new_goals"][-1] = concise_goal
-                    else:
-                        self.session_data["new_goals"].append(concise_goal)
-
-                    # Clear goal parts for next goal
-                    self.session_data["goal_parts"] = []
-
-                    result["next_state"] = Session2State.CONFIDENCE_CHECK
-                    result["context"] = "Goal is SMART! Ask confidence (1-10)."
-                elif self.session_data["smart_refinement_attempts"] >= 4:
-                    # After 4 attempts, accept what we have
-                    concise_goal = self._create_concise_goal(complete_goal)
-                    self.session_data["current_goal"] = concise_goal
-
-                    if self.session_data["new_goals"]:
-                        self.session_data["new_goals"][-1] = concise_goal
-                    else:
-                        self.session_data["new_goals"].append(concise_goal)
-
-                    self.session_data["goal_parts"] = []
-
-                    result["next_state"] = Session2State.CONFIDENCE_CHECK
-                    result["context"] = "Move to confidence check after 4 attempts."
+                    ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
                 else:
-                    # Still needs more work
-                    self.session_data["current_goal"] = complete_goal
+                    result["next_state"] = Session2State.REMEMBER_GOAL
                     result[
                         "context"
-                    ] = f"Building goal: '{complete_goal}'. Still missing: {', '.join(smart_eval['missing_criteria'])}. Ask specific questions to get those details. DO NOT ask about confidence yet."
-            elif is_affirmation:
-                # They're confirming - check if current goal is good enough
-                if self.session_data.get("goal_parts"):
-                    complete_goal = " ".join(self.session_data["goal_parts"])
-                    smart_eval = self.evaluate_smart_goal(complete_goal)
-
-                    if (
-                        smart_eval["is_smart"]
-                        or self.session_data["smart_refinement_attempts"] >= 3
-                    ):
-                        # Good enough, move on
-                        concise_goal = self._create_concise_goal(complete_goal)
-                        self.session_data["current_goal"] = concise_goal
-
-                        if self.session_data["new_goals"]:
-                            self.session_data["new_goals"][-1] = concise_goal
-                        else:
-                            self.session_data["new_goals"].append(concise_goal)
-
-                        self.session_data["goal_parts"] = []
-
-                        result["next_state"] = Session2State.CONFIDENCE_CHECK
-                        result["context"] = "Goal confirmed. Ask confidence (1-10)."
-                    else:
-                        result[
-                            "context"
-                        ] = f"Still missing: {', '.join(smart_eval['missing_criteria'])}. Ask for those details."
-                else:
-                    result["context"] = "Ask them to describe their goal."
-            else:
-                # Conversational response - don't add to goal, keep asking for goal details
-                result[
-                    "context"
-                ] = "That was conversational. Continue refining. Ask specific questions to make the goal SMART (numbers, frequency, timeframe). DO NOT ask about confidence."
-
-        elif self.state == Session2State.CONFIDENCE_CHECK:
-            # Check if we already have confidence stored
-            if self.session_data.get("confidence_level") is not None:
-                # Already have confidence - this is a follow-up response
-                confidence = self.session_data["confidence_level"]
+                    ] = "High confidence! Ask about tracking method."
+        else:
+            # Don't have confidence yet - look for the number
+            numbers = _NUM_RE.findall(user_input)
+            if numbers:
+                confidence = int(numbers[0])
+                sd.confidence_level = confidence
 
+                # Immediately transition based on confidence
                 if confidence <= 7:
-                    # Low confidence path
-                    if not self.session_data.get("explored_low_confidence"):
-                        self.session_data["explored_low_confidence"] = True
-                        result["next_state"] = Session2State.LOW_CONFIDENCE
-                        result[
-                            "context"
-                        ] = "Explore what would help increase confidence."
-                    else:
-                        # Already explored, move on
-                        result["next_state"] = Session2State.MAKE_ACHIEVABLE
-                        result["context"] = "Help make goal more achievable."
+                    result["next_state"] = Session2State.LOW_CONFIDENCE
+                    result[
+                        "context"
+                    ] = "Low confidence. Explore what would help increase it."
                 else:
-                    # High confidence (8-10) - move to tracking
-                    is_same = self.session_data.get("path_chosen") == "same"
+                    # High confidence (8-10)
+                    is_same = sd.path_chosen == "same"
                     if is_same:
                         result["next_state"] = Session2State.CONFIRM_END_SESSION
                         result[
@@ -745,163 +973,158 @@ class Session2Manager:
                         result["next_state"] = Session2State.REMEMBER_GOAL
                         result[
                             "context"
-                        ] = "High confidence! Ask about tracking method."
+                        ] = "High confidence! Acknowledge briefly, then ask about tracking method."
             else:
-                # Don't have confidence yet - look for the number
-                numbers = re.findall(r"\d+", user_input)
-                if numbers:
-                    confidence = int(numbers[0])
-                    self.session_data["confidence_level"] = confidence
-
-                    # Immediately transition based on confidence
-                    if confidence <= 7:
-                        result["next_state"] = Session2State.LOW_CONFIDENCE
-                        result[
-                            "context"
-                        ] = "Low confidence. Explore what would help increase it."
-                    else:
-                        # High confidence (8-10)
-                        is_same = self.session_data.get("path_chosen") == "same"
-                        if is_same:
-                            result["next_state"] = Session2State.CONFIRM_END_SESSION
-                            result[
-                                "context"
-                            ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
-                        else:
-                            result["next_state"] = Session2State.REMEMBER_GOAL
-                            result[
-                                "context"
-                            ] = "High confidence! Acknowledge briefly, then ask about tracking method."
-                else:
-                    result[
-                        "context"
-                    ] = "Ask for confidence as a number (1-10). Be clear and direct."
-
-        elif self.state == Session2State.LOW_CONFIDENCE:
-            result["next_state"] = Session2State.MAKE_ACHIEVABLE
-            result["context"] = "Explore what would make it achievable."
-
-        elif self.state == Session2State.HIGH_CONFIDENCE:
-            result["next_state"] = Session2State.REMEMBER_GOAL
-            result["context"] = "Ask about tracking."
-
-        elif self.state == Session2State.MAKE_ACHIEVABLE:
-            is_same = self.session_data.get("path_chosen") == "same"
-            if is_same:
-                result["next_state"] = Session2State.CONFIRM_END_SESSION
                 result[
                     "context"
-                ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
-            else:
-                result["next_state"] = Session2State.REMEMBER_GOAL
-                result["context"] = "Ask about tracking."
-
-        elif self.state == Session2State.REMEMBER_GOAL:
-            result["next_state"] = Session2State.MORE_GOALS_CHECK
-            result["context"] = "Acknowledge tracking. Ask if they want another goal."
-
-        elif self.state == Session2State.MORE_GOALS_CHECK:
-            wants_more = check_wants_more(user_input)
-            done = check_done(user_input)
-
-            if wants_more:
-                self.session_data["current_goal"] = None
-                self.session_data["smart_refinement_attempts"] = 0
-                result["next_state"] = Session2State.JUST_NEW_GOALS
-                result["context"] = "Ask what other goal."
-            else:
-                result["next_state"] = Session2State.CONFIRM_END_SESSION
-                result[
-                    "context"
-                ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
-
-        elif self.state == Session2State.CONFIRM_END_SESSION:
-            # Check if user actually wants to end
-            user_done = any(
-                phrase in user_lower
-                for phrase in [
-                    "yes",
-                    "yeah",
-                    "yep",
-                    "sure",
-                    "no",
-                    "nope",
-                    "nah",
-                    "i'm good",
-                    "im good",
-                    "that's all",
-                    "thats all",
-                    "nothing else",
-                    "all set",
-                    "bye",
-                    "goodbye",
-                    "see you",
-                    "thanks",
-                    "thank you",
-                    "take care",
-                ]
-            )
-
-            if user_done:
-                result["next_state"] = Session2State.END_SESSION
-                self.session_data["final_goodbye_given"] = True
-                result[
-                    "context"
-                ] = "User confirmed they're done. Give warm final goodbye. Confirm next session is in 1 week."
-            else:
-                # User still has something to discuss - go back to active conversation
-                result["next_state"] = Session2State.MORE_GOALS_CHECK
-                result[
-                    "context"
-                ] = f"User said: '{user_input}' - they're not done yet. Address what they said and continue the conversation naturally."
-            result["trigger_rag"] = True
+                ] = "Ask for confidence as a number (1-10). Be clear and direct."
+
+    def _handle_low_confidence(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session2State.MAKE_ACHIEVABLE
+        result["context"] = "Explore what would make it achievable."
+
+    def _handle_high_confidence(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session2State.REMEMBER_GOAL
+        result["context"] = "Ask about tracking."
+
+    def _handle_make_achievable(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        is_same = self.session_data.path_chosen == "same"
+        if is_same:
+            result["next_state"] = Session2State.CONFIRM_END_SESSION
+            result[
+                "context"
+            ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
+        else:
+            result["next_state"] = Session2State.REMEMBER_GOAL
+            result["context"] = "Ask about tracking."
 
-        elif self.state == Session2State.END_SESSION:
-            # Already in END_SESSION, just acknowledge politely
+    def _handle_remember_goal(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session2State.MORE_GOALS_CHECK
+        result["context"] = "Acknowledge tracking. Ask if they want another goal."
+
+    def _handle_more_goals_check(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        wants_more = check_wants_more(user_input)
+
+        if wants_more:
+            self.session_data.current_goal = None
+            self.session_data.smart_refinement_attempts = 0
+            result["next_state"] = Session2State.JUST_NEW_GOALS
+            result["context"] = "Ask what other goal."
+        else:
+            result["next_state"] = Session2State.CONFIRM_END_SESSION
             result[
                 "context"
-            ] = "Session already complete. Politely acknowledge but don't extend conversation."
-            result["trigger_rag"] = False
+            ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
 
-        if result["next_state"]:
-            self._log_debug(f"Next state will be: {result['next_state'].value}")
+    def _handle_confirm_end_session(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Check if user actually wants to end
+        user_done = bool(_USER_DONE_RE.search(user_lower))
 
-        return result
+        if user_done:
+            result["next_state"] = Session2State.END_SESSION
+            self.session_data.final_goodbye_given = True
+            result[
+                "context"
+            ] = "User confirmed they're done. Give warm final goodbye. Confirm next session is in 1 week."
+        else:
+            # User still has something to discuss - go back to active conversation
+            result["next_state"] = Session2State.MORE_GOALS_CHECK
+            result[
+                "context"
+            ] = f"User said: '{user_input}' - they're not done yet. Address what they said and continue the conversation naturally."
+        result["trigger_rag"] = True
+
+    def _handle_end_session(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Already in END_SESSION, just acknowledge politely
+        result[
+            "context"
+        ] = "Session already complete. Politely acknowledge but don't extend conversation."
+        result["trigger_rag"] = False
 
     def get_system_prompt_addition(self) -> str:
         """Get state-specific system prompt additions"""
-        return get_session2_prompt(
-            state_value=self.state.value, session_data=self.session_data
-        )
+        if self._prompt_state is not self.state:
+            # Select the state's template once per state change, not every turn
+            self._prompt_state = self.state
+            self._render_state_prompt = session2_prompt_renderer(self.state.value)
+
+        # Nothing changes after the final goodbye, so render that prompt once
+        if (
+            self.state is Session2State.END_SESSION
+            and self.session_data.final_goodbye_given
+        ):
+            if self._frozen_prompt is None:
+                self._frozen_prompt = self._render_state_prompt(self.session_data)
+            return self._frozen_prompt
+
+        return self._render_state_prompt(self.session_data)
 
     def get_session_summary(self) -> Dict[str, Any]:
-        """Get summary of session data"""
-        return {
-            "current_state": self.state.value,
-            "session_data": self.session_data,
-            "duration_turns": self.session_data["turn_count"],
-        }
+        """
+        Get summary of session data. The same read-only view is returned until
+        the session data changes, so read it rather than keeping it.
+        """
+        # asdict() deep-copies session_data, so only rebuild after it may have changed
+        key = (self.data_version, self.state)
+        if self._summary_cache[0] != key:
+            data = asdict(self.session_data)
+            for name in _SUMMARY_INTERNAL_FIELDS:
+                del data[name]
+            data["session_start"] = self.session_data.session_start
+            summary = MappingProxyType(
+                {
+                    "current_state": self.state.value,
+                    "session_data": MappingProxyType(data),
+                    "duration_turns": self.session_data.turn_count,
+                }
+            )
+            self._summary_cache = (key, summary)
+        return self._summary_cache[1]
 
-    def save_session(self, filename: str = None, conversation_history: list = None):
-        """Save session using unified storage format and database"""
+    def save_session(
+        self,
+        filename: str = None,
+        conversation_history: list = None,
+        snapshot_history: list = None,
+    ):
+        """
+        Save session using unified storage format and database.
+
+        snapshot_history, when given, is the chat history written to the file
+        instead of conversation_history (the database always gets the full one).
+        """
         self._log_debug("Saving Session 2 with unified format")
 
         # Build complete goals list
         all_goals = []
 
         # Add previous goals with updated status
-        for prev_goal in self.session_data.get("previous_goals", []):
+        for prev_goal in self.session_data.previous_goals:
             goal_entry = {
                 "goal": prev_goal["goal"],
                 "confidence": prev_goal.get("confidence"),
-                "stress": self.session_data.get("stress_level"),
+                "stress": self.session_data.stress_level,
                 "session_created": prev_goal.get("session_created", 1),
                 "created_at": None,  # From previous session
             }
 
             # Determine status based on path chosen
-            path = self.session_data.get("path_chosen")
-            goals_to_keep = self.session_data.get("goals_to_keep", [])
+            path = self.session_data.path_chosen
+            goals_to_keep = self.session_data.goals_to_keep
 
             if path == "new":
                 goal_entry["status"] = "dropped"
@@ -918,36 +1141,37 @@ class Session2Manager:
             all_goals.append(goal_entry)
 
         # Add new goals from this session
-        for new_goal in self.session_data.get("new_goals", []):
+        session_start = self.session_data.session_start
+        for new_goal in self.session_data.new_goals:
             goal_entry = {
                 "goal": new_goal,
-                "confidence": self.session_data.get("confidence_level"),
-                "stress": self.session_data.get("stress_level"),
+                "confidence": self.session_data.confidence_level,
+                "stress": self.session_data.stress_level,
                 "session_created": 2,
                 "status": "active",
-                "created_at": self.session_data.get("session_start"),
+                "created_at": session_start,
             }
             all_goals.append(goal_entry)
 
         # Preserve discovery info from Session 1
-        discovery = self.session_data.get("discovery_info", {})
+        discovery = self.session_data.discovery_info
 
         # Prepare session metadata
         session_metadata = {
-            "turn_count": self.session_data.get("turn_count"),
-            "stress_level": self.session_data.get("stress_level"),
-            "path_chosen": self.session_data.get("path_chosen"),
-            "goals_to_keep": self.session_data.get("goals_to_keep", []),
-            "new_goals": self.session_data.get("new_goals", []),
-            "challenges": self.session_data.get("challenges", []),
-            "successes": self.session_data.get("successes", []),
+            "turn_count": self.session_data.turn_count,
+            "stress_level": self.session_data.stress_level,
+            "path_chosen": self.session_data.path_chosen,
+            "goals_to_keep": self.session_data.goals_to_keep,
+            "new_goals": self.session_data.new_goals,
+            "challenges": self.session_data.challenges or [],
+            "successes": self.session_data.successes or [],
         }
 
         # Build full data structure for database
         full_data = {
             "user_profile": {
                 "uid": self.uid,
-                "name": self.session_data.get("user_name"),
+                "name": self.session_data.user_name,
                 "goals": all_goals,
                 "discovery_questions": discovery,
             },
@@ -962,25 +1186,28 @@ class Session2Manager:
         # Save to PostgreSQL database
         from utils.database import save_session_to_db
 
-        if save_session_to_db(self.uid, 2, full_data):
-            self._log_debug(f"Session 2 saved to database for UID: {self.uid}")
+        self.db_saved = save_session_to_db(self.uid, 2, full_data)
+        if self.db_saved:
+            self._log_debug("Session 2 saved to database for UID: %s", self.uid)
         else:
             self._log_debug("Warning: Failed to save Session 2 to database")
 
         # Also save to file (backup/legacy support)
         filename = save_unified_session(
             uid=self.uid,
-            user_name=self.session_data.get("user_name"),
+            user_name=self.session_data.user_name,
             session_number=2,
             current_state=self.state.value,
             discovery=discovery,
             goals=all_goals,
             session_metadata=session_metadata,
-            conversation_history=conversation_history,
+            conversation_history=(
+                conversation_history if snapshot_history is None else snapshot_history
+            ),
             filename=filename,
         )
 
-        self._log_debug(f"Session 2 saved to {filename}")
+        self._log_debug("Session 2 saved to %s", filename)
         return filename
 
     def load_session(self, filename: str):
@@ -994,26 +1221,26 @@ class Session2Manager:
         session_info = data.get("session_info", {})
 
         # Restore state
-        self.state = Session2State(session_info.get("current_state", "greetings"))
+        self.state = _state_from_value(session_info.get("current_state", "greetings"))
         self.uid = profile.get("uid")
 
         # Restore session data
-        self.session_data["uid"] = self.uid
-        self.session_data["user_name"] = profile.get("name")
+        self.session_data.uid = self.uid
+        self.session_data.user_name = profile.get("name")
 
         # Restore discovery info
-        self.session_data["discovery_info"] = profile.get("discovery_questions", {})
+        self.session_data.discovery_info = profile.get("discovery_questions", {})
 
         # Restore goals
         all_goals = profile.get("goals", [])
 
         # Separate previous goals (from Session 1) and new goals (from Session 2)
-        self.session_data["previous_goals"] = []
-        self.session_data["new_goals"] = []
+        self.session_data.previous_goals = []
+        self.session_data.new_goals = []
 
         for goal in all_goals:
             if goal.get("session_created") == 1:
-                self.session_data["previous_goals"].append(
+                self.session_data.previous_goals.append(
                     {
                         "goal": goal.get("goal"),
                         "confidence": goal.get("confidence"),
@@ -1021,17 +1248,21 @@ class Session2Manager:
                     }
                 )
             elif goal.get("session_created") == 2:
-                self.session_data["new_goals"].append(goal.get("goal"))
+                self.session_data.new_goals.append(goal.get("goal"))
+        self._build_goal_keyword_index()
+        self._rebuild_new_goal_keys()
+        self._frozen_prompt = None
 
         # Restore metadata
         metadata = session_info.get("metadata", {})
-        self.session_data["turn_count"] = metadata.get("turn_count", 0)
-        self.session_data["stress_level"] = metadata.get("stress_level")
-        self.session_data["path_chosen"] = metadata.get("path_chosen")
-        self.session_data["goals_to_keep"] = metadata.get("goals_to_keep", [])
-        self.session_data["challenges"] = metadata.get("challenges", [])
-        self.session_data["successes"] = metadata.get("successes", [])
-
-        self._log_debug(f"Session 2 loaded from {filename}")
+        self.session_data.turn_count = metadata.get("turn_count", 0)
+        self.session_data.stress_level = metadata.get("stress_level")
+        self.session_data.path_chosen = metadata.get("path_chosen")
+        self.session_data.goals_to_keep = metadata.get("goals_to_keep", [])
+        self.session_data.challenges = metadata.get("challenges", [])
+        self.session_data.successes = metadata.get("successes", [])
+        self.data_version += 1
+
+        self._log_debug("Session 2 loaded from %s", filename)
 
         return data.get("chat_history", [])
@@ -7,6 +7,7 @@ from base_session_chatbot import BaseSessionRAGChatbot
 from session2 import Session2Manager, Session2State
 import os
 from dotenv import load_dotenv
+import io
 import json
 
 from utils.database import load_session_from_db, list_users, get_user_by_name
@@ -33,74 +34,87 @@ class Session2RAGChatbot(BaseSessionRAGChatbot):
         
         # Session 2 specific setup
         self.session_manager = Session2Manager(user_profile=session1_data)
-        self.session_manager.set_llm_client(self._create_llm_evaluator())
+        self.session_manager.set_llm_client(self._llm_evaluator)
+        self._memory_cache = (None, "")  # (session_data version, rendered summary)
     
     def _get_memory_summary(self):
         """Generate Session 2 specific memory summary"""
-        summary_parts = []
+        version = self.session_manager.data_version
+        if self._memory_cache[0] == version:
+            return self._memory_cache[1]
+        
+        summary = self._render_memory_summary()
+        self._memory_cache = (version, summary)
+        return summary
+    
+    def _render_memory_summary(self):
+        """Build the memory summary text from current session data"""
+        sd = self.session_manager.session_data
+        buf = io.StringIO()
         
         # User name
-        user_name = self.session_manager.session_data.get('user_name')
+        user_name = sd.user_name
         if user_name:
-            summary_parts.append(f"Participant name: {user_name}")
+            buf.write(f"Participant name: {user_name}\n")
         
         # Previous goals from Session 1
-        previous_goals = self.session_manager.session_data.get('previous_goals', [])
+        previous_goals = sd.previous_goals
         if previous_goals:
-            summary_parts.append(f"\nPrevious goals from Session 1 ({len(previous_goals)} total):")
+            buf.write(f"\nPrevious goals from Session 1 ({len(previous_goals)} total):\n")
             for i, goal_info in enumerate(previous_goals, 1):
                 goal_text = goal_info['goal']
                 confidence = goal_info.get('confidence', 'N/A')
-                summary_parts.append(f"  {i}. {goal_text} (Confidence: {confidence}/10)")
+                buf.write(f"  {i}. {goal_text} (Confidence: {confidence}/10)\n")
         
         # Current session data
-        stress_level = self.session_manager.session_data.get('stress_level')
+        stress_level = sd.stress_level
         if stress_level:
-            summary_parts.append(f"\nStress level this week: {stress_level}/10")
+            buf.write(f"\nStress level this week: {stress_level}/10\n")
         
         # Path chosen
-        path_chosen = self.session_manager.session_data.get('path_chosen')
+        path_chosen = sd.path_chosen
         if path_chosen:
             path_names = {
                 'same': 'Continuing with same goals',
                 'different': 'Keeping some goals and adding new ones',
                 'new': 'Setting completely new goals'
             }
-            summary_parts.append(f"\nPath chosen: {path_names.get(path_chosen, path_chosen)}")
+            buf.write(f"\nPath chosen: {path_names.get(path_chosen, path_chosen)}\n")
         
         # Goals to keep
-        goals_to_keep = self.session_manager.session_data.get('goals_to_keep', [])
+        goals_to_keep = sd.goals_to_keep
         if goals_to_keep:
-            summary_parts.append(f"\nGoals being kept from last week:")
+            buf.write(f"\nGoals being kept from last week:\n")
             for i, goal in enumerate(goals_to_keep, 1):
-                summary_parts.append(f"  {i}. {goal}")
+                buf.write(f"  {i}. {goal}\n")
         
         # New goals for this week
-        new_goals = self.session_manager.session_data.get('new_goals', [])
+        new_goals = sd.new_goals
         if new_goals:
-            summary_parts.append(f"\nNew goals for this week ({len(new_goals)} total):")
+            buf.write(f"\nNew goals for this week ({len(new_goals)} total):\n")
             for i, goal in enumerate(new_goals, 1):
-                summary_parts.append(f"  {i}. {goal}")
+                buf.write(f"  {i}. {goal}\n")
         
         # Current goal being worked on
-        current_goal = self.session_manager.session_data.get('current_goal')
+        current_goal = sd.current_goal
         if current_goal and current_goal not in new_goals:
-            summary_parts.append(f"\nCurrent goal being refined: {current_goal}")
+            buf.write(f"\nCurrent goal being refined: {current_goal}\n")
         
         # Successes and challenges
-        successes = self.session_manager.session_data.get('successes', [])
+        successes = sd.successes
         if successes:
-            summary_parts.append(f"\nSuccesses this week:")
+            buf.write(f"\nSuccesses this week:\n")
             for success in successes:
-                summary_parts.append(f"  - {success}")
+                buf.write(f"  - {success}\n")
         
-        challenges = self.session_manager.session_data.get('challenges', [])
+        challenges = sd.challenges
         if challenges:
-            summary_parts.append(f"\nChallenges this week:")
+            buf.write(f"\nChallenges this week:\n")
             for challenge in challenges:
-                summary_parts.append(f"  - {challenge}")
+                buf.write(f"  - {challenge}\n")
         
-        return "\n".join(summary_parts) if summary_parts else ""
+        # Drop the trailing newline so output matches a "\n".join of the lines
+        return buf.getvalue()[:-1]
     
     def get_session_info(self):
         """Get current session state and data (Session 2 format)"""
@@ -114,11 +128,12 @@ class Session2RAGChatbot(BaseSessionRAGChatbot):
     
     def reset_session(self):
         """Reset Session 2 to beginning"""
-        session1_data = self.session_manager.session_data.get('previous_goals')
+        session1_data = self.session_manager.session_data.previous_goals
         self.session_manager = Session2Manager(
             session1_data={'goal_details': session1_data} if session1_data else None
         )
-        self.session_manager.set_llm_client(self._create_llm_evaluator())
+        self.session_manager.set_llm_client(self._llm_evaluator)
+        self._memory_cache = (None, "")
         self.conversation_history = []
         print("✓ Session 2 reset to beginning")
 
@@ -243,7 +258,7 @@ def interactive_session2_chat():
             continue
         
         if user_input.lower() == 'save':
-            filename = chatbot.save_session()
+            filename = chatbot.save_session(checkpoint=True)
             print(f"✓ Session saved to {filename}\n")
             continue
         
@@ -262,7 +277,7 @@ def interactive_session2_chat():
             print("\n")
             
             session_state = chatbot.session_manager.get_state()
-            if session_state == Session2State.END_SESSION:
+            if session_state is Session2State.END_SESSION:
                 print("\n" + "=" * 80)
                 print("SESSION 2 COMPLETE!")
                 print("=" * 80)
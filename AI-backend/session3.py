@@ -3,6 +3,7 @@ import os
 import re
 from datetime import datetime
 from enum import Enum
+from types import MappingProxyType
 from typing import Any, Dict, List, Optional
 
 from utils.database import load_session_from_db, save_session_to_db
@@ -22,13 +23,25 @@ from utils.state_helpers import (
     create_state_result,
     extract_number,
 )
-from utils.state_prompts import get_session3_prompt
+from utils.state_prompts import session3_prompt_renderer
 from utils.unified_storage import (
     extract_user_profile,
     get_active_goals,
     save_unified_session,
 )
 
+# Keyword matchers used by process_user_input, compiled once rather than
+# rebuilt as lists each turn. Word boundaries avoid hits inside unrelated
+# words ("new" in "renew", "no" in "know"); stems take \w* for inflections.
+_SAME_KW_RE = re.compile(r"\b(?:same|keep\w*|continu\w*|current\w*|these)\b")
+_DIFFERENT_KW_RE = re.compile(r"\b(?:different\w*|chang\w*|new|adjust\w*)\b")
+_SUCCESS_KW_RE = re.compile(r"\b(?:success\w*|good|well)\b")
+_CHALLENGE_KW_RE = re.compile(r"\b(?:challeng\w*|difficult\w*|hard\w*)\b")
+_USER_DONE_RE = re.compile(
+    r"\b(?:yes|yeah|yep|sure|no|not|nope|nothing|none|nah|i'm good|im good"
+    r"|that's all|thats all|all set|bye|goodbye|see you|thanks|thank you|take care)\b"
+)
+
 
 class Session3State(Enum):
     """States for Session 3 conversation flow"""
@@ -70,6 +83,21 @@ class Session3State(Enum):
 class Session3Manager:
     """Manages conversation flow for Session 3"""
 
+    # One manager per live session; fixed slots keep instances small
+    __slots__ = (
+        "debug",
+        "state",
+        "uid",
+        "session_data",
+        "_questions_asked",
+        "db_saved",
+        "llm_client",
+        "_state_handlers",
+        "_prompt_state",
+        "_render_state_prompt",
+        "_summary",
+    )
+
     def __init__(self, user_profile: Dict = None, llm_client=None, debug=True):
         self.debug = debug
         self.state = Session3State.GREETINGS
@@ -135,11 +163,40 @@ class Session3Manager:
             "anything_else_asked": False,
             "confidence_asked_for_same_goal": False,
             "explored_low_confidence": False,
-            "questions_asked": set(),
+            "questions_asked": [],
             "final_goodbye_given": False,
             "check_in_asked": False,
         }
+        # Membership index for questions_asked, which stays a JSON-ready list
+        self._questions_asked = set()
+        self.db_saved = False  # Whether the last save_session reached the database
         self.llm_client = llm_client
+        # One dict lookup per turn instead of walking an if/elif chain over every state
+        self._state_handlers = {
+            Session3State.GREETINGS: self._handle_greetings,
+            Session3State.CHECK_IN_GOALS: self._handle_check_in_goals,
+            Session3State.STRESS_LEVEL: self._handle_stress_level,
+            Session3State.GOALS_FOR_NEXT_WEEK: self._handle_goals_for_next_week,
+            Session3State.SAME_GOALS_SUCCESSES_CHALLENGES: self._handle_same_goals_successes_challenges,
+            Session3State.SAME_ANYTHING_TO_CHANGE: self._handle_same_anything_to_change,
+            Session3State.SAME_WHAT_CONCERNS: self._handle_same_what_concerns,
+            Session3State.SAME_EXPLORE_SOLUTIONS: self._handle_same_explore_solutions,
+            Session3State.DIFFERENT_WHICH_GOALS: self._handle_different_which_goals,
+            Session3State.DIFFERENT_KEEPING_AND_NEW: self._handle_different_keeping_and_new,
+            Session3State.JUST_NEW_GOALS: self._handle_just_new_goals,
+            Session3State.REFINE_GOAL: self._handle_refine_goal,
+            Session3State.CONFIDENCE_CHECK: self._handle_confidence_check,
+            Session3State.LOW_CONFIDENCE: self._handle_low_confidence,
+            Session3State.HIGH_CONFIDENCE: self._handle_high_confidence,
+            Session3State.MAKE_ACHIEVABLE: self._handle_make_achievable,
+            Session3State.REMEMBER_GOAL: self._handle_remember_goal,
+            Session3State.MORE_GOALS_CHECK: self._handle_more_goals_check,
+            Session3State.CONFIRM_END_SESSION: self._handle_confirm_end_session,
+            Session3State.END_SESSION: self._handle_end_session,
+        }
+        self._prompt_state = None
+        self._render_state_prompt = None
+        self._summary = {"current_state": None, "session_data": None, "duration_turns": 0}
         self._log_debug(
             f"Session 3 initialized with user: {user_name}, UID: {self.uid}"
         )
@@ -154,11 +211,13 @@ class Session3Manager:
             print(f"[DEBUG] {message}", flush=True)
 
     def _mark_question_asked(self, question_key: str):
-        self.session_data["questions_asked"].add(question_key)
+        if question_key not in self._questions_asked:
+            self._questions_asked.add(question_key)
+            self.session_data["questions_asked"].append(question_key)
         self._log_debug(f"Marked question asked: {question_key}")
 
     def _has_asked_question(self, question_key: str) -> bool:
-        return question_key in self.session_data["questions_asked"]
+        return question_key in self._questions_asked
 
     def set_llm_client(self, llm_client):
         self.llm_client = llm_client
@@ -197,7 +256,6 @@ class Session3Manager:
         conversation_history: list = None,
     ) -> Dict[str, Any]:
         """Process user input and determine state transitions"""
-        user_lower = user_input.lower().strip()
         self.session_data["turn_count"] += 1
 
         self._log_debug(f"Processing input in state: {self.state.value}")
@@ -209,7 +267,7 @@ class Session3Manager:
         result = create_state_result()
 
         # CRITICAL: If we're in END_SESSION and goodbye was already given, stay there
-        if self.state == Session3State.END_SESSION and self.session_data.get(
+        if self.state is Session3State.END_SESSION and self.session_data.get(
             "final_goodbye_given"
         ):
             result[
@@ -218,326 +276,347 @@ class Session3Manager:
             result["trigger_rag"] = False
             return result
 
-        # GREETINGS STATE
-        if self.state == Session3State.GREETINGS:
-            if user_input.strip() == "[START_SESSION]":
-                result[
-                    "context"
-                ] = f"Welcome {self.session_data.get('user_name', 'them')} back warmly. It's Session 3. Keep it brief."
-                return result
-
-            result["next_state"] = Session3State.CHECK_IN_GOALS
-            result["context"] = "Acknowledge briefly. Move to check-in on their goals."
-            self._mark_question_asked("greeting")
-
-        # CHECK_IN_GOALS STATE - Simplified
-        elif self.state == Session3State.CHECK_IN_GOALS:
-            # Mark that we've asked about check-in
-            if not self.session_data.get("check_in_asked"):
-                self.session_data["check_in_asked"] = True
-                result[
-                    "context"
-                ] = "Ask how their goals went this past week. Be warm and interested."
-            else:
-                # They've responded - move to stress level
-                result["next_state"] = Session3State.STRESS_LEVEL
-                result[
-                    "context"
-                ] = "Acknowledge their progress. Now ask about stress level on a scale of 1-10."
-                self._mark_question_asked("check_in_goals")
-
-        # STRESS_LEVEL STATE
-        elif self.state == Session3State.STRESS_LEVEL:
-            # Try to extract a stress level number (1-10)
-            stress = extract_number(user_input)
-
-            # Validate it's in range
-            if stress and 1 <= stress <= 10:
-                self.session_data["stress_level"] = stress
-                result["next_state"] = Session3State.GOALS_FOR_NEXT_WEEK
-                result[
-                    "context"
-                ] = f"Stress level noted: {stress}/10. Ask what they want to focus on for goals."
-                self._mark_question_asked("stress_level")
-            else:
-                # Didn't get valid stress level
-                result[
-                    "context"
-                ] = "Didn't get valid stress number (1-10). Ask: 'On a scale of 1-10, what was your stress level this past week?'"
-
-        # GOALS_FOR_NEXT_WEEK STATE
-        elif self.state == Session3State.GOALS_FOR_NEXT_WEEK:
-            # Detect intent
-            same_indicators = ["same", "keep", "continue", "current", "these"]
-            different_indicators = ["different", "change", "new", "adjust"]
-
-            has_same = any(word in user_lower for word in same_indicators)
-            has_different = any(word in user_lower for word in different_indicators)
-
-            if has_same and not has_different:
-                self.session_data["path_chosen"] = "same"
-                self.session_data["goals_to_keep"] = [
-                    g["goal"] for g in self.session_data.get("previous_goals", [])
-                ]
-                result["next_state"] = Session3State.SAME_GOALS_SUCCESSES_CHALLENGES
-                result[
-                    "context"
-                ] = "Same goals path. Ask about successes and challenges."
-            elif has_different or has_same:  # They want to adjust
-                self.session_data["path_chosen"] = "different"
-                result["next_state"] = Session3State.DIFFERENT_WHICH_GOALS
-                result[
-                    "context"
-                ] = "Different/adjustment path. Ask which goals to keep and what to change."
-            else:
-                result[
-                    "context"
-                ] = "Clarify: Would you like to keep your current goals or make some changes?"
-
-        # PATH 1: SAME GOALS
-        elif self.state == Session3State.SAME_GOALS_SUCCESSES_CHALLENGES:
-            # Capture successes and challenges
-            if "success" in user_lower or "good" in user_lower or "well" in user_lower:
-                successes = self.session_data.get("successes", [])
-                successes.append(user_input)
-                self.session_data["successes"] = successes
-
-            if (
-                "challenge" in user_lower
-                or "difficult" in user_lower
-                or "hard" in user_lower
-            ):
-                challenges = self.session_data.get("challenges", [])
-                challenges.append(user_input)
-                self.session_data["challenges"] = challenges
-
-            result["next_state"] = Session3State.SAME_ANYTHING_TO_CHANGE
+        # The opening sentinel is matched case-sensitively, so answer it
+        # before normalizing the input
+        if (
+            self.state is Session3State.GREETINGS
+            and user_input.strip() == "[START_SESSION]"
+        ):
             result[
                 "context"
-            ] = "Successes and challenges noted. Ask if anything needs to change."
+            ] = f"Welcome {self.session_data.get('user_name', 'them')} back warmly. It's Session 3. Keep it brief."
+            return result
 
-        elif self.state == Session3State.SAME_ANYTHING_TO_CHANGE:
-            if check_affirmative(user_input):
-                self.session_data["adjustments_discussed"] = True
-                result["next_state"] = Session3State.SAME_WHAT_CONCERNS
-                result["context"] = "They want changes. Ask what concerns them."
-            else:
-                result["next_state"] = Session3State.CONFIDENCE_CHECK
-                result["context"] = "No changes needed. Move to confidence check."
-
-        elif self.state == Session3State.SAME_WHAT_CONCERNS:
-            concerns = self.session_data.get("changes_needed", {})
-            concerns["concerns"] = user_input
-            self.session_data["changes_needed"] = concerns
-            result["next_state"] = Session3State.SAME_EXPLORE_SOLUTIONS
-            result["context"] = "Concerns noted. Explore solutions together."
-
-        elif self.state == Session3State.SAME_EXPLORE_SOLUTIONS:
-            solutions = self.session_data.get("solutions", {})
-            solutions["discussed"] = user_input
-            self.session_data["solutions"] = solutions
-            result["next_state"] = Session3State.CONFIDENCE_CHECK
-            result["context"] = "Solutions explored. Move to confidence check."
+        user_lower = user_input.lower().strip()
+        handler = self._state_handlers.get(self.state)
+        if handler:
+            handler(user_input, user_lower, result)
 
-        # PATH 2: DIFFERENT GOALS (keeping some + new)
-        elif self.state == Session3State.DIFFERENT_WHICH_GOALS:
-            # They're describing what they want to keep/change
-            # Simple approach: assume they've told us, move to confirmation
-            result["next_state"] = Session3State.CONFIDENCE_CHECK
+        if result["next_state"]:
+            self._log_debug(f"Next state will be: {result['next_state'].value}")
+
+        return result
+
+    def _handle_greetings(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session3State.CHECK_IN_GOALS
+        result["context"] = "Acknowledge briefly. Move to check-in on their goals."
+        self._mark_question_asked("greeting")
+
+    def _handle_check_in_goals(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Mark that we've asked about check-in
+        if not self.session_data.get("check_in_asked"):
+            self.session_data["check_in_asked"] = True
             result[
                 "context"
-            ] = "They've indicated their goal direction. Move to confidence check."
-
-        elif self.state == Session3State.DIFFERENT_KEEPING_AND_NEW:
-            if is_likely_goal(user_input):
-                self.session_data["current_goal"] = user_input
-                result["next_state"] = Session3State.REFINE_GOAL
-                result["context"] = "New goal identified. Refine it to be SMART."
-            else:
-                result["context"] = "Encourage them to share their new goal."
-
-        # PATH 3: JUST NEW GOALS
-        elif self.state == Session3State.JUST_NEW_GOALS:
-            if is_likely_goal(user_input):
-                self.session_data["current_goal"] = user_input
-                result["next_state"] = Session3State.REFINE_GOAL
-                result["context"] = "New goal captured. Move to refinement."
+            ] = "Ask how their goals went this past week. Be warm and interested."
+        else:
+            # They've responded - move to stress level
+            result["next_state"] = Session3State.STRESS_LEVEL
+            result[
+                "context"
+            ] = "Acknowledge their progress. Now ask about stress level on a scale of 1-10."
+            self._mark_question_asked("check_in_goals")
+
+    def _handle_stress_level(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Try to extract a stress level number (1-10)
+        stress = extract_number(user_input)
+
+        # Validate it's in range
+        if stress and 1 <= stress <= 10:
+            self.session_data["stress_level"] = stress
+            result["next_state"] = Session3State.GOALS_FOR_NEXT_WEEK
+            result[
+                "context"
+            ] = f"Stress level noted: {stress}/10. Ask what they want to focus on for goals."
+            self._mark_question_asked("stress_level")
+        else:
+            # Didn't get valid stress level
+            result[
+                "context"
+            ] = "Didn't get valid stress number (1-10). Ask: 'On a scale of 1-10, what was your stress level this past week?'"
+
+    def _handle_goals_for_next_week(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Detect intent
+        has_same = bool(_SAME_KW_RE.search(user_lower))
+        has_different = bool(_DIFFERENT_KW_RE.search(user_lower))
+
+        if has_same and not has_different:
+            self.session_data["path_chosen"] = "same"
+            self.session_data["goals_to_keep"] = [
+                g["goal"] for g in self.session_data.get("previous_goals", [])
+            ]
+            result["next_state"] = Session3State.SAME_GOALS_SUCCESSES_CHALLENGES
+            result[
+                "context"
+            ] = "Same goals path. Ask about successes and challenges."
+        elif has_different or has_same:  # They want to adjust
+            self.session_data["path_chosen"] = "different"
+            result["next_state"] = Session3State.DIFFERENT_WHICH_GOALS
+            result[
+                "context"
+            ] = "Different/adjustment path. Ask which goals to keep and what to change."
+        else:
+            result[
+                "context"
+            ] = "Clarify: Would you like to keep your current goals or make some changes?"
+
+    def _handle_same_goals_successes_challenges(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Capture successes and challenges
+        if _SUCCESS_KW_RE.search(user_lower):
+            successes = self.session_data.get("successes", [])
+            successes.append(user_input)
+            self.session_data["successes"] = successes
+
+        if _CHALLENGE_KW_RE.search(user_lower):
+            challenges = self.session_data.get("challenges", [])
+            challenges.append(user_input)
+            self.session_data["challenges"] = challenges
+
+        result["next_state"] = Session3State.SAME_ANYTHING_TO_CHANGE
+        result[
+            "context"
+        ] = "Successes and challenges noted. Ask if anything needs to change."
+
+    def _handle_same_anything_to_change(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        if check_affirmative(user_input):
+            self.session_data["adjustments_discussed"] = True
+            result["next_state"] = Session3State.SAME_WHAT_CONCERNS
+            result["context"] = "They want changes. Ask what concerns them."
+        else:
+            result["next_state"] = Session3State.CONFIDENCE_CHECK
+            result["context"] = "No changes needed. Move to confidence check."
+
+    def _handle_same_what_concerns(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        concerns = self.session_data.get("changes_needed", {})
+        concerns["concerns"] = user_input
+        self.session_data["changes_needed"] = concerns
+        result["next_state"] = Session3State.SAME_EXPLORE_SOLUTIONS
+        result["context"] = "Concerns noted. Explore solutions together."
+
+    def _handle_same_explore_solutions(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        solutions = self.session_data.get("solutions", {})
+        solutions["discussed"] = user_input
+        self.session_data["solutions"] = solutions
+        result["next_state"] = Session3State.CONFIDENCE_CHECK
+        result["context"] = "Solutions explored. Move to confidence check."
+
+    def _handle_different_which_goals(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # They're describing what they want to keep/change
+        # Simple approach: assume they've told us, move to confirmation
+        result["next_state"] = Session3State.CONFIDENCE_CHECK
+        result[
+            "context"
+        ] = "They've indicated their goal direction. Move to confidence check."
+
+    def _handle_different_keeping_and_new(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        if is_likely_goal(user_input):
+            self.session_data["current_goal"] = user_input
+            result["next_state"] = Session3State.REFINE_GOAL
+            result["context"] = "New goal identified. Refine it to be SMART."
+        else:
+            result["context"] = "Encourage them to share their new goal."
+
+    def _handle_just_new_goals(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        if is_likely_goal(user_input):
+            self.session_data["current_goal"] = user_input
+            result["next_state"] = Session3State.REFINE_GOAL
+            result["context"] = "New goal captured. Move to refinement."
+        else:
+            result["context"] = "Encourage them to share their new goal."
+
+    def _handle_refine_goal(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        current_goal = self.session_data.get("current_goal")
+
+        if current_goal:
+            # Evaluate SMART
+            smart_result = self.evaluate_smart_goal(current_goal)
+            self.session_data["goal_smart_analysis"] = smart_result
+
+            if smart_result["is_smart"]:
+                # Goal is SMART, accept it
+                new_goals = self.session_data.get("new_goals", [])
+                new_goals.append(current_goal)
+                self.session_data["new_goals"] = new_goals
+                result["next_state"] = Session3State.CONFIDENCE_CHECK
+                result["context"] = "Goal is SMART. Move to confidence check."
             else:
-                result["context"] = "Encourage them to share their new goal."
+                # Need refinement
+                self.session_data["smart_refinement_attempts"] += 1
 
-        # REFINE_GOAL STATE
-        elif self.state == Session3State.REFINE_GOAL:
-            current_goal = self.session_data.get("current_goal")
-
-            if current_goal:
-                # Evaluate SMART
-                smart_result = self.evaluate_smart_goal(current_goal)
-                self.session_data["goal_smart_analysis"] = smart_result
-
-                if smart_result["is_smart"]:
-                    # Goal is SMART, accept it
+                if self.session_data["smart_refinement_attempts"] >= 2:
+                    # Accept after 2 attempts
                     new_goals = self.session_data.get("new_goals", [])
                     new_goals.append(current_goal)
                     self.session_data["new_goals"] = new_goals
                     result["next_state"] = Session3State.CONFIDENCE_CHECK
-                    result["context"] = "Goal is SMART. Move to confidence check."
-                else:
-                    # Need refinement
-                    self.session_data["smart_refinement_attempts"] += 1
-
-                    if self.session_data["smart_refinement_attempts"] >= 2:
-                        # Accept after 2 attempts
-                        new_goals = self.session_data.get("new_goals", [])
-                        new_goals.append(current_goal)
-                        self.session_data["new_goals"] = new_goals
-                        result["next_state"] = Session3State.CONFIDENCE_CHECK
-                        result[
-                            "context"
-                        ] = "Goal accepted after refinement attempts. Move to confidence."
-                    else:
-                        missing = ", ".join(smart_result["missing_criteria"])
-                        result[
-                            "context"
-                        ] = f"Goal needs work. Missing: {missing}. Help refine it."
-            else:
-                result["context"] = "No current goal. Ask them to state their goal."
-
-        # CONFIDENCE_CHECK STATE
-        elif self.state == Session3State.CONFIDENCE_CHECK:
-            # Try to extract confidence number (1-10)
-            confidence = extract_number(user_input)
-
-            # Validate it's in range
-            if confidence and 1 <= confidence <= 10:
-                self.session_data["confidence_level"] = confidence
-
-                if confidence < 7:
-                    result["next_state"] = Session3State.LOW_CONFIDENCE
                     result[
                         "context"
-                    ] = f"Low confidence ({confidence}/10). Explore what would help."
+                    ] = "Goal accepted after refinement attempts. Move to confidence."
                 else:
-                    result["next_state"] = Session3State.HIGH_CONFIDENCE
+                    missing = ", ".join(smart_result["missing_criteria"])
                     result[
                         "context"
-                    ] = f"Good confidence ({confidence}/10). Move forward."
-            else:
-                result[
-                    "context"
-                ] = "Didn't get valid confidence number (1-10). Ask: 'On a scale of 1-10, how confident are you about achieving this goal?'"
-
-        # LOW_CONFIDENCE STATE
-        elif self.state == Session3State.LOW_CONFIDENCE:
-            if not self.session_data.get("explored_low_confidence"):
-                self.session_data["explored_low_confidence"] = True
-                result["next_state"] = Session3State.MAKE_ACHIEVABLE
-                result[
-                    "context"
-                ] = "Low confidence explored. Ask how to make it more achievable."
-            else:
-                result["next_state"] = Session3State.REMEMBER_GOAL
-                result["context"] = "Explored enough. Move to tracking method."
-
-        # HIGH_CONFIDENCE STATE
-        elif self.state == Session3State.HIGH_CONFIDENCE:
-            result["next_state"] = Session3State.REMEMBER_GOAL
-            result["context"] = "High confidence. Move to tracking method."
+                    ] = f"Goal needs work. Missing: {missing}. Help refine it."
+        else:
+            result["context"] = "No current goal. Ask them to state their goal."
 
-        # MAKE_ACHIEVABLE STATE
-        elif self.state == Session3State.MAKE_ACHIEVABLE:
-            # They've discussed making it achievable
-            result["next_state"] = Session3State.REMEMBER_GOAL
-            result["context"] = "Adjustments discussed. Move to tracking method."
+    def _handle_confidence_check(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Try to extract confidence number (1-10)
+        confidence = extract_number(user_input)
 
-        # REMEMBER_GOAL STATE
-        elif self.state == Session3State.REMEMBER_GOAL:
-            self.session_data["tracking_method_discussed"] = True
-            result["next_state"] = Session3State.MORE_GOALS_CHECK
-            result["context"] = "Tracking method noted. Ask if they want more goals."
-
-        # MORE_GOALS_CHECK STATE
-        elif self.state == Session3State.MORE_GOALS_CHECK:
-            if check_wants_more(user_input):
-                # They want to add another goal
-                self.session_data["current_goal"] = None
-                self.session_data["smart_refinement_attempts"] = 0
-                result["next_state"] = Session3State.JUST_NEW_GOALS
-                result["context"] = "They want another goal. Ask them to share it."
-            else:
-                # Done with goals
-                result["next_state"] = Session3State.CONFIRM_END_SESSION
-                result[
-                    "context"
-                ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
-
-        elif self.state == Session3State.CONFIRM_END_SESSION:
-            # Check if user actually wants to end
-            user_done = any(
-                phrase in user_lower
-                for phrase in [
-                    "yes",
-                    "yeah",
-                    "yep",
-                    "sure",
-                    "no",
-                    "nope",
-                    "nah",
-                    "i'm good",
-                    "im good",
-                    "that's all",
-                    "thats all",
-                    "nothing else",
-                    "all set",
-                    "bye",
-                    "goodbye",
-                    "see you",
-                    "thanks",
-                    "thank you",
-                    "take care",
-                ]
-            )
+        # Validate it's in range
+        if confidence and 1 <= confidence <= 10:
+            self.session_data["confidence_level"] = confidence
 
-            if user_done:
-                result["next_state"] = Session3State.END_SESSION
-                self.session_data["final_goodbye_given"] = True
+            if confidence < 7:
+                result["next_state"] = Session3State.LOW_CONFIDENCE
                 result[
                     "context"
-                ] = "User confirmed they're done. Give warm final goodbye. Confirm next session is in 1 week."
+                ] = f"Low confidence ({confidence}/10). Explore what would help."
             else:
-                # User still has something to discuss - go back to active conversation
-                result["next_state"] = Session3State.MORE_GOALS_CHECK
+                result["next_state"] = Session3State.HIGH_CONFIDENCE
                 result[
                     "context"
-                ] = f"User said: '{user_input}' - they're not done yet. Address what they said and continue the conversation naturally."
-            result["trigger_rag"] = True
+                ] = f"Good confidence ({confidence}/10). Move forward."
+        else:
+            result[
+                "context"
+            ] = "Didn't get valid confidence number (1-10). Ask: 'On a scale of 1-10, how confident are you about achieving this goal?'"
+
+    def _handle_low_confidence(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        if not self.session_data.get("explored_low_confidence"):
+            self.session_data["explored_low_confidence"] = True
+            result["next_state"] = Session3State.MAKE_ACHIEVABLE
+            result[
+                "context"
+            ] = "Low confidence explored. Ask how to make it more achievable."
+        else:
+            result["next_state"] = Session3State.REMEMBER_GOAL
+            result["context"] = "Explored enough. Move to tracking method."
+
+    def _handle_high_confidence(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session3State.REMEMBER_GOAL
+        result["context"] = "High confidence. Move to tracking method."
+
+    def _handle_make_achievable(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # They've discussed making it achievable
+        result["next_state"] = Session3State.REMEMBER_GOAL
+        result["context"] = "Adjustments discussed. Move to tracking method."
+
+    def _handle_remember_goal(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        self.session_data["tracking_method_discussed"] = True
+        result["next_state"] = Session3State.MORE_GOALS_CHECK
+        result["context"] = "Tracking method noted. Ask if they want more goals."
+
+    def _handle_more_goals_check(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        if check_wants_more(user_input):
+            # They want to add another goal
+            self.session_data["current_goal"] = None
+            self.session_data["smart_refinement_attempts"] = 0
+            result["next_state"] = Session3State.JUST_NEW_GOALS
+            result["context"] = "They want another goal. Ask them to share it."
+        else:
+            # Done with goals
+            result["next_state"] = Session3State.CONFIRM_END_SESSION
+            result[
+                "context"
+            ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
 
-        # END_SESSION STATE
-        elif self.state == Session3State.END_SESSION:
-            self.session_data["final_goodbye_given"] = True
-            result["context"] = "Session ended. Polite acknowledgment only."
-            result["trigger_rag"] = False
+    def _handle_confirm_end_session(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Check if user actually wants to end
+        user_done = bool(_USER_DONE_RE.search(user_lower))
 
-        if result["next_state"]:
-            self._log_debug(f"Next state will be: {result['next_state'].value}")
+        if user_done:
+            result["next_state"] = Session3State.END_SESSION
+            self.session_data["final_goodbye_given"] = True
+            result[
+                "context"
+            ] = "User confirmed they're done. Give warm final goodbye. Confirm next session is in 1 week."
+        else:
+            # User still has something to discuss - go back to active conversation
+            result["next_state"] = Session3State.MORE_GOALS_CHECK
+            result[
+                "context"
+            ] = f"User said: '{user_input}' - they're not done yet. Address what they said and continue the conversation naturally."
+        result["trigger_rag"] = True
 
-        return result
+    def _handle_end_session(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        self.session_data["final_goodbye_given"] = True
+        result["context"] = "Session ended. Polite acknowledgment only."
+        result["trigger_rag"] = False
 
     def get_system_prompt_addition(self) -> str:
         """Get state-specific system prompt additions"""
-        return get_session3_prompt(
-            state_value=self.state.value, session_data=self.session_data
-        )
+        if self._prompt_state is not self.state:
+            # Select the state's template once per state change, not every turn
+            self._prompt_state = self.state
+            self._render_state_prompt = session3_prompt_renderer(self.state.value)
+        return self._render_state_prompt(self.session_data)
 
     def get_session_summary(self) -> Dict[str, Any]:
-        """Get summary of session data"""
-        return {
-            "current_state": self.state.value,
-            "session_data": self.session_data,
-            "duration_turns": self.session_data["turn_count"],
-        }
-
-    def save_session(self, filename: str = None, conversation_history: list = None):
-        """Save session using unified storage format and database"""
+        """
+        Get summary of session data. The same dict is refreshed and returned
+        on every call, so read it rather than keeping or mutating it;
+        its session_data is a read-only view of the live session data.
+        """
+        summary = self._summary
+        summary["current_state"] = self.state.value
+        summary["session_data"] = MappingProxyType(self.session_data)
+        summary["duration_turns"] = self.session_data["turn_count"]
+        return summary
+
+    def save_session(
+        self,
+        filename: str = None,
+        conversation_history: list = None,
+        snapshot_history: list = None,
+    ):
+        """
+        Save session using unified storage format and database.
+
+        snapshot_history, when given, is the chat history written to the file
+        instead of conversation_history (the database always gets the full one).
+        """
         self._log_debug("Saving Session 3 with unified format")
 
         # Build complete goals list
@@ -620,7 +699,8 @@ class Session3Manager:
         }
 
         # Save to PostgreSQL database
-        if save_session_to_db(self.uid, 3, full_data):
+        self.db_saved = save_session_to_db(self.uid, 3, full_data)
+        if self.db_saved:
             self._log_debug(f"Session 3 saved to database for UID: {self.uid}")
         else:
             self._log_debug("Warning: Failed to save Session 3 to database")
@@ -634,7 +714,9 @@ class Session3Manager:
             discovery=discovery,
             goals=all_goals,
             session_metadata=session_metadata,
-            conversation_history=conversation_history,
+            conversation_history=(
+                conversation_history if snapshot_history is None else snapshot_history
+            ),
             filename=filename,
         )
 
@@ -33,7 +33,8 @@ class Session3RAGChatbot(BaseSessionRAGChatbot):
         
         # Session 3 specific setup
         self.session_manager = Session3Manager(user_profile=user_profile)
-        self.session_manager.set_llm_client(self._create_llm_evaluator())
+        self.session_manager.set_llm_client(self._llm_evaluator)
+        self._previous_goals_cache = (None, "")  # (previous_goals list, rendered block)
     
     def _get_memory_summary(self):
         """Generate Session 3 specific memory summary"""
@@ -47,11 +48,7 @@ class Session3RAGChatbot(BaseSessionRAGChatbot):
         # Previous goals from Session 2
         previous_goals = self.session_manager.session_data.get('previous_goals', [])
         if previous_goals:
-            summary_parts.append(f"\nPrevious goals from Session 2 ({len(previous_goals)} total):")
-            for i, goal_info in enumerate(previous_goals, 1):
-                goal_text = goal_info['goal']
-                confidence = goal_info.get('confidence', 'N/A')
-                summary_parts.append(f"  {i}. {goal_text} (Confidence: {confidence}/10)")
+            summary_parts.append(self._previous_goals_summary(previous_goals))
         
         # Current session data
         stress_level = self.session_manager.session_data.get('stress_level')
@@ -102,6 +99,20 @@ class Session3RAGChatbot(BaseSessionRAGChatbot):
         
         return "\n".join(summary_parts) if summary_parts else ""
     
+    def _previous_goals_summary(self, previous_goals):
+        """
+        Previous-goals block of the memory summary. The list is only replaced
+        (on init or load), never edited, so the block is rendered once per list.
+        """
+        if self._previous_goals_cache[0] is not previous_goals:
+            lines = [f"\nPrevious goals from Session 2 ({len(previous_goals)} total):"]
+            for i, goal_info in enumerate(previous_goals, 1):
+                goal_text = goal_info['goal']
+                confidence = goal_info.get('confidence', 'N/A')
+                lines.append(f"  {i}. {goal_text} (Confidence: {confidence}/10)")
+            self._previous_goals_cache = (previous_goals, "\n".join(lines))
+        return self._previous_goals_cache[1]
+    
     def get_session_info(self):
         """Get current session state and data (Session 3 format)"""
         return {
@@ -120,7 +131,7 @@ class Session3RAGChatbot(BaseSessionRAGChatbot):
             "name": self.session_manager.session_data.get('user_name')
         }
         self.session_manager = Session3Manager(user_profile=user_profile)
-        self.session_manager.set_llm_client(self._create_llm_evaluator())
+        self.session_manager.set_llm_client(self._llm_evaluator)
         self.conversation_history = []
         print("✓ Session 3 reset to beginning")
 
@@ -268,7 +279,7 @@ def interactive_session3_chat():
             continue
         
         if user_input.lower() == 'save':
-            filename = chatbot.save_session()
+            filename = chatbot.save_session(checkpoint=True)
             print(f"✓ Session saved to {filename}\n")
             continue
         
@@ -287,7 +298,7 @@ def interactive_session3_chat():
             print("\n")
             
             session_state = chatbot.session_manager.get_state()
-            if session_state == Session3State.END_SESSION:
+            if session_state is Session3State.END_SESSION:
                 print("\n" + "=" * 80)
                 print("SESSION 3 COMPLETE!")
                 print("=" * 80)
@@ -3,6 +3,7 @@ import os
 import re
 from datetime import datetime
 from enum import Enum
+from types import MappingProxyType
 from typing import Any, Dict, List, Optional
 
 from utils.database import load_session_from_db, save_session_to_db
@@ -11,7 +12,9 @@ from utils.goal_detection import is_likely_goal
 # Utilities
 from utils.smart_evaluation import (
     create_concise_goal,
+    evaluate_smart_goal_delta_with_llm,
     evaluate_smart_goal_with_llm,
+    goal_addition,
     heuristic_smart_check,
 )
 from utils.state_helpers import (
@@ -22,13 +25,51 @@ from utils.state_helpers import (
     create_state_result,
     extract_number,
 )
-from utils.state_prompts import get_session4_prompt
+from utils.state_prompts import session4_prompt_renderer
 from utils.unified_storage import (
     extract_user_profile,
     get_active_goals,
     save_unified_session,
 )
 
+# Keyword matchers used by process_user_input, compiled once rather than
+# rebuilt as lists each turn. Word boundaries avoid hits inside unrelated
+# words ("one" in "done", "up" in "upset", "all" in "really"); stems take
+# \w* for inflections. "not", "nope", "nothing" and "none" are listed
+# wherever "no" is, since the old substring check caught them through "no".
+_ACHIEVED_RE = re.compile(r"\b(?:yes|yup|yeah|both|all)\b")
+_EXPLICIT_YES_RE = re.compile(r"\b(?:hit both|achieved both|did both|both goals|all goals)\b")
+_EXPLICIT_NO_RE = re.compile(r"\b(?:didn't hit|missed|only hit one|couldn't do)\b")
+_POSITIVE_RE = re.compile(
+    r"\b(?:yes|great|good|achieved|completed|did it|success\w*|both|all|accomplished"
+    r"|hit|met|well|worked|better)\b"
+)
+_NEGATIVE_RE = re.compile(
+    r"\b(?:no|not|nope|nothing|none|didn't|couldn't|failed|hard\w*|difficult\w*|missed|partially|one)\b"
+)
+_CHANGE_RE = re.compile(
+    r"\b(?:increas\w*|decreas\w*|more|less|up|down|adjust\w*|chang\w*|bump\w*|add\w*"
+    r"|different\w*)\b"
+)
+_KEEP_RE = re.compile(r"\b(?:keep\w*|same|continu\w*|maintain\w*|stay\w*)\b")
+_CONFIRMING_RE = re.compile(r"\b(?:good|fine|yes|perfect|right|correct|keep\w*|stay\w*)\b")
+_CURRENT_RE = re.compile(
+    r"\b(?:current\w*|same|keep\w*|continu\w*|existing|maintain\w*|focus\w*|working)\b"
+)
+_NEW_RE = re.compile(r"\b(?:new|different\w*|something else)\b")
+_MODIFY_RE = re.compile(r"\b(?:challeng\w*|more|increas\w*|add\w*|adjust\w*|bump\w*|up|rais\w*)\b")
+_NO_CHANGE_RE = re.compile(
+    r"\b(?:no|not|nope|none|same|keep\w*|good|fine|ready|nothing|as is|habit\w*|confident)\b"
+)
+_WANTS_CHANGE_RE = re.compile(
+    r"\b(?:yes|chang\w*|adjust\w*|modif\w*|increas\w*|decreas\w*|more|less)\b"
+)
+_GOODBYE_RE = re.compile(r"\b(?:bye|goodbye|thank you|thanks|see you)\b")
+_USER_DONE_RE = re.compile(
+    r"\b(?:yes|yeah|yep|sure|no|not|nope|nothing|none|nah|i'm good|im good"
+    r"|that's all|thats all|all set|bye|goodbye|see you|thanks|thank you|take care)\b"
+)
+
 
 class Session4State(Enum):
     """States for Session 4 conversation flow"""
@@ -78,6 +119,21 @@ class Session4State(Enum):
 class Session4Manager:
     """Manages conversation flow for Session 4"""
 
+    # One manager per live session; fixed slots keep instances small
+    __slots__ = (
+        "debug",
+        "state",
+        "uid",
+        "session_data",
+        "_questions_asked",
+        "db_saved",
+        "llm_client",
+        "_state_handlers",
+        "_prompt_state",
+        "_render_state_prompt",
+        "_summary",
+    )
+
     def __init__(self, user_profile: Dict = None, llm_client=None, debug=True):
         self.debug = debug
         self.state = Session4State.GREETINGS
@@ -135,10 +191,40 @@ class Session4Manager:
             "session_start": datetime.now().isoformat(),
             "turn_count": 0,
             "last_coach_response": None,
-            "questions_asked": set(),
+            "questions_asked": [],
             "final_goodbye_given": False,
         }
+        # Membership index for questions_asked, which stays a JSON-ready list
+        self._questions_asked = set()
+        self.db_saved = False  # Whether the last save_session reached the database
         self.llm_client = llm_client
+        # One dict lookup per turn instead of walking an if/elif chain over every state
+        self._state_handlers = {
+            Session4State.GREETINGS: self._handle_greetings,
+            Session4State.REINFORCE_GOAL_FROM_LAST_SESSION: self._handle_reinforce_goal_from_last_session,
+            Session4State.CHECK_IN_GOALS: self._handle_check_in_goals,
+            Session4State.WHAT_HAPPENED: self._handle_what_happened,
+            Session4State.WHAT_CAN_BE_DONE_TO_MAKE_IT_BETTER: self._handle_what_can_be_done_to_make_it_better,
+            Session4State.STRESS_LEVEL: self._handle_stress_level,
+            Session4State.STRESS_HIGH_WHAT_HAPPENED: self._handle_stress_high_what_happened,
+            Session4State.STRESS_HIGH_ANYTHING_WE_CAN_TALK_ABOUT: self._handle_stress_high_anything_we_can_talk_about,
+            Session4State.STRESS_LOW_WHAT_HAPPENED: self._handle_stress_low_what_happened,
+            Session4State.WHATS_THE_FOCUS_TODAY: self._handle_whats_the_focus_today,
+            Session4State.CURRENT_GOALS_ANYTHING_NEEDING_TO_CHANGE: self._handle_current_goals_anything_needing_to_change,
+            Session4State.SMART_YES_PATH: self._handle_smart_yes_path,
+            Session4State.SMART_NO_PATH: self._handle_smart_no_path,
+            Session4State.CONFIDENCE_CHECK: self._handle_confidence_check,
+            Session4State.LOW_CONFIDENCE_WHAT_SUCCESSES: self._handle_low_confidence_what_successes,
+            Session4State.LOW_CONFIDENCE_HOW_CAN_WE_MAKE_IT_MORE_ACHIEVABLE: self._handle_low_confidence_how_can_we_make_it_more_achievable,
+            Session4State.HIGH_CONFIDENCE_PATH: self._handle_high_confidence_path,
+            Session4State.HOW_WILL_YOU_REMEMBER_TO_DO_YOUR_GOAL: self._handle_how_will_you_remember_to_do_your_goal,
+            Session4State.ANY_FINAL_QUESTIONS: self._handle_any_final_questions,
+            Session4State.CONFIRM_END_SESSION: self._handle_confirm_end_session,
+            Session4State.END_SESSION: self._handle_end_session,
+        }
+        self._prompt_state = None
+        self._render_state_prompt = None
+        self._summary = {"current_state": None, "session_data": None, "duration_turns": 0}
         self._log_debug(
             f"Session 4 initialized with user: {user_name}, UID: {self.uid}"
         )
@@ -153,11 +239,13 @@ class Session4Manager:
             print(f"[DEBUG] {message}", flush=True)
 
     def _mark_question_asked(self, question_key: str):
-        self.session_data["questions_asked"].add(question_key)
+        if question_key not in self._questions_asked:
+            self._questions_asked.add(question_key)
+            self.session_data["questions_asked"].append(question_key)
         self._log_debug(f"Marked question asked: {question_key}")
 
     def _has_asked_question(self, question_key: str) -> bool:
-        return question_key in self.session_data["questions_asked"]
+        return question_key in self._questions_asked
 
     def set_llm_client(self, llm_client):
         self.llm_client = llm_client
@@ -181,6 +269,32 @@ class Session4Manager:
             self._log_debug(f"SMART evaluation error: {e}")
             return heuristic_smart_check(goal)
 
+    def _evaluate_refined_goal(self, prev_goal: str, goal: str) -> Dict[str, Any]:
+        """
+        Evaluate a refined goal. When it only extends the previously evaluated
+        goal by a few words, ask only about the criteria the previous verdict
+        left unmet.
+        """
+        prev_eval = self.session_data.get("goal_smart_analysis")
+        added_text = goal_addition(prev_goal, goal)
+        if not (self.llm_client and prev_eval and added_text):
+            return self.evaluate_smart_goal(goal)
+
+        self._log_debug(f"Delta SMART evaluation for addition: '{added_text}'")
+        try:
+            result = evaluate_smart_goal_delta_with_llm(
+                goal, added_text, prev_eval, self.llm_client
+            )
+            self._log_debug(
+                f"SMART evaluation result: is_smart={result['is_smart']}, missing={result['missing_criteria']}"
+            )
+            return result
+        except Exception as e:
+            self._log_debug(
+                f"Delta SMART evaluation error: {e}; using heuristic check"
+            )
+            return heuristic_smart_check(goal)
+
     def get_state(self) -> Session4State:
         return self.state
 
@@ -196,7 +310,6 @@ class Session4Manager:
         conversation_history: list = None,
     ) -> Dict[str, Any]:
         """Process user input and determine state transitions"""
-        user_lower = user_input.lower().strip()
         self.session_data["turn_count"] += 1
 
         self._log_debug(f"Processing input in state: {self.state.value}")
@@ -208,7 +321,7 @@ class Session4Manager:
         result = create_state_result()
 
         # If session ended, stay in END_SESSION
-        if self.state == Session4State.END_SESSION and self.session_data.get(
+        if self.state is Session4State.END_SESSION and self.session_data.get(
             "final_goodbye_given"
         ):
             result[
@@ -217,860 +330,752 @@ class Session4Manager:
             result["trigger_rag"] = False
             return result
 
-        # GREETINGS
-        if self.state == Session4State.GREETINGS:
-            if user_input.strip() == "[START_SESSION]":
-                result[
-                    "context"
-                ] = f"Welcome {self.session_data.get('user_name', 'them')} to Session 4. Keep it brief and warm."
-                return result
+        # The opening sentinel is matched case-sensitively, so answer it
+        # before normalizing the input
+        if (
+            self.state is Session4State.GREETINGS
+            and user_input.strip() == "[START_SESSION]"
+        ):
+            result[
+                "context"
+            ] = f"Welcome {self.session_data.get('user_name', 'them')} to Session 4. Keep it brief and warm."
+            return result
+
+        user_lower = user_input.lower().strip()
+        handler = self._state_handlers.get(self.state)
+        if handler:
+            handler(user_input, user_lower, result)
+
+        if result["next_state"]:
+            self._log_debug(f"Next state will be: {result['next_state'].value}")
+
+        return result
+
+    def _handle_greetings(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session4State.REINFORCE_GOAL_FROM_LAST_SESSION
+        result[
+            "context"
+        ] = "Acknowledge briefly. Move to reinforcing goals from last session."
+        self._mark_question_asked("greeting")
+
+    def _handle_reinforce_goal_from_last_session(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Check if they're already telling us they achieved goals
+        if _ACHIEVED_RE.search(user_lower):
+            self.session_data["goals_achieved"] = True
+            result["next_state"] = Session4State.WHAT_HAPPENED
+            result[
+                "context"
+            ] = "Great! They achieved goals. Ask: 'That's fantastic! What happened that made it work so well for you?'"
+        else:
+            result["next_state"] = Session4State.CHECK_IN_GOALS
+            result[
+                "context"
+            ] = "Acknowledge briefly. Ask: 'How did achieving those goals go this week?'"
 
-            result["next_state"] = Session4State.REINFORCE_GOAL_FROM_LAST_SESSION
+    def _handle_check_in_goals(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # First time in this state - ask the question
+        if not self._has_asked_question("check_in_goals"):
+            self._mark_question_asked("check_in_goals")
             result[
                 "context"
-            ] = "Acknowledge briefly. Move to reinforcing goals from last session."
-            self._mark_question_asked("greeting")
-
-        # REINFORCE GOAL FROM LAST SESSION
-        elif self.state == Session4State.REINFORCE_GOAL_FROM_LAST_SESSION:
-            # Check if they're already telling us they achieved goals
-            achievement_phrases = [
-                "hit both",
-                "achieved both",
-                "did both",
-                "completed both",
-                "yes",
-                "yup",
-                "yeah",
-                "both",
-                "all",
-            ]
-            if any(phrase in user_lower for phrase in achievement_phrases):
-                self.session_data["goals_achieved"] = True
-                result["next_state"] = Session4State.WHAT_HAPPENED
-                result[
-                    "context"
-                ] = "Great! They achieved goals. Ask: 'That's fantastic! What happened that made it work so well for you?'"
-            else:
-                result["next_state"] = Session4State.CHECK_IN_GOALS
-                result[
-                    "context"
-                ] = "Acknowledge briefly. Ask: 'How did achieving those goals go this week?'"
+            ] = "CRITICAL: Ask EXACTLY: 'How did it go with your goals this past week?'"
+            return
 
-        # CHECK IN GOALS
-        elif self.state == Session4State.CHECK_IN_GOALS:
-            # First time in this state - ask the question
-            if not self._has_asked_question("check_in_goals"):
-                self._mark_question_asked("check_in_goals")
-                result[
-                    "context"
-                ] = "CRITICAL: Ask EXACTLY: 'How did it go with your goals this past week?'"
-                return result
+        # Count how many exchanges in this state
+        check_in_exchange_count = self.session_data.get(
+            "check_in_exchange_count", 0
+        )
+        self.session_data["check_in_exchange_count"] = check_in_exchange_count + 1
 
-            # Count how many exchanges in this state
-            check_in_exchange_count = self.session_data.get(
-                "check_in_exchange_count", 0
-            )
-            self.session_data["check_in_exchange_count"] = check_in_exchange_count + 1
-
-            # Detect if goals were achieved
-            positive_indicators = [
-                "yes",
-                "great",
-                "good",
-                "achieved",
-                "completed",
-                "did it",
-                "success",
-                "both",
-                "all",
-                "accomplished",
-                "hit",
-                "met",
-                "well",
-                "worked",
-                "better",
-            ]
-            negative_indicators = [
-                "no",
-                "not really",
-                "didn't",
-                "couldn't",
-                "failed",
-                "hard",
-                "difficult",
-                "missed",
-                "partially",
-                "one",
-                "only one",
-            ]
+        # Check for explicit statements
+        explicit_yes = bool(_EXPLICIT_YES_RE.search(user_lower))
+        explicit_no = bool(_EXPLICIT_NO_RE.search(user_lower))
 
-            # Check for explicit statements
-            explicit_yes = any(
-                phrase in user_lower
-                for phrase in [
-                    "hit both",
-                    "achieved both",
-                    "did both",
-                    "both goals",
-                    "all goals",
-                ]
-            )
-            explicit_no = any(
-                phrase in user_lower
-                for phrase in ["didn't hit", "missed", "only hit one", "couldn't do"]
-            )
+        has_positive = bool(_POSITIVE_RE.search(user_lower))
+        has_negative = bool(_NEGATIVE_RE.search(user_lower))
 
-            has_positive = any(word in user_lower for word in positive_indicators)
-            has_negative = any(word in user_lower for word in negative_indicators)
+        # Log what we detected
+        self._log_debug(
+            f"Positive indicators: {has_positive}, Negative indicators: {has_negative}"
+        )
+        self._log_debug(f"Explicit yes: {explicit_yes}, Explicit no: {explicit_no}")
 
-            # Log what we detected
-            self._log_debug(
-                f"Positive indicators: {has_positive}, Negative indicators: {has_negative}"
-            )
-            self._log_debug(f"Explicit yes: {explicit_yes}, Explicit no: {explicit_no}")
+        # After 1 exchange, if we have positive indicators, move on
+        if check_in_exchange_count >= 1 and has_positive:
+            self.session_data["goals_achieved"] = True
+            result["next_state"] = Session4State.WHAT_HAPPENED
+            result[
+                "context"
+            ] = "Goals were achieved! Ask: 'What happened that made it work so well for you this week?'"
+        # If they explicitly said they hit goals
+        elif explicit_yes or "hit both" in user_lower:
+            self.session_data["goals_achieved"] = True
+            result["next_state"] = Session4State.WHAT_HAPPENED
+            result[
+                "context"
+            ] = "Goals were achieved! Ask: 'What happened that made it work so well for you this week?'"
+        elif explicit_no:
+            self.session_data["goals_achieved"] = False
+            result["next_state"] = Session4State.STRESS_LEVEL
+            result[
+                "context"
+            ] = "Goals weren't achieved. Ask: 'On a scale of 1-10, what was your stress level this past week?'"
+        elif has_negative and not has_positive:
+            self.session_data["goals_achieved"] = False
+            result["next_state"] = Session4State.STRESS_LEVEL
+            result[
+                "context"
+            ] = "Goals weren't achieved. Ask: 'On a scale of 1-10, what was your stress level this past week?'"
+        elif check_in_exchange_count >= 2:
+            # Force transition after 2 exchanges
+            self.session_data["goals_achieved"] = True
+            result["next_state"] = Session4State.WHAT_HAPPENED
+            result[
+                "context"
+            ] = "Move forward. Ask: 'What helped you stay on track this week?'"
+        else:
+            # One brief follow-up only
+            result[
+                "context"
+            ] = "Acknowledge briefly. Ask one clarifying question about their goals."
 
-            # After 1 exchange, if we have positive indicators, move on
-            if check_in_exchange_count >= 1 and has_positive:
-                self.session_data["goals_achieved"] = True
-                result["next_state"] = Session4State.WHAT_HAPPENED
-                result[
-                    "context"
-                ] = "Goals were achieved! Ask: 'What happened that made it work so well for you this week?'"
-            # If they explicitly said they hit goals
-            elif explicit_yes or "hit both" in user_lower:
-                self.session_data["goals_achieved"] = True
-                result["next_state"] = Session4State.WHAT_HAPPENED
+    def _handle_what_happened(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        self.session_data["what_happened"] = user_input
+        result["next_state"] = Session4State.WHAT_CAN_BE_DONE_TO_MAKE_IT_BETTER
+        result[
+            "context"
+        ] = "Acknowledge their success. Ask what can be done to make things even better."
+
+    def _handle_what_can_be_done_to_make_it_better(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        self.session_data["improvements_discussed"] = True
+
+        # Check if they're describing specific changes/adjustments
+        has_change = bool(_CHANGE_RE.search(user_lower))
+
+        # Check if they want to keep things the same
+        has_keep = bool(_KEEP_RE.search(user_lower))
+
+        if has_change and is_likely_goal(user_input):
+            # They're describing a specific change to their goal
+            self.session_data["path_chosen"] = "current"
+            self.session_data["changes_needed"]["has_changes"] = True
+            self.session_data["changes_needed"]["description"] = user_input
+            result["next_state"] = Session4State.CONFIDENCE_CHECK
+            result[
+                "context"
+            ] = "Acknowledge the change briefly. Ask: 'On a scale of 1-10, how confident are you about achieving this adjusted goal?'"
+        elif has_keep:
+            # They want to keep current goals as-is
+            self.session_data["path_chosen"] = "current"
+            result[
+                "next_state"
+            ] = Session4State.CURRENT_GOALS_ANYTHING_NEEDING_TO_CHANGE
+            result[
+                "context"
+            ] = "They want to continue current goals. Ask: 'Is there anything that needs to change with your current goals, or are you good with keeping them as they are?'"
+        else:
+            # Move to focus selection to clarify
+            result["next_state"] = Session4State.WHATS_THE_FOCUS_TODAY
+            result[
+                "context"
+            ] = "Acknowledged improvements. Ask: 'Would you like to continue working on these same goals, or would you prefer to set new goals for yourself?'"
+
+    def _handle_stress_level(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        stress = extract_number(user_input)
+        if stress and 1 <= stress <= 10:
+            self.session_data["stress_level"] = stress
+            if stress >= 7:
+                result["next_state"] = Session4State.STRESS_HIGH_WHAT_HAPPENED
                 result[
                     "context"
-                ] = "Goals were achieved! Ask: 'What happened that made it work so well for you this week?'"
-            elif explicit_no:
-                self.session_data["goals_achieved"] = False
-                result["next_state"] = Session4State.STRESS_LEVEL
+                ] = f"High stress ({stress}/10). Ask what happened with empathy."
+            else:
+                result["next_state"] = Session4State.STRESS_LOW_WHAT_HAPPENED
                 result[
                     "context"
-                ] = "Goals weren't achieved. Ask: 'On a scale of 1-10, what was your stress level this past week?'"
-            elif has_negative and not has_positive:
-                self.session_data["goals_achieved"] = False
-                result["next_state"] = Session4State.STRESS_LEVEL
+                ] = f"Lower stress ({stress}/10). Ask what happened with their goals."
+            self._mark_question_asked("stress_level")
+        else:
+            result[
+                "context"
+            ] = "Didn't get valid stress level (1-10). Ask: 'On a scale of 1-10, what was your stress level this past week?'"
+
+    def _handle_stress_high_what_happened(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        self.session_data["what_happened"] = user_input
+        result["next_state"] = Session4State.STRESS_HIGH_ANYTHING_WE_CAN_TALK_ABOUT
+        result[
+            "context"
+        ] = "Acknowledge their challenges. Ask if there's anything they'd like to discuss."
+
+    def _handle_stress_high_anything_we_can_talk_about(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        result["next_state"] = Session4State.WHATS_THE_FOCUS_TODAY
+        result["context"] = "Provide support. Move to focus selection."
+
+    def _handle_stress_low_what_happened(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        self.session_data["what_happened"] = user_input
+        result["next_state"] = Session4State.WHATS_THE_FOCUS_TODAY
+        result["context"] = "Acknowledge what happened. Move to focus selection."
+
+    def _handle_whats_the_focus_today(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # First, check if we already chose a path and they're now providing a new goal
+        if self.session_data.get("path_chosen") == "new" and is_likely_goal(
+            user_input
+        ):
+            self.session_data["current_goal"] = user_input
+
+            # Evaluate if SMART
+            smart_result = self.evaluate_smart_goal(user_input)
+            self.session_data["goal_smart_analysis"] = smart_result
+
+            if smart_result["is_smart"]:
+                result["next_state"] = Session4State.SMART_YES_PATH
+                result["context"] = "Goal is SMART. Acknowledge and move forward."
+            else:
+                result["next_state"] = Session4State.SMART_NO_PATH
                 result[
                     "context"
-                ] = "Goals weren't achieved. Ask: 'On a scale of 1-10, what was your stress level this past week?'"
-            elif check_in_exchange_count >= 2:
-                # Force transition after 2 exchanges
-                self.session_data["goals_achieved"] = True
-                result["next_state"] = Session4State.WHAT_HAPPENED
+                ] = f"Goal is not SMART. Missing: {', '.join(smart_result['missing_criteria'])}. Help refine it."
+            return
+
+        # Check if they've already discussed changes (coming from WHAT_CAN_BE_DONE_TO_MAKE_IT_BETTER)
+        # and are now confirming details or providing confidence
+        came_from_improvements = self.session_data.get(
+            "improvements_discussed", False
+        )
+        confidence_num = extract_number(user_input)
+        is_confidence = confidence_num and 0 <= confidence_num <= 10
+
+        # Check if they're confirming goal details (e.g., "2 days seems good")
+        is_confirming = bool(_CONFIRMING_RE.search(user_lower))
+
+        if came_from_improvements and is_confidence:
+            # They gave us confidence after discussing changes - treat as current goals path
+            self.session_data["path_chosen"] = "current"
+            self.session_data["confidence_level"] = confidence_num
+            self.session_data["changes_needed"]["has_changes"] = True
+            self._mark_question_asked("confidence_check")
+
+            if confidence_num < 7:
+                result["next_state"] = Session4State.LOW_CONFIDENCE_WHAT_SUCCESSES
                 result[
                     "context"
-                ] = "Move forward. Ask: 'What helped you stay on track this week?'"
+                ] = f"Confidence noted ({confidence_num}/10). Explore successes to build confidence."
             else:
-                # One brief follow-up only
+                result["next_state"] = Session4State.HIGH_CONFIDENCE_PATH
                 result[
                     "context"
-                ] = "Acknowledge briefly. Ask one clarifying question about their goals."
+                ] = f"High confidence ({confidence_num}/10)! Move forward to tracking."
+            return
 
-        # WHAT HAPPENED (goals achieved path)
-        elif self.state == Session4State.WHAT_HAPPENED:
-            self.session_data["what_happened"] = user_input
-            result["next_state"] = Session4State.WHAT_CAN_BE_DONE_TO_MAKE_IT_BETTER
+        if came_from_improvements and is_confirming:
+            # They're confirming goal details after discussing improvements
+            # Continue the conversation naturally, ask about confidence
             result[
                 "context"
-            ] = "Acknowledge their success. Ask what can be done to make things even better."
-
-        # WHAT CAN BE DONE TO MAKE IT BETTER
-        elif self.state == Session4State.WHAT_CAN_BE_DONE_TO_MAKE_IT_BETTER:
-            self.session_data["improvements_discussed"] = True
-
-            # Check if they're describing specific changes/adjustments
-            change_indicators = [
-                "increase",
-                "decrease",
-                "more",
-                "less",
-                "up",
-                "down",
-                "adjust",
-                "change",
-                "bump",
-                "add",
-                "different",
-            ]
-            has_change = any(word in user_lower for word in change_indicators)
-
-            # Check if they want to keep things the same
-            keep_indicators = [
-                "keep",
-                "same",
-                "continue",
-                "maintaining",
-                "stay",
-                "just keep",
-            ]
-            has_keep = any(phrase in user_lower for phrase in keep_indicators)
+            ] = "Acknowledge their confirmation. Ask: 'On a scale of 1-10, how confident are you feeling about sticking with these goals?'"
+            return
+
+        # Detect if they want to keep current goals or create new ones
+        has_current = bool(_CURRENT_RE.search(user_lower))
+        has_new = bool(_NEW_RE.search(user_lower))
 
-            if has_change and is_likely_goal(user_input):
-                # They're describing a specific change to their goal
-                self.session_data["path_chosen"] = "current"
-                self.session_data["changes_needed"]["has_changes"] = True
-                self.session_data["changes_needed"]["description"] = user_input
+        # Check for phrases that indicate modifying current goals
+        has_modify = bool(_MODIFY_RE.search(user_lower))
+
+        if has_current and not has_new:
+            self.session_data["path_chosen"] = "current"
+            # Don't ask about changes if they already described them in previous state
+            if self.session_data.get("changes_needed", {}).get("description"):
                 result["next_state"] = Session4State.CONFIDENCE_CHECK
                 result[
                     "context"
-                ] = "Acknowledge the change briefly. Ask: 'On a scale of 1-10, how confident are you about achieving this adjusted goal?'"
-            elif has_keep:
-                # They want to keep current goals as-is
-                self.session_data["path_chosen"] = "current"
+                ] = "Confirm the change briefly. Ask: 'On a scale of 1-10, how confident are you about achieving this adjusted goal?'"
+            else:
                 result[
                     "next_state"
                 ] = Session4State.CURRENT_GOALS_ANYTHING_NEEDING_TO_CHANGE
                 result[
                     "context"
-                ] = "They want to continue current goals. Ask: 'Is there anything that needs to change with your current goals, or are you good with keeping them as they are?'"
-            else:
-                # Move to focus selection to clarify
-                result["next_state"] = Session4State.WHATS_THE_FOCUS_TODAY
-                result[
-                    "context"
-                ] = "Acknowledged improvements. Ask: 'Would you like to continue working on these same goals, or would you prefer to set new goals for yourself?'"
-
-        # STRESS LEVEL (goals not achieved path)
-        elif self.state == Session4State.STRESS_LEVEL:
-            stress = extract_number(user_input)
-            if stress and 1 <= stress <= 10:
-                self.session_data["stress_level"] = stress
-                if stress >= 7:
-                    result["next_state"] = Session4State.STRESS_HIGH_WHAT_HAPPENED
-                    result[
-                        "context"
-                    ] = f"High stress ({stress}/10). Ask what happened with empathy."
-                else:
-                    result["next_state"] = Session4State.STRESS_LOW_WHAT_HAPPENED
-                    result[
-                        "context"
-                    ] = f"Lower stress ({stress}/10). Ask what happened with their goals."
-                self._mark_question_asked("stress_level")
-            else:
-                result[
-                    "context"
-                ] = "Didn't get valid stress level (1-10). Ask: 'On a scale of 1-10, what was your stress level this past week?'"
-
-        # STRESS HIGH - WHAT HAPPENED
-        elif self.state == Session4State.STRESS_HIGH_WHAT_HAPPENED:
-            self.session_data["what_happened"] = user_input
-            result["next_state"] = Session4State.STRESS_HIGH_ANYTHING_WE_CAN_TALK_ABOUT
+                ] = "They chose current goals. Ask: 'Is there anything that needs to change with your current goals to help you be successful?'"
+            self._mark_question_asked("focus_selection")
+        elif has_new and not has_current:
+            self.session_data["path_chosen"] = "new"
+            # Don't transition yet - wait for them to provide the goal
             result[
                 "context"
-            ] = "Acknowledge their challenges. Ask if there's anything they'd like to discuss."
-
-        # STRESS HIGH - ANYTHING WE CAN TALK ABOUT
-        elif self.state == Session4State.STRESS_HIGH_ANYTHING_WE_CAN_TALK_ABOUT:
-            result["next_state"] = Session4State.WHATS_THE_FOCUS_TODAY
-            result["context"] = "Provide support. Move to focus selection."
-
-        # STRESS LOW - WHAT HAPPENED
-        elif self.state == Session4State.STRESS_LOW_WHAT_HAPPENED:
-            self.session_data["what_happened"] = user_input
-            result["next_state"] = Session4State.WHATS_THE_FOCUS_TODAY
-            result["context"] = "Acknowledge what happened. Move to focus selection."
-
-        # WHAT'S THE FOCUS TODAY
-        elif self.state == Session4State.WHATS_THE_FOCUS_TODAY:
-            # First, check if we already chose a path and they're now providing a new goal
-            if self.session_data.get("path_chosen") == "new" and is_likely_goal(
-                user_input
-            ):
-                self.session_data["current_goal"] = user_input
+            ] = "They want new goals. Ask: 'What would you like to focus on?'"
+            self._mark_question_asked("focus_selection")
+        elif has_modify or (has_current and has_new):
+            # They want to modify current goals - go to CONFIDENCE_CHECK after confirming
+            self.session_data["path_chosen"] = "current"
+            self.session_data["changes_needed"]["has_changes"] = True
+            self.session_data["changes_needed"]["description"] = user_input
+            result["next_state"] = Session4State.CONFIDENCE_CHECK
+            result[
+                "context"
+            ] = "Acknowledge the adjustment (e.g., 'Adding one more day to 4 days a week sounds great'). Ask: 'On a scale of 1-10, how confident are you about achieving this adjusted goal?'"
+            self._mark_question_asked("focus_selection")
+        else:
+            # Ambiguous - clarify
+            result[
+                "context"
+            ] = "Not clear which path they want. Ask directly: 'Would you like to continue working on your current goals, or would you prefer to set completely new goals?'"
 
-                # Evaluate if SMART
-                smart_result = self.evaluate_smart_goal(user_input)
-                self.session_data["goal_smart_analysis"] = smart_result
+    def _handle_current_goals_anything_needing_to_change(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # First time: ask the question
+        if not self._has_asked_question("anything_to_change"):
+            self._mark_question_asked("anything_to_change")
+            result[
+                "context"
+            ] = "CRITICAL: Ask EXACTLY: 'Is there anything that needs to change with your current goals to help you be successful?'"
+            return
 
-                if smart_result["is_smart"]:
-                    result["next_state"] = Session4State.SMART_YES_PATH
-                    result["context"] = "Goal is SMART. Acknowledge and move forward."
-                else:
-                    result["next_state"] = Session4State.SMART_NO_PATH
-                    result[
-                        "context"
-                    ] = f"Goal is not SMART. Missing: {', '.join(smart_result['missing_criteria'])}. Help refine it."
-                return result
+        # Count exchanges
+        change_discussion_count = self.session_data.get(
+            "change_discussion_count", 0
+        )
+        self.session_data["change_discussion_count"] = change_discussion_count + 1
 
-            # Check if they've already discussed changes (coming from WHAT_CAN_BE_DONE_TO_MAKE_IT_BETTER)
-            # and are now confirming details or providing confidence
-            came_from_improvements = self.session_data.get(
-                "improvements_discussed", False
-            )
-            confidence_num = extract_number(user_input)
-            is_confidence = confidence_num and 0 <= confidence_num <= 10
-
-            # Check if they're confirming goal details (e.g., "2 days seems good")
-            confirming_indicators = [
-                "good",
-                "fine",
-                "yes",
-                "perfect",
-                "right",
-                "correct",
-                "keep",
-                "stay",
-            ]
-            is_confirming = any(word in user_lower for word in confirming_indicators)
+        # Check if they've said no changes
+        has_no_change = bool(_NO_CHANGE_RE.search(user_lower))
 
-            if came_from_improvements and is_confidence:
-                # They gave us confidence after discussing changes - treat as current goals path
-                self.session_data["path_chosen"] = "current"
-                self.session_data["confidence_level"] = confidence_num
-                self.session_data["changes_needed"]["has_changes"] = True
-                self._mark_question_asked("confidence_check")
+        # Check for change indicators
+        has_change = bool(_WANTS_CHANGE_RE.search(user_lower))
 
-                if confidence_num < 7:
-                    result["next_state"] = Session4State.LOW_CONFIDENCE_WHAT_SUCCESSES
-                    result[
-                        "context"
-                    ] = f"Confidence noted ({confidence_num}/10). Explore successes to build confidence."
-                else:
-                    result["next_state"] = Session4State.HIGH_CONFIDENCE_PATH
-                    result[
-                        "context"
-                    ] = f"High confidence ({confidence_num}/10)! Move forward to tracking."
-                return result
+        # Force transition immediately - don't ask any more questions
+        self.session_data["changes_needed"]["has_changes"] = has_change
+        result["next_state"] = Session4State.CONFIDENCE_CHECK
+        result[
+            "context"
+        ] = "CRITICAL: Acknowledge briefly (1 sentence max, NO questions). Immediately transition to confidence check. DO NOT ask about confidence here."
 
-            if came_from_improvements and is_confirming:
-                # They're confirming goal details after discussing improvements
-                # Continue the conversation naturally, ask about confidence
+    def _handle_smart_yes_path(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Add to new goals
+        if self.session_data.get("current_goal"):
+            self.session_data["new_goals"].append(self.session_data["current_goal"])
+            self.session_data[
+                "current_goal"
+            ] = None  # Clear for next potential goal
+
+        result["next_state"] = Session4State.CONFIDENCE_CHECK
+        result[
+            "context"
+        ] = "Goal accepted and is SMART. Acknowledge briefly. Move to confidence check."
+
+    def _handle_smart_no_path(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Check if they refined the goal
+        if is_likely_goal(user_input):
+            prev_goal = self.session_data["current_goal"]
+            self.session_data["current_goal"] = user_input
+            self.session_data["smart_refinement_attempts"] += 1
+
+            # Re-evaluate
+            smart_result = self._evaluate_refined_goal(prev_goal, user_input)
+            self.session_data["goal_smart_analysis"] = smart_result
+
+            if (
+                smart_result["is_smart"]
+                or self.session_data["smart_refinement_attempts"] >= 3
+            ):
+                # Accept after 3 attempts or if now SMART
+                self.session_data["new_goals"].append(user_input)
+                self.session_data["current_goal"] = None
+                result["next_state"] = Session4State.CONFIDENCE_CHECK
                 result[
                     "context"
-                ] = "Acknowledge their confirmation. Ask: 'On a scale of 1-10, how confident are you feeling about sticking with these goals?'"
-                return result
-
-            # Detect if they want to keep current goals or create new ones
-            current_indicators = [
-                "current",
-                "same",
-                "keep",
-                "continue",
-                "existing",
-                "maintaining",
-                "focus",
-                "working",
-            ]
-            new_indicators = ["new", "different", "something else"]
-
-            has_current = any(word in user_lower for word in current_indicators)
-            has_new = any(word in user_lower for word in new_indicators)
-
-            # Check for phrases that indicate modifying current goals
-            modify_indicators = [
-                "challenge",
-                "more",
-                "increase",
-                "add",
-                "adjust",
-                "bump",
-                "up",
-                "raise",
-            ]
-            has_modify = any(word in user_lower for word in modify_indicators)
-
-            if has_current and not has_new:
-                self.session_data["path_chosen"] = "current"
-                # Don't ask about changes if they already described them in previous state
-                if self.session_data.get("changes_needed", {}).get("description"):
-                    result["next_state"] = Session4State.CONFIDENCE_CHECK
-                    result[
-                        "context"
-                    ] = "Confirm the change briefly. Ask: 'On a scale of 1-10, how confident are you about achieving this adjusted goal?'"
-                else:
-                    result[
-                        "next_state"
-                    ] = Session4State.CURRENT_GOALS_ANYTHING_NEEDING_TO_CHANGE
-                    result[
-                        "context"
-                    ] = "They chose current goals. Ask: 'Is there anything that needs to change with your current goals to help you be successful?'"
-                self._mark_question_asked("focus_selection")
-            elif has_new and not has_current:
-                self.session_data["path_chosen"] = "new"
-                # Don't transition yet - wait for them to provide the goal
+                ] = "Goal refined and accepted. Move to confidence check."
+            else:
                 result[
                     "context"
-                ] = "They want new goals. Ask: 'What would you like to focus on?'"
-                self._mark_question_asked("focus_selection")
-            elif has_modify or (has_current and has_new):
-                # They want to modify current goals - go to CONFIDENCE_CHECK after confirming
-                self.session_data["path_chosen"] = "current"
-                self.session_data["changes_needed"]["has_changes"] = True
-                self.session_data["changes_needed"]["description"] = user_input
-                result["next_state"] = Session4State.CONFIDENCE_CHECK
+                ] = f"Still needs work. Missing: {', '.join(smart_result['missing_criteria'])}. Help refine with specific questions."
+        else:
+            result[
+                "context"
+            ] = "Encourage them to refine their goal. Ask specific questions about what's missing to make it SMART."
+
+    def _handle_confidence_check(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # First time: ask the confidence question
+        if not self._has_asked_question("confidence_check"):
+            self._mark_question_asked("confidence_check")
+            result[
+                "context"
+            ] = "CRITICAL: Ask EXACTLY: 'On a scale of 1-10, how confident are you about achieving this goal?'"
+            return
+
+        # They answered - extract confidence
+        confidence = extract_number(user_input)
+        if confidence and 1 <= confidence <= 10:
+            self.session_data["confidence_level"] = confidence
+            if confidence < 7:
+                result["next_state"] = Session4State.LOW_CONFIDENCE_WHAT_SUCCESSES
                 result[
                     "context"
-                ] = "Acknowledge the adjustment (e.g., 'Adding one more day to 4 days a week sounds great'). Ask: 'On a scale of 1-10, how confident are you about achieving this adjusted goal?'"
-                self._mark_question_asked("focus_selection")
+                ] = f"Low confidence ({confidence}/10). Explore successes."
             else:
-                # Ambiguous - clarify
+                result["next_state"] = Session4State.HIGH_CONFIDENCE_PATH
                 result[
                     "context"
-                ] = "Not clear which path they want. Ask directly: 'Would you like to continue working on your current goals, or would you prefer to set completely new goals?'"
+                ] = f"Good confidence ({confidence}/10). Acknowledge briefly and move forward to future planning."
+        else:
+            # Didn't get valid number - ask again
+            result[
+                "context"
+            ] = "CRITICAL: Didn't get valid confidence (1-10). Ask EXACTLY: 'On a scale of 1-10, how confident are you about achieving this goal?'"
 
-        # CURRENT GOALS - ANYTHING NEEDING TO CHANGE
-        elif self.state == Session4State.CURRENT_GOALS_ANYTHING_NEEDING_TO_CHANGE:
-            # First time: ask the question
-            if not self._has_asked_question("anything_to_change"):
-                self._mark_question_asked("anything_to_change")
-                result[
-                    "context"
-                ] = "CRITICAL: Ask EXACTLY: 'Is there anything that needs to change with your current goals to help you be successful?'"
-                return result
+    def _handle_low_confidence_what_successes(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Check if they just gave us a confidence number (shouldn't happen but handle it)
+        confidence_num = extract_number(user_input)
+        if confidence_num and 1 <= confidence_num <= 10:
+            self.session_data["confidence_level"] = confidence_num
+            if confidence_num >= 7:
+                # Actually high confidence - go to high confidence path
+                result["next_state"] = Session4State.HIGH_CONFIDENCE_PATH
+                result["context"] = "High confidence! Transition to tracking."
+                return
+
+        # First time: ask about successes
+        if not self._has_asked_question("what_successes"):
+            self._mark_question_asked("what_successes")
+            result[
+                "context"
+            ] = "Low confidence. Ask: 'What successes have you had so far, even small ones, that show you can do this?'"
+            return
 
-            # Count exchanges
-            change_discussion_count = self.session_data.get(
-                "change_discussion_count", 0
-            )
-            self.session_data["change_discussion_count"] = change_discussion_count + 1
-
-            # Check if they've said no changes
-            no_change_indicators = [
-                "no",
-                "same",
-                "keep",
-                "good",
-                "fine",
-                "ready",
-                "nothing",
-                "as is",
-                "habit",
-                "confident",
-            ]
-            has_no_change = any(word in user_lower for word in no_change_indicators)
-
-            # Check for change indicators
-            change_indicators = [
-                "yes",
-                "change",
-                "adjust",
-                "modify",
-                "increase",
-                "decrease",
-                "more",
-                "less",
-            ]
-            has_change = any(word in user_lower for word in change_indicators)
+        # Track how many exchanges we've had
+        success_discussion_count = self.session_data.get(
+            "success_discussion_count", 0
+        )
+        self.session_data["success_discussion_count"] = success_discussion_count + 1
 
-            # Force transition immediately - don't ask any more questions
-            self.session_data["changes_needed"]["has_changes"] = has_change
-            result["next_state"] = Session4State.CONFIDENCE_CHECK
+        # After 1-2 exchanges, transition to making goal more achievable
+        if success_discussion_count >= 1:
+            result[
+                "next_state"
+            ] = Session4State.LOW_CONFIDENCE_HOW_CAN_WE_MAKE_IT_MORE_ACHIEVABLE
+            result[
+                "context"
+            ] = "Acknowledged their successes and support. Ask: 'How can we adjust your goal to make it feel more achievable? Would scaling it back help build your confidence?'"
+        else:
+            # One more brief follow-up about support
             result[
                 "context"
-            ] = "CRITICAL: Acknowledge briefly (1 sentence max, NO questions). Immediately transition to confidence check. DO NOT ask about confidence here."
+            ] = "Briefly acknowledge. Ask one more question about their support system or what's helped them succeed before."
 
-        # NEW GOALS - SMART YES PATH
-        elif self.state == Session4State.SMART_YES_PATH:
-            # Add to new goals
-            if self.session_data.get("current_goal"):
-                self.session_data["new_goals"].append(self.session_data["current_goal"])
-                self.session_data[
-                    "current_goal"
-                ] = None  # Clear for next potential goal
+    def _handle_low_confidence_how_can_we_make_it_more_achievable(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Track how many exchanges
+        achievable_discussion_count = self.session_data.get(
+            "achievable_discussion_count", 0
+        )
+        self.session_data["achievable_discussion_count"] = (
+            achievable_discussion_count + 1
+        )
 
-            result["next_state"] = Session4State.CONFIDENCE_CHECK
+        # After 1-2 exchanges, move to future planning
+        if achievable_discussion_count >= 1:
+            result[
+                "next_state"
+            ] = Session4State.HOW_WILL_YOU_REMEMBER_TO_DO_YOUR_GOAL
             result[
                 "context"
-            ] = "Goal accepted and is SMART. Acknowledge briefly. Move to confidence check."
-
-        # NEW GOALS - SMART NO PATH
-        elif self.state == Session4State.SMART_NO_PATH:
-            # Check if they refined the goal
-            if is_likely_goal(user_input):
-                self.session_data["current_goal"] = user_input
-                self.session_data["smart_refinement_attempts"] += 1
-
-                # Re-evaluate
-                smart_result = self.evaluate_smart_goal(user_input)
-                self.session_data["goal_smart_analysis"] = smart_result
-
-                if (
-                    smart_result["is_smart"]
-                    or self.session_data["smart_refinement_attempts"] >= 3
-                ):
-                    # Accept after 3 attempts or if now SMART
-                    self.session_data["new_goals"].append(user_input)
-                    self.session_data["current_goal"] = None
-                    result["next_state"] = Session4State.CONFIDENCE_CHECK
+            ] = "Acknowledged adjustments. Move to future planning questions."
+        else:
+            result[
+                "context"
+            ] = "Help them think through adjustments. Keep it brief - one more exchange max."
+
+    def _handle_high_confidence_path(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # This state immediately transitions without generating a response
+        # Just set the next state and let HOW_WILL_YOU_REMEMBER ask the first question
+        result["next_state"] = Session4State.HOW_WILL_YOU_REMEMBER_TO_DO_YOUR_GOAL
+        result[
+            "context"
+        ] = "Brief acknowledgment of confidence (1 sentence max, NO questions). Immediately transition."
+        # The actual question will be asked by HOW_WILL_YOU_REMEMBER state
+
+    def _handle_how_will_you_remember_to_do_your_goal(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Track which future planning question we're on
+        future_planning_stage = self.session_data.get("future_planning_stage", 0)
+        self._log_debug(f"Future planning stage: {future_planning_stage}")
+
+        if future_planning_stage == 0:
+            # First question: How will you remember
+            if not self._has_asked_question("tracking_method"):
+                self._mark_question_asked("tracking_method")
+                self._log_debug("Asking tracking method question (stage 0)")
+                # Check if we just transitioned from HIGH_CONFIDENCE_PATH
+                came_from_confidence = (
+                    self.session_data.get("confidence_level")
+                    and self.session_data.get("confidence_level") >= 7
+                )
+                if came_from_confidence and self.session_data["turn_count"] > 0:
                     result[
                         "context"
-                    ] = "Goal refined and accepted. Move to confidence check."
+                    ] = "CRITICAL: Acknowledge high confidence briefly (1 sentence). Then ask EXACTLY: 'How will you remember to work on these goals?'"
                 else:
                     result[
                         "context"
-                    ] = f"Still needs work. Missing: {', '.join(smart_result['missing_criteria'])}. Help refine with specific questions."
+                    ] = "CRITICAL: Ask EXACTLY: 'How will you remember to work on these goals?'"
+                return
             else:
+                # They answered - save and move to next stage
+                self._log_debug("Saving tracking method, moving to stage 1")
+                self.session_data["tracking_method"] = user_input
+                self.session_data["future_planning_stage"] = 1
                 result[
                     "context"
-                ] = "Encourage them to refine their goal. Ask specific questions about what's missing to make it SMART."
+                ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'What skills have you learned during our sessions that will help you maintain your health in the future?'"
+                return
 
-        # CONFIDENCE CHECK
-        elif self.state == Session4State.CONFIDENCE_CHECK:
-            # First time: ask the confidence question
-            if not self._has_asked_question("confidence_check"):
-                self._mark_question_asked("confidence_check")
+        elif future_planning_stage == 1:
+            # Skills learned question
+            if not self._has_asked_question("skills_learned"):
+                self._mark_question_asked("skills_learned")
                 result[
                     "context"
-                ] = "CRITICAL: Ask EXACTLY: 'On a scale of 1-10, how confident are you about achieving this goal?'"
-                return result
-
-            # They answered - extract confidence
-            confidence = extract_number(user_input)
-            if confidence and 1 <= confidence <= 10:
-                self.session_data["confidence_level"] = confidence
-                if confidence < 7:
-                    result["next_state"] = Session4State.LOW_CONFIDENCE_WHAT_SUCCESSES
-                    result[
-                        "context"
-                    ] = f"Low confidence ({confidence}/10). Explore successes."
-                else:
-                    result["next_state"] = Session4State.HIGH_CONFIDENCE_PATH
-                    result[
-                        "context"
-                    ] = f"Good confidence ({confidence}/10). Acknowledge briefly and move forward to future planning."
+                ] = "CRITICAL: Ask EXACTLY: 'What skills have you learned that will help you maintain your health in the future?'"
+                return
             else:
-                # Didn't get valid number - ask again
-                result[
-                    "context"
-                ] = "CRITICAL: Didn't get valid confidence (1-10). Ask EXACTLY: 'On a scale of 1-10, how confident are you about achieving this goal?'"
-
-        # LOW CONFIDENCE - WHAT SUCCESSES
-        elif self.state == Session4State.LOW_CONFIDENCE_WHAT_SUCCESSES:
-            # Check if they just gave us a confidence number (shouldn't happen but handle it)
-            confidence_num = extract_number(user_input)
-            if confidence_num and 1 <= confidence_num <= 10:
-                self.session_data["confidence_level"] = confidence_num
-                if confidence_num >= 7:
-                    # Actually high confidence - go to high confidence path
-                    result["next_state"] = Session4State.HIGH_CONFIDENCE_PATH
-                    result["context"] = "High confidence! Transition to tracking."
-                    return result
-
-            # First time: ask about successes
-            if not self._has_asked_question("what_successes"):
-                self._mark_question_asked("what_successes")
+                # They answered - save and move to next stage
+                self.session_data["skills_learned"] = user_input
+                self.session_data["future_planning_stage"] = 2
                 result[
                     "context"
-                ] = "Low confidence. Ask: 'What successes have you had so far, even small ones, that show you can do this?'"
-                return result
+                ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'What did you learn from this experience?'"
+                return
 
-            # Track how many exchanges we've had
-            success_discussion_count = self.session_data.get(
-                "success_discussion_count", 0
-            )
-            self.session_data["success_discussion_count"] = success_discussion_count + 1
-
-            # After 1-2 exchanges, transition to making goal more achievable
-            if success_discussion_count >= 1:
-                result[
-                    "next_state"
-                ] = Session4State.LOW_CONFIDENCE_HOW_CAN_WE_MAKE_IT_MORE_ACHIEVABLE
+        elif future_planning_stage == 2:
+            # What did you learn question
+            if not self._has_asked_question("what_learned"):
+                self._mark_question_asked("what_learned")
                 result[
                     "context"
-                ] = "Acknowledged their successes and support. Ask: 'How can we adjust your goal to make it feel more achievable? Would scaling it back help build your confidence?'"
+                ] = "CRITICAL: Ask EXACTLY: 'What did you learn from this experience?'"
+                return
             else:
-                # One more brief follow-up about support
+                # They answered - save and move to next stage
+                self.session_data["what_learned"] = user_input
+                self.session_data["future_planning_stage"] = 3
                 result[
                     "context"
-                ] = "Briefly acknowledge. Ask one more question about their support system or what's helped them succeed before."
-
-        # LOW CONFIDENCE - HOW TO MAKE MORE ACHIEVABLE
-        elif (
-            self.state
-            == Session4State.LOW_CONFIDENCE_HOW_CAN_WE_MAKE_IT_MORE_ACHIEVABLE
-        ):
-            # Track how many exchanges
-            achievable_discussion_count = self.session_data.get(
-                "achievable_discussion_count", 0
-            )
-            self.session_data["achievable_discussion_count"] = (
-                achievable_discussion_count + 1
-            )
+                ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'In six months, how would you like to see your health improved?'"
+                return
 
-            # After 1-2 exchanges, move to future planning
-            if achievable_discussion_count >= 1:
-                result[
-                    "next_state"
-                ] = Session4State.HOW_WILL_YOU_REMEMBER_TO_DO_YOUR_GOAL
+        elif future_planning_stage == 3:
+            # 6-month vision question
+            if not self._has_asked_question("six_month_vision"):
+                self._mark_question_asked("six_month_vision")
                 result[
                     "context"
-                ] = "Acknowledged adjustments. Move to future planning questions."
+                ] = "CRITICAL: Ask EXACTLY: 'In six months, how would you like to see your health improved?'"
+                return
             else:
+                # They answered - save and move to next stage
+                self.session_data["six_month_vision"] = user_input
+                self.session_data["future_planning_stage"] = 4
                 result[
                     "context"
-                ] = "Help them think through adjustments. Keep it brief - one more exchange max."
-
-        # HIGH CONFIDENCE PATH
-        elif self.state == Session4State.HIGH_CONFIDENCE_PATH:
-            # This state immediately transitions without generating a response
-            # Just set the next state and let HOW_WILL_YOU_REMEMBER ask the first question
-            result["next_state"] = Session4State.HOW_WILL_YOU_REMEMBER_TO_DO_YOUR_GOAL
-            result[
-                "context"
-            ] = "Brief acknowledgment of confidence (1 sentence max, NO questions). Immediately transition."
-            # The actual question will be asked by HOW_WILL_YOU_REMEMBER state
-
-        # HOW WILL YOU REMEMBER TO DO YOUR GOAL (with future planning)
-        elif self.state == Session4State.HOW_WILL_YOU_REMEMBER_TO_DO_YOUR_GOAL:
-            # Track which future planning question we're on
-            future_planning_stage = self.session_data.get("future_planning_stage", 0)
-            self._log_debug(f"Future planning stage: {future_planning_stage}")
-
-            if future_planning_stage == 0:
-                # First question: How will you remember
-                if not self._has_asked_question("tracking_method"):
-                    self._mark_question_asked("tracking_method")
-                    self._log_debug("Asking tracking method question (stage 0)")
-                    # Check if we just transitioned from HIGH_CONFIDENCE_PATH
-                    came_from_confidence = (
-                        self.session_data.get("confidence_level")
-                        and self.session_data.get("confidence_level") >= 7
-                    )
-                    if came_from_confidence and self.session_data["turn_count"] > 0:
-                        result[
-                            "context"
-                        ] = "CRITICAL: Acknowledge high confidence briefly (1 sentence). Then ask EXACTLY: 'How will you remember to work on these goals?'"
-                    else:
-                        result[
-                            "context"
-                        ] = "CRITICAL: Ask EXACTLY: 'How will you remember to work on these goals?'"
-                    return result
-                else:
-                    # They answered - save and move to next stage
-                    self._log_debug("Saving tracking method, moving to stage 1")
-                    self.session_data["tracking_method"] = user_input
-                    self.session_data["future_planning_stage"] = 1
-                    result[
-                        "context"
-                    ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'What skills have you learned during our sessions that will help you maintain your health in the future?'"
-                    return result
-
-            elif future_planning_stage == 1:
-                # Skills learned question
-                if not self._has_asked_question("skills_learned"):
-                    self._mark_question_asked("skills_learned")
-                    result[
-                        "context"
-                    ] = "CRITICAL: Ask EXACTLY: 'What skills have you learned that will help you maintain your health in the future?'"
-                    return result
-                else:
-                    # They answered - save and move to next stage
-                    self.session_data["skills_learned"] = user_input
-                    self.session_data["future_planning_stage"] = 2
-                    result[
-                        "context"
-                    ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'What did you learn from this experience?'"
-                    return result
-
-            elif future_planning_stage == 2:
-                # What did you learn question
-                if not self._has_asked_question("what_learned"):
-                    self._mark_question_asked("what_learned")
-                    result[
-                        "context"
-                    ] = "CRITICAL: Ask EXACTLY: 'What did you learn from this experience?'"
-                    return result
-                else:
-                    # They answered - save and move to next stage
-                    self.session_data["what_learned"] = user_input
-                    self.session_data["future_planning_stage"] = 3
-                    result[
-                        "context"
-                    ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'In six months, how would you like to see your health improved?'"
-                    return result
-
-            elif future_planning_stage == 3:
-                # 6-month vision question
-                if not self._has_asked_question("six_month_vision"):
-                    self._mark_question_asked("six_month_vision")
-                    result[
-                        "context"
-                    ] = "CRITICAL: Ask EXACTLY: 'In six months, how would you like to see your health improved?'"
-                    return result
-                else:
-                    # They answered - save and move to next stage
-                    self.session_data["six_month_vision"] = user_input
-                    self.session_data["future_planning_stage"] = 4
-                    result[
-                        "context"
-                    ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'What steps will you take to get there?'"
-                    return result
-
-            elif future_planning_stage == 4:
-                # Steps to get there question
-                if not self._has_asked_question("steps_to_vision"):
-                    self._mark_question_asked("steps_to_vision")
-                    result[
-                        "context"
-                    ] = "CRITICAL: Ask EXACTLY: 'What steps will you take to get there?'"
-                    return result
-                else:
-                    # They answered - save and move to next stage
-                    self.session_data["steps_to_vision"] = user_input
-                    self.session_data["future_planning_stage"] = 5
-                    result[
-                        "context"
-                    ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'What goal would you like to set and focus on over the next 6 months?'"
-                    return result
-
-            elif future_planning_stage == 5:
-                # 6-month goal question
-                if not self._has_asked_question("six_month_goal"):
-                    self._mark_question_asked("six_month_goal")
-                    result[
-                        "context"
-                    ] = "CRITICAL: Ask EXACTLY: 'What goal would you like to set and focus on over the next 6 months?'"
-                    return result
-                else:
-                    # They answered - save and move to next stage
-                    self.session_data["six_month_goal"] = user_input
-                    self.session_data["future_planning_stage"] = 6
-                    result[
-                        "context"
-                    ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'Beyond 6 months, how will you incorporate SMART goal setting and problem-solving skills to improve your health and lifestyle?'"
-                    return result
+                ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'What steps will you take to get there?'"
+                return
 
-            elif future_planning_stage == 6:
-                # Final long-term question
-                if not self._has_asked_question("long_term_smart_goals"):
-                    self._mark_question_asked("long_term_smart_goals")
-                    result[
-                        "context"
-                    ] = "CRITICAL: Ask EXACTLY: 'Beyond 6 months, how will you incorporate SMART goal setting and problem-solving skills to improve your health and lifestyle?'"
-                    return result
-                else:
-                    # They answered - all future planning complete, move to final questions
-                    self.session_data["long_term_smart_goals"] = user_input
-                    result["next_state"] = Session4State.ANY_FINAL_QUESTIONS
-                    result[
-                        "context"
-                    ] = "CRITICAL: Acknowledge briefly (1-2 sentences). Then ask EXACTLY: 'Do you have any final questions before we wrap up?'"
-                    return result
-
-        # ANY FINAL QUESTIONS
-        elif self.state == Session4State.ANY_FINAL_QUESTIONS:
-            # Check if we've asked the question yet
-            if not self._has_asked_question("final_questions"):
-                self._mark_question_asked("final_questions")
+        elif future_planning_stage == 4:
+            # Steps to get there question
+            if not self._has_asked_question("steps_to_vision"):
+                self._mark_question_asked("steps_to_vision")
                 result[
                     "context"
-                ] = "Ask: 'Do you have any final questions or anything else you'd like to discuss before we end?'"
-                return result
-
-            # Check if the last coach response contained a question
-            last_response = self.session_data.get("last_coach_response", "")
-            has_question_in_last_response = "?" in last_response
-
-            # Check for goodbye/ending indicators
-            goodbye_indicators = ["bye", "goodbye", "thank you", "thanks", "see you"]
-            has_goodbye = any(word in user_lower for word in goodbye_indicators)
-
-            if has_question_in_last_response and not has_goodbye:
-                # Last response had a question - don't end yet, let them answer
+                ] = "CRITICAL: Ask EXACTLY: 'What steps will you take to get there?'"
+                return
+            else:
+                # They answered - save and move to next stage
+                self.session_data["steps_to_vision"] = user_input
+                self.session_data["future_planning_stage"] = 5
                 result[
                     "context"
-                ] = "Continue the conversation naturally. Answer their response and provide closure when appropriate."
-                return result
+                ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'What goal would you like to set and focus on over the next 6 months?'"
+                return
 
-            if check_negative(user_input) or "no" in user_lower:
-                # They said no - confirm before ending
-                result["next_state"] = Session4State.CONFIRM_END_SESSION
-                result[
-                    "context"
-                ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
-            elif has_goodbye:
-                # They're already saying goodbye - confirm before ending
-                result["next_state"] = Session4State.CONFIRM_END_SESSION
+        elif future_planning_stage == 5:
+            # 6-month goal question
+            if not self._has_asked_question("six_month_goal"):
+                self._mark_question_asked("six_month_goal")
                 result[
                     "context"
-                ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
+                ] = "CRITICAL: Ask EXACTLY: 'What goal would you like to set and focus on over the next 6 months?'"
+                return
             else:
-                # They have a question - answer it, then ask if there's anything else
+                # They answered - save and move to next stage
+                self.session_data["six_month_goal"] = user_input
+                self.session_data["future_planning_stage"] = 6
                 result[
                     "context"
-                ] = "Answer their question thoughtfully, then ask: 'Is there anything else before we finish?'"
-
-        elif self.state == Session4State.CONFIRM_END_SESSION:
-            # Check if user actually wants to end
-            user_done = any(
-                phrase in user_lower
-                for phrase in [
-                    "yes",
-                    "yeah",
-                    "yep",
-                    "sure",
-                    "no",
-                    "nope",
-                    "nah",
-                    "i'm good",
-                    "im good",
-                    "that's all",
-                    "thats all",
-                    "nothing else",
-                    "all set",
-                    "bye",
-                    "goodbye",
-                    "see you",
-                    "thanks",
-                    "thank you",
-                    "take care",
-                ]
-            )
+                ] = "CRITICAL: Acknowledge in exactly 1 sentence. Then ask EXACTLY: 'Beyond 6 months, how will you incorporate SMART goal setting and problem-solving skills to improve your health and lifestyle?'"
+                return
 
-            if user_done:
-                result["next_state"] = Session4State.END_SESSION
-                self.session_data["final_goodbye_given"] = True
+        elif future_planning_stage == 6:
+            # Final long-term question
+            if not self._has_asked_question("long_term_smart_goals"):
+                self._mark_question_asked("long_term_smart_goals")
                 result[
                     "context"
-                ] = "User confirmed they're done. Give warm final goodbye. Confirm next session is in 1 week."
+                ] = "CRITICAL: Ask EXACTLY: 'Beyond 6 months, how will you incorporate SMART goal setting and problem-solving skills to improve your health and lifestyle?'"
+                return
             else:
-                # User still has something to discuss - go back to active conversation
+                # They answered - all future planning complete, move to final questions
+                self.session_data["long_term_smart_goals"] = user_input
                 result["next_state"] = Session4State.ANY_FINAL_QUESTIONS
                 result[
                     "context"
-                ] = f"User said: '{user_input}' - they're not done yet. Address what they said and continue the conversation naturally."
-            result["trigger_rag"] = True
+                ] = "CRITICAL: Acknowledge briefly (1-2 sentences). Then ask EXACTLY: 'Do you have any final questions before we wrap up?'"
+                return
 
-        # END SESSION
-        elif self.state == Session4State.END_SESSION:
-            # Session is complete - no more meaningful responses
-            result["trigger_rag"] = False
-            if self.session_data.get("final_goodbye_given"):
-                # Already gave goodbye - just acknowledge very briefly if they say anything
-                result[
-                    "context"
-                ] = "Session complete. Very brief acknowledgment only (e.g., 'Bye, Jade' or 'Take care'). Maximum 2 words."
-            else:
-                # First time entering END_SESSION - give final goodbye
-                self.session_data["final_goodbye_given"] = True
-                result[
-                    "context"
-                ] = "Give the final farewell. This is the end of all 4 sessions. Warm, brief (2-3 sentences), and truly final."
+    def _handle_any_final_questions(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Check if we've asked the question yet
+        if not self._has_asked_question("final_questions"):
+            self._mark_question_asked("final_questions")
+            result[
+                "context"
+            ] = "Ask: 'Do you have any final questions or anything else you'd like to discuss before we end?'"
+            return
 
-        if result["next_state"]:
-            self._log_debug(f"Next state will be: {result['next_state'].value}")
+        # Check if the last coach response contained a question
+        last_response = self.session_data.get("last_coach_response", "")
+        has_question_in_last_response = "?" in last_response
 
-        return result
+        # Check for goodbye/ending indicators
+        has_goodbye = bool(_GOODBYE_RE.search(user_lower))
+
+        if has_question_in_last_response and not has_goodbye:
+            # Last response had a question - don't end yet, let them answer
+            result[
+                "context"
+            ] = "Continue the conversation naturally. Answer their response and provide closure when appropriate."
+            return
+
+        if check_negative(user_input) or "no" in user_lower:
+            # They said no - confirm before ending
+            result["next_state"] = Session4State.CONFIRM_END_SESSION
+            result[
+                "context"
+            ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
+        elif has_goodbye:
+            # They're already saying goodbye - confirm before ending
+            result["next_state"] = Session4State.CONFIRM_END_SESSION
+            result[
+                "context"
+            ] = "Before ending, ask the user: 'Is there anything else you'd like to talk about before we wrap up?' Be warm and genuine."
+        else:
+            # They have a question - answer it, then ask if there's anything else
+            result[
+                "context"
+            ] = "Answer their question thoughtfully, then ask: 'Is there anything else before we finish?'"
+
+    def _handle_confirm_end_session(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Check if user actually wants to end
+        user_done = bool(_USER_DONE_RE.search(user_lower))
+
+        if user_done:
+            result["next_state"] = Session4State.END_SESSION
+            self.session_data["final_goodbye_given"] = True
+            result[
+                "context"
+            ] = "User confirmed they're done. Give warm final goodbye. Confirm next session is in 1 week."
+        else:
+            # User still has something to discuss - go back to active conversation
+            result["next_state"] = Session4State.ANY_FINAL_QUESTIONS
+            result[
+                "context"
+            ] = f"User said: '{user_input}' - they're not done yet. Address what they said and continue the conversation naturally."
+        result["trigger_rag"] = True
+
+    def _handle_end_session(
+        self, user_input: str, user_lower: str, result: Dict[str, Any]
+    ):
+        # Session is complete - no more meaningful responses
+        result["trigger_rag"] = False
+        if self.session_data.get("final_goodbye_given"):
+            # Already gave goodbye - just acknowledge very briefly if they say anything
+            result[
+                "context"
+            ] = "Session complete. Very brief acknowledgment only (e.g., 'Bye, Jade' or 'Take care'). Maximum 2 words."
+        else:
+            # First time entering END_SESSION - give final goodbye
+            self.session_data["final_goodbye_given"] = True
+            result[
+                "context"
+            ] = "Give the final farewell. This is the end of all 4 sessions. Warm, brief (2-3 sentences), and truly final."
 
     def get_system_prompt_addition(self) -> str:
         """Get state-specific system prompt additions"""
-        return get_session4_prompt(
-            state_value=self.state.value, session_data=self.session_data
-        )
+        if self._prompt_state is not self.state:
+            # Select the state's template once per state change, not every turn
+            self._prompt_state = self.state
+            self._render_state_prompt = session4_prompt_renderer(self.state.value)
+        return self._render_state_prompt(self.session_data)
 
     def get_session_summary(self) -> Dict[str, Any]:
-        """Get summary of session data"""
-        return {
-            "current_state": self.state.value,
-            "session_data": self.session_data,
-            "duration_turns": self.session_data["turn_count"],
-        }
+        """
+        Get summary of session data. The same dict is refreshed and returned
+        on every call, so read it rather than keeping or mutating it;
+        its session_data is a read-only view of the live session data.
+        """
+        summary = self._summary
+        summary["current_state"] = self.state.value
+        summary["session_data"] = MappingProxyType(self.session_data)
+        summary["duration_turns"] = self.session_data["turn_count"]
+        return summary
+
+    def save_session(
+        self,
+        filename: str = None,
+        conversation_history: list = None,
+        snapshot_history: list = None,
+    ):
+        """
+        Save session using unified storage format and database.
 
-    def save_session(self, filename: str = None, conversation_history: list = None):
-        """Save session using unified storage format and database"""
+        snapshot_history, when given, is the chat history written to the file
+        instead of conversation_history (the database always gets the full one).
+        """
         self._log_debug("Saving Session 4 with unified format")
 
         # Build complete goals list
@@ -1147,7 +1152,8 @@ class Session4Manager:
         }
 
         # Save to database
-        if save_session_to_db(self.uid, 4, full_data):
+        self.db_saved = save_session_to_db(self.uid, 4, full_data)
+        if self.db_saved:
             self._log_debug(f"Session 4 saved to database for UID: {self.uid}")
         else:
             self._log_debug("Warning: Failed to save Session 4 to database")
@@ -1161,7 +1167,9 @@ class Session4Manager:
             discovery=discovery,
             goals=all_goals,
             session_metadata=session_metadata,
-            conversation_history=conversation_history,
+            conversation_history=(
+                conversation_history if snapshot_history is None else snapshot_history
+            ),
             filename=filename,
         )
 
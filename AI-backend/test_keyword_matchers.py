@@ -0,0 +1,268 @@
+"""
+Compare the precompiled keyword matchers against the keyword lists they replaced.
+
+The sessions used to classify answers with any(word in user_lower ...) over
+plain lists. Each matcher below must agree with its old list on ordinary
+answers; the places where word boundaries were meant to change the result
+are pinned separately.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add AI-backend to path
+_ai_backend_path = Path(__file__).parent
+if str(_ai_backend_path) not in sys.path:
+    sys.path.insert(0, str(_ai_backend_path))
+
+import session2
+import session3
+import session4
+from utils import state_helpers
+
+_USER_DONE_WORDS = [
+    "yes", "yeah", "yep", "sure", "no", "nope", "nah", "i'm good", "im good",
+    "that's all", "thats all", "nothing else", "all set", "bye", "goodbye",
+    "see you", "thanks", "thank you", "take care",
+]
+
+# (matcher, keyword list it replaced)
+_SESSION2_MATCHERS = [
+    (session2._SAME_KW_RE, ["same", "current", "keep", "continue", "stick", "focusing"]),
+    (session2._ADD_KW_RE, ["add", "plus", "also", "another", "new", "and"]),
+    (session2._DIFFERENT_KW_RE, ["different", "change", "fresh", "switch"]),
+    (session2._WANTS_CHANGE_RE, [
+        "yes", "yeah", "change", "modify", "adjust", "different", "worry",
+        "concerned", "fear", "harder",
+    ]),
+    (session2._NO_CHANGE_RE, ["no", "nope", "good", "fine", "keep", "same"]),
+    (session2._SPECIFIC_CHANGE_RE, [
+        "30", "20", "15", "mins", "minutes", "reduce", "instead", "maybe",
+    ]),
+    (session2._KEEP_ALL_RE, ["all", "both", "current", "same"]),
+    (session2._CONVERSATIONAL_RE, [
+        "like i said", "i told you", "as i mentioned", "i already said",
+        "its going to be fun", "it's fun", "i want to do this", "i will want to",
+        "that makes sense", "i understand", "i like", "because",
+    ]),
+    (session2._USER_DONE_RE, _USER_DONE_WORDS),
+]
+
+_SESSION3_MATCHERS = [
+    (session3._SAME_KW_RE, ["same", "keep", "continue", "current", "these"]),
+    (session3._DIFFERENT_KW_RE, ["different", "change", "new", "adjust"]),
+    (session3._SUCCESS_KW_RE, ["success", "good", "well"]),
+    (session3._CHALLENGE_KW_RE, ["challenge", "difficult", "hard"]),
+    (session3._USER_DONE_RE, _USER_DONE_WORDS),
+]
+
+_SESSION4_MATCHERS = [
+    (session4._ACHIEVED_RE, [
+        "hit both", "achieved both", "did both", "completed both", "yes", "yup",
+        "yeah", "both", "all",
+    ]),
+    (session4._EXPLICIT_YES_RE, [
+        "hit both", "achieved both", "did both", "both goals", "all goals",
+    ]),
+    (session4._EXPLICIT_NO_RE, ["didn't hit", "missed", "only hit one", "couldn't do"]),
+    (session4._POSITIVE_RE, [
+        "yes", "great", "good", "achieved", "completed", "did it", "success",
+        "both", "all", "accomplished", "hit", "met", "well", "worked", "better",
+    ]),
+    (session4._NEGATIVE_RE, [
+        "no", "not really", "didn't", "couldn't", "failed", "hard", "difficult",
+        "missed", "partially", "one", "only one",
+    ]),
+    (session4._CHANGE_RE, [
+        "increase", "decrease", "more", "less", "up", "down", "adjust", "change",
+        "bump", "add", "different",
+    ]),
+    (session4._KEEP_RE, ["keep", "same", "continue", "maintaining", "stay", "just keep"]),
+    (session4._CONFIRMING_RE, [
+        "good", "fine", "yes", "perfect", "right", "correct", "keep", "stay",
+    ]),
+    (session4._CURRENT_RE, [
+        "current", "same", "keep", "continue", "existing", "maintaining", "focus",
+        "working",
+    ]),
+    (session4._NEW_RE, ["new", "different", "something else"]),
+    (session4._MODIFY_RE, [
+        "challenge", "more", "increase", "add", "adjust", "bump", "up", "raise",
+    ]),
+    (session4._NO_CHANGE_RE, [
+        "no", "same", "keep", "good", "fine", "ready", "nothing", "as is", "habit",
+        "confident",
+    ]),
+    (session4._WANTS_CHANGE_RE, [
+        "yes", "change", "adjust", "modify", "increase", "decrease", "more", "less",
+    ]),
+    (session4._GOODBYE_RE, ["bye", "goodbye", "thank you", "thanks", "see you"]),
+    (session4._USER_DONE_RE, _USER_DONE_WORDS),
+]
+
+# Ordinary answers, already lowercased as process_user_input does
+_ANSWERS = [
+    "yes",
+    "no",
+    "nope",
+    "yeah i did both",
+    "i did not",
+    "not much",
+    "not so much",
+    "nothing",
+    "none of them",
+    "no changes, i'm good",
+    "i hit both goals this week",
+    "i missed a few days",
+    "i only hit one of them",
+    "it was hard to find time",
+    "walking was difficult in the rain",
+    "i want to keep the same goals",
+    "i'd like to continue with my current goal",
+    "i'm currently walking three days a week",
+    "i'd do it differently this time",
+    "i'm going to stick with it",
+    "let's add one more goal",
+    "i want a different goal",
+    "i want to change it to 30 minutes instead",
+    "maybe reduce it to 20 mins",
+    "i'd like to increase it a bit more",
+    "i want a new goal",
+    "that makes sense because i like walking",
+    "like i said, it's fun",
+    "it went well, i had a lot of success",
+    "it was tough but it worked",
+    "sounds good",
+    "that's fine",
+    "perfect, that's right",
+    "i feel confident, it's a habit",
+    "i'm ready",
+    "keep it as is",
+    "i'm worried it'll be harder",
+    "thanks, see you next week",
+    "thank you, bye",
+    "that's all, take care",
+    "sure",
+    "i'm good",
+    "all set",
+    "i would like to focus on sleep",
+    "i completed both",
+    "i accomplished what i wanted",
+    "i met my goal",
+    "better than last week",
+    "i failed",
+    "i couldn't do the weekends",
+    "i didn't hit my target",
+    "let's bump it up",
+    "i want to raise the bar",
+    "i'll adjust it",
+    "i'm maintaining what i have",
+    "i want to stay on track",
+    "i'm concerned about time",
+    "i'm scared of failing",
+    "walk for 15 minutes",
+    "these are fine",
+    "my existing routine is working",
+    "i want to modify the goal",
+    "less screen time",
+    "i did it",
+]
+
+
+def _old_match(keywords, text):
+    """The substring check the matchers replaced"""
+    return any(word in text for word in keywords)
+
+
+def _assert_agrees(matchers):
+    for matcher, keywords in matchers:
+        for text in _ANSWERS:
+            assert bool(matcher.search(text)) == _old_match(keywords, text), (
+                matcher.pattern, text
+            )
+
+
+def test_session2_matchers_agree_with_old_keywords():
+    _assert_agrees(_SESSION2_MATCHERS)
+
+
+def test_session3_matchers_agree_with_old_keywords():
+    _assert_agrees(_SESSION3_MATCHERS)
+
+
+def test_session4_matchers_agree_with_old_keywords():
+    _assert_agrees(_SESSION4_MATCHERS)
+
+
+@pytest.mark.parametrize("text", ["i did not", "not much", "nope", "nothing", "none"])
+def test_session4_check_in_negatives_still_detected(text):
+    assert session4._NEGATIVE_RE.search(text)
+
+
+@pytest.mark.parametrize(
+    "matcher, text",
+    [
+        # "no" inside other words
+        (session2._NO_CHANGE_RE, "i know what to do"),
+        (session2._USER_DONE_RE, "i don't know yet"),
+        (session2._NO_CHANGE_RE, "let's add another goal"),
+        (session3._USER_DONE_RE, "i walk every morning now"),
+        (session4._NEGATIVE_RE, "i know it went ok"),
+        # "and" / "new" / "all" / "one" / "up" / "met" inside other words
+        (session2._ADD_KW_RE, "i understand"),
+        (session3._DIFFERENT_KW_RE, "i want to renew my gym membership"),
+        (session4._ACHIEVED_RE, "it was really nice"),
+        (session4._ACHIEVED_RE, "i partially did it"),
+        (session4._NEGATIVE_RE, "i'm done"),
+        (session4._CHANGE_RE, "i was upset"),
+        (session4._POSITIVE_RE, "i want something else"),
+    ],
+)
+def test_matchers_ignore_keywords_inside_other_words(matcher, text):
+    assert not matcher.search(text)
+
+
+@pytest.mark.parametrize(
+    "matcher, text",
+    [
+        (session2._SAME_KW_RE, "i'm sticking to it"),
+        (session3._CHALLENGE_KW_RE, "it was challenging"),
+        (session4._KEEP_RE, "i'll maintain it"),
+        (session4._MODIFY_RE, "i'm raising it"),
+    ],
+)
+def test_matchers_accept_inflected_stems(matcher, text):
+    assert matcher.search(text)
+
+
+def test_wants_more_and_done_agree_with_old_keywords():
+    more_keywords = ["yes", "yeah", "another", "more", "add", "one more", "i'd like", "i want"]
+    done_keywords = [
+        "no", "nope", "just", "only", "focus on", "stick with", "that's all",
+        "thats all", "done", "good",
+    ]
+    for text in _ANSWERS + ["I KNOW", "  Another One  "]:
+        text_lower = text.lower().strip()
+        assert state_helpers.check_wants_more(text) == _old_match(more_keywords, text_lower), text
+        assert state_helpers.check_done(text) == _old_match(done_keywords, text_lower), text
+
+
+def test_yes_no_checks_agree_with_old_keywords():
+    affirmative_words = ["yes", "yeah", "yep", "sure", "yup", "ok", "okay", "i do", "i have"]
+    negative_words = ["no", "nope", "nah", "not really", "don't", "dont", "no questions"]
+    for text in _ANSWERS + ["Okay", "I do", "I have one", "no questions"]:
+        text_lower = text.lower().strip()
+        assert state_helpers.check_affirmative(text) == _old_match(affirmative_words, text_lower), text
+        assert state_helpers.check_negative(text) == _old_match(negative_words, text_lower), text
+
+
+@pytest.mark.parametrize("text", ["i'm unsure", "i read a book", "i don't"])
+def test_affirmative_ignores_words_inside_other_words(text):
+    assert not state_helpers.check_affirmative(text)
+
+
+@pytest.mark.parametrize("text", ["i know", "it's snowing"])
+def test_negative_ignores_words_inside_other_words(text):
+    assert not state_helpers.check_negative(text)
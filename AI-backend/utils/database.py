@@ -7,6 +7,13 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
+from utils.unified_storage import intern_message_roles
+
+try:
+    import orjson
+except ImportError:  # Fall back to stdlib json
+    orjson = None
+
 # Load environment variables from root .env file
 _root_dir = Path(__file__).parent.parent.parent
 _env_file = _root_dir / ".env"
@@ -17,6 +24,13 @@ if _env_file.exists():
 DATABASE_URL = os.getenv("CONVERSATION_DATABASE_URL")
 
 
+def _to_json(value: Any) -> str:
+    """Encode a JSONB column value, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value)
+
+
 def get_connection():
     """Get a database connection"""
     if not DATABASE_URL:
@@ -65,9 +79,9 @@ def save_session_to_db(uid: str, session_number: int, data: Dict[str, Any]) -> b
     cursor = conn.cursor()
     
     try:
-        user_profile = json.dumps(data.get("user_profile", {}))
-        session_info = json.dumps(data.get("session_info", {}))
-        chat_history = json.dumps(data.get("chat_history", []))
+        user_profile = _to_json(data.get("user_profile", {}))
+        session_info = _to_json(data.get("session_info", {}))
+        chat_history = _to_json(data.get("chat_history", []))
         
         cursor.execute('''
             INSERT INTO sessions (uid, session_number, user_profile, session_info, chat_history, updated_at)
@@ -107,7 +121,7 @@ def load_session_from_db(uid: str, session_number: int) -> Optional[Dict[str, An
             return {
                 "user_profile": row['user_profile'],
                 "session_info": row['session_info'] or {},
-                "chat_history": row['chat_history'] or []
+                "chat_history": intern_message_roles(row['chat_history'] or [])
             }
         return None
     except Exception as e:
@@ -138,7 +152,7 @@ def get_latest_session_for_user(uid: str) -> Optional[Dict[str, Any]]:
                 "session_number": row['session_number'],
                 "user_profile": row['user_profile'],
                 "session_info": row['session_info'] or {},
-                "chat_history": row['chat_history'] or []
+                "chat_history": intern_message_roles(row['chat_history'] or [])
             }
         return None
     except Exception as e:
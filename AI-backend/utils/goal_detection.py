@@ -1,6 +1,28 @@
 """
 Utilities for detecting goals in user input.
 """
+import re
+
+
+# Each phrase list is one precompiled alternation, keeping the substring
+# semantics of the any(phrase in text ...) scans it replaces
+def _phrases_re(phrases):
+    return re.compile("|".join(re.escape(p) for p in phrases))
+
+
+# Phrases that indicate NOT a goal
+_NON_GOAL_RE = _phrases_re([
+    'no', 'yes', 'maybe', 'i dont know', "i don't know", 'not sure',
+    'just want to stick', 'thats all', "that's all", 'nothing else',
+    'im good', "i'm good", 'no more', 'nope', 'nah'
+])
+_SITUATION_RE = _phrases_re(['i have', 'i am', "i'm", 'my life', 'my schedule'])
+_GOAL_INTENT_RE = _phrases_re(['want', 'goal', 'like to'])
+_GOAL_KEYWORDS_RE = _phrases_re([
+    "want to", "goal is", "goal:", "would like to", "hoping to",
+    "trying to", "plan to", "i want", "my goal"
+])
+_QUESTION_RE = _phrases_re(['?', 'how about', 'what if', 'maybe', 'would', 'could', 'should'])
 
 
 def is_likely_goal(text: str, min_words: int = 4) -> bool:
@@ -16,15 +38,8 @@ def is_likely_goal(text: str, min_words: int = 4) -> bool:
     """
     text_lower = text.lower().strip()
     
-    # Phrases that indicate NOT a goal
-    non_goal_phrases = [
-        'no', 'yes', 'maybe', 'i dont know', "i don't know", 'not sure',
-        'just want to stick', 'thats all', "that's all", 'nothing else',
-        'im good', "i'm good", 'no more', 'nope', 'nah'
-    ]
-    
     # Check for non-goals
-    if any(phrase in text_lower for phrase in non_goal_phrases):
+    if _NON_GOAL_RE.search(text_lower):
         return False
     
     # Too short
@@ -36,10 +51,7 @@ def is_likely_goal(text: str, min_words: int = 4) -> bool:
         return False
     
     # Check for situation vs goal
-    situation_phrases = ['i have', 'i am', "i'm", 'my life', 'my schedule']
-    is_situation = any(phrase in text_lower for phrase in situation_phrases)
-    
-    if is_situation and 'want' not in text_lower and 'goal' not in text_lower and 'like to' not in text_lower:
+    if _SITUATION_RE.search(text_lower) and not _GOAL_INTENT_RE.search(text_lower):
         return False
     
     return True
@@ -55,12 +67,7 @@ def contains_goal_keywords(text: str) -> bool:
     Returns:
         True if contains goal keywords
     """
-    text_lower = text.lower()
-    goal_keywords = [
-        "want to", "goal is", "goal:", "would like to", "hoping to", 
-        "trying to", "plan to", "i want", "my goal"
-    ]
-    return any(phrase in text_lower for phrase in goal_keywords)
+    return bool(_GOAL_KEYWORDS_RE.search(text.lower()))
 
 
 def is_goal_question(text: str) -> bool:
@@ -73,9 +80,7 @@ def is_goal_question(text: str) -> bool:
     Returns:
         True if it's a question
     """
-    question_indicators = ['?', 'how about', 'what if', 'maybe', 'would', 'could', 'should']
-    text_lower = text.lower()
-    return any(indicator in text_lower for indicator in question_indicators) or text.endswith('?')
+    return bool(_QUESTION_RE.search(text.lower()))
 
 
 def is_too_short_for_goal(text: str, min_words: int = 4) -> bool:
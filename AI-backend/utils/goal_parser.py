@@ -5,6 +5,35 @@ from typing import Dict, List, Optional, Any
 import re
 
 
+# Patterns used on every coach turn, compiled once at import
+_HAS_DIGIT_RE = re.compile(r'\d')
+_GOAL_STATEMENT_RE = re.compile(
+    r'(?:your (?:complete )?(?:smart )?goal (?:is|right):)\s*(.+?)(?:\.|$)',
+    re.IGNORECASE
+)
+_WALK_GOAL_RE = re.compile(
+    r'walk(?:ing)? for (\d+) minutes?,\s*(\d+|three|two|four|five) times? (?:a|per) week'
+)
+_HOURS_RE = re.compile(r'(\d+)\s*hours?')
+_FREQUENCY_RE = re.compile(r'(\d+)\s*(times?|days?|nights?)\s*(per |a |this |each )?week')
+# Any one of these phrases means the coach accepted the goal
+_ACCEPTANCE_RE = re.compile("|".join([
+    r"you've got a clear.*goal",
+    r"that's a solid goal",
+    r"solid starting point",
+    r"fantastic.*goal",
+    r"excellent.*goal",
+    r"perfect.*goal",
+    r"great goal",
+    r"this is going to",
+    r"you're all set",
+    r"how will you remind",
+    r"how will you track",
+    r"what.*remind yourself",
+    r"on a scale.*confident"
+]))
+
+
 def is_goal_statement(text: str, min_words: int = 4) -> bool:
     """
     Check if text appears to be a goal statement
@@ -169,7 +198,7 @@ def enhance_goal_with_details(base_goal: str, additional_text: str) -> str:
     has_time = any(ind in additional_lower for ind in time_indicators)
     
     # Check for numbers
-    has_numbers = bool(re.findall(r'\d+', additional_text))
+    has_numbers = bool(_HAS_DIGIT_RE.search(additional_text))
     
     # Only enhance if additional text has specificity
     if has_time or has_numbers:
@@ -317,11 +346,7 @@ def extract_refined_goal_from_coach_response(
     
     # Try to extract goal from coach's statement
     # Pattern 1: "your goal is: [GOAL]" or "your SMART goal is: [GOAL]"
-    goal_statement_match = re.search(
-        r'(?:your (?:complete )?(?:smart )?goal (?:is|right):)\s*(.+?)(?:\.|$)',
-        coach_lower,
-        re.IGNORECASE
-    )
+    goal_statement_match = _GOAL_STATEMENT_RE.search(coach_lower)
     
     if goal_statement_match:
         goal_text = goal_statement_match.group(1).strip()
@@ -331,10 +356,7 @@ def extract_refined_goal_from_coach_response(
     
     # Pattern 2: Extract walking goals with specific format
     # "walk for X minutes, Y times a week"
-    walk_match = re.search(
-        r'walk(?:ing)? for (\d+) minutes?,\s*(\d+|three|two|four|five) times? (?:a|per) week',
-        coach_lower
-    )
+    walk_match = _WALK_GOAL_RE.search(coach_lower)
     
     if walk_match:
         minutes = walk_match.group(1)
@@ -348,10 +370,10 @@ def extract_refined_goal_from_coach_response(
         return f"Walk for {minutes} minutes, {frequency} times per week"
     
     # Pattern 3: Extract sleep goals
-    hours_match = re.search(r'(\d+)\s*hours?', coach_lower)
+    hours_match = _HOURS_RE.search(coach_lower)
     hours = hours_match.group(1) if hours_match else None
     
-    freq_match = re.search(r'(\d+)\s*(times?|days?|nights?)\s*(per |a |this |each )?week', coach_lower)
+    freq_match = _FREQUENCY_RE.search(coach_lower)
     frequency = freq_match.group(1) if freq_match else None
     
     # Extract days mentioned
@@ -389,22 +411,4 @@ def check_coach_goal_acceptance(coach_response: str) -> bool:
     Returns:
         bool: True if coach accepted the goal
     """
-    coach_response_lower = coach_response.lower()
-    
-    acceptance_patterns = [
-        r"you've got a clear.*goal",
-        r"that's a solid goal",
-        r"solid starting point",
-        r"fantastic.*goal",
-        r"excellent.*goal", 
-        r"perfect.*goal",
-        r"great goal",
-        r"this is going to",
-        r"you're all set",
-        r"how will you remind",
-        r"how will you track",
-        r"what.*remind yourself",
-        r"on a scale.*confident"
-    ]
-    
-    return any(re.search(pattern, coach_response_lower) for pattern in acceptance_patterns)
\ No newline at end of file
+    return bool(_ACCEPTANCE_RE.search(coach_response.lower()))
\ No newline at end of file
@@ -2,19 +2,164 @@
 Utilities for SMART goal evaluation.
 Extracted from Session1Manager and Session2Manager.
 """
+import copy
+import functools
 import re
 import json
-from typing import Dict, Any
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Tuple
+
+# Both raise a ValueError subclass on malformed input
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # Fall back to stdlib json
+    _json_loads = json.loads
+
 from .constants import TIME_WORDS, DAYS_OF_WEEK, ACTION_VERBS, ACTIVITY_NAMES, VAGUE_WORDS, GOAL_FILLER_PHRASES
 
+logger = logging.getLogger(__name__)
+
+
+# One alternation per word list (substring semantics, like the original any(... in ...) scans)
+def _substring_re(words):
+    return re.compile("|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)))
+
+
+_HAS_DIGIT_RE = re.compile(r'\d')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Trimmed from both ends of a goal before keying the eval cache; users often
+# restate a goal with only a closing period or quotes added or dropped
+_KEY_TRIM_CHARS = ' .,!?;:"\''
+# Outermost {...} in an LLM response, ignoring code fences or stray prose around it
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_TIME_WORDS_RE = _substring_re(TIME_WORDS)
+_ACTION_RE = _substring_re(list(ACTION_VERBS) + list(ACTIVITY_NAMES))
+_VAGUE_WORDS_RE = _substring_re(VAGUE_WORDS)
+_DAYS_OF_WEEK_RE = _substring_re(DAYS_OF_WEEK)
+
+
+class SmartEvalParseError(ValueError):
+    """LLM SMART evaluation response was not a usable JSON analysis"""
 
-def evaluate_smart_goal_with_llm(goal: str, llm_client) -> Dict[str, Any]:
+
+SMART_CRITERIA = ("specific", "measurable", "achievable", "relevant", "timebound")
+# missing_criteria labels, paired with SMART_CRITERIA so results reuse these strings
+_MISSING_LABELS = tuple(zip(SMART_CRITERIA, (c.upper() for c in SMART_CRITERIA)))
+
+# Static instructions for SMART evaluation. Sent as the (cacheable) system
+# prompt so only the short goal line varies between calls.
+SMART_SYSTEM_PROMPT = """You are a SMART goal evaluator. Evaluate if the user's goal is SMART (Specific, Measurable, Achievable, Relevant, Time-bound).
+
+STRICT CRITERIA:
+- Specific: Must have a clear, detailed action (not vague like "eat better" or "exercise more")
+- Measurable: Must include numbers, frequency, or quantifiable metrics (e.g., "30 minutes", "3 times", "2000 calories")
+- Achievable: Should be realistic for a typical person
+- Relevant: Related to health/wellness
+- Time-bound: Must specify when/how often (e.g., "daily", "3x per week", "by Friday", "for 2 weeks")
+
+Respond ONLY with a JSON object in this exact format:
+{
+    "specific": {"met": true/false, "issue": "reason if not met"},
+    "measurable": {"met": true/false, "issue": "reason if not met"},
+    "achievable": {"met": true/false, "issue": "reason if not met"},
+    "relevant": {"met": true/false, "issue": "reason if not met"},
+    "timebound": {"met": true/false, "issue": "reason if not met"},
+    "suggestions": "specific suggestions to make it SMART"
+}
+Never include markdown formatting."""
+
+
+# (model id, normalized goal text)
+SmartEvalKey = Tuple[Optional[str], str]
+
+
+class SmartEvalCache:
+    """
+    In-memory LRU cache of LLM SMART evaluations.
+    Keyed on model + normalized goal text, so restating the same goal
+    (case, whitespace or surrounding punctuation changes) doesn't trigger
+    another LLM call.
+    """
+    
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+    
+    @staticmethod
+    def make_key(model_id: Optional[str], goal: str) -> SmartEvalKey:
+        goal_norm = _WHITESPACE_RE.sub(' ', goal.lower()).strip(_KEY_TRIM_CHARS)
+        return (model_id, goal_norm)
+    
+    def get(self, key: SmartEvalKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        return copy.deepcopy(result)
+    
+    def set(self, key: SmartEvalKey, result: Dict[str, Any]) -> None:
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared across sessions so a goal evaluated in one session isn't re-sent in the next
+SMART_EVAL_CACHE = SmartEvalCache()
+
+# Evaluations currently in flight, keyed like SMART_EVAL_CACHE. Concurrent
+# sessions asking about the same goal wait on the first caller's result.
+_INFLIGHT_EVALS: Dict[SmartEvalKey, Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def _single_flight(cache_key: SmartEvalKey, compute) -> Dict[str, Any]:
+    """Run compute() once per key across threads; later callers share its result"""
+    with _INFLIGHT_LOCK:
+        pending = _INFLIGHT_EVALS.get(cache_key)
+        owner = pending is None
+        if owner:
+            pending = Future()
+            _INFLIGHT_EVALS[cache_key] = pending
+    
+    if not owner:
+        return copy.deepcopy(pending.result())
+    
+    try:
+        result = compute()
+        pending.set_result(result)
+        return result
+    except BaseException as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT_EVALS.pop(cache_key, None)
+
+
+def evaluate_smart_goal_with_llm(goal: str, llm_client, stats: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
     """
     Use LLM to evaluate if a goal is SMART.
+    Results are cached in SMART_EVAL_CACHE; heuristic fallbacks are not cached.
     
     Args:
         goal: The goal text to evaluate
-        llm_client: LLM client with evaluate_goal() method
+        llm_client: LLM client with evaluate_goal(prompt, system=...) method
+        stats: Optional dict whose "hits"/"misses" counters are updated
         
     Returns:
         Dict with:
@@ -23,121 +168,235 @@ def evaluate_smart_goal_with_llm(goal: str, llm_client) -> Dict[str, Any]:
             - suggestions: str
             - missing_criteria: list of str
     """
-    evaluation_prompt = f"""Evaluate if this goal is SMART (Specific, Measurable, Achievable, Relevant, Time-bound).
-
-Goal: "{goal}"
+    user_message = f'Goal: "{goal}"\nRespond with JSON only.'
 
-STRICT CRITERIA:
-- Specific: Must have a clear, detailed action (not vague like "eat better" or "exercise more")
-- Measurable: Must include numbers, frequency, or quantifiable metrics (e.g., "30 minutes", "3 times", "2000 calories")
-- Achievable: Should be realistic for a typical person
-- Relevant: Related to health/wellness
-- Time-bound: Must specify when/how often (e.g., "daily", "3x per week", "by Friday", "for 2 weeks")
+    cache_key = SmartEvalCache.make_key(getattr(llm_client, 'model_id', None), goal)
+    cached = _lookup_cached(cache_key, stats)
+    if cached is not None:
+        return cached
+    
+    return _single_flight(
+        cache_key, lambda: _evaluate_uncached(goal, user_message, llm_client, cache_key)
+    )
 
-Respond ONLY with a JSON object in this exact format:
-{{
-    "specific": {{"met": true/false, "issue": "reason if not met"}},
-    "measurable": {{"met": true/false, "issue": "reason if not met"}},
-    "achievable": {{"met": true/false, "issue": "reason if not met"}},
-    "relevant": {{"met": true/false, "issue": "reason if not met"}},
-    "timebound": {{"met": true/false, "issue": "reason if not met"}},
-    "suggestions": "specific suggestions to make it SMART"
-}}"""
 
+def _evaluate_uncached(goal: str, user_message: str, llm_client, cache_key: SmartEvalKey) -> Dict[str, Any]:
+    """Full LLM SMART evaluation, cached on success, heuristic fallback on failure"""
     try:
-        response = llm_client.evaluate_goal(evaluation_prompt)
-        response = response.strip()
-        
-        # Clean up response
-        if response.startswith("```json"):
-            response = response[7:]
-        if response.startswith("```"):
-            response = response[3:]
-        if response.endswith("```"):
-            response = response[:-3]
-        response = response.strip()
-        
-        analysis = json.loads(response)
-        
-        # Check if all criteria are met
-        is_smart = all(
-            analysis[criterion]["met"] 
-            for criterion in ["specific", "measurable", "achievable", "relevant", "timebound"]
-        )
-        
-        # Build list of missing criteria
-        missing = [
-            criterion.upper() 
-            for criterion in ["specific", "measurable", "achievable", "relevant", "timebound"]
-            if not analysis[criterion]["met"]
-        ]
-        
-        return {
-            'is_smart': is_smart,
-            'analysis': analysis,
-            'suggestions': analysis.get('suggestions', ''),
-            'missing_criteria': missing
-        }
+        response = llm_client.evaluate_goal(user_message, system=SMART_SYSTEM_PROMPT)
+        analysis = _parse_llm_json(response, SMART_CRITERIA)
+        result = _build_smart_result(analysis)
+        SMART_EVAL_CACHE.set(cache_key, result)
+        return result
         
     except Exception as e:
         # Fall back to heuristic check if LLM fails
+        logger.debug("SMART evaluation failed (%s); using heuristic check", e)
         return heuristic_smart_check(goal)
 
 
-def heuristic_smart_check(goal: str) -> Dict[str, Any]:
+# Minimum word-set Jaccard overlap between successive refinement candidates
+# for the new one to be evaluated as a delta on the previous verdict
+DELTA_EVAL_MIN_OVERLAP = 0.8
+
+
+def goal_addition(prev_goal: Optional[str], goal: str) -> Optional[str]:
     """
-    Simple heuristic-based SMART check as fallback.
-    Used when LLM is unavailable or fails.
+    Text appended to prev_goal to make goal, or None if goal is not a small
+    extension of prev_goal (so a delta evaluation doesn't apply).
+    """
+    if not prev_goal or not goal.startswith(prev_goal + " "):
+        return None
+    
+    prev_words = set(prev_goal.lower().split())
+    goal_words = set(goal.lower().split())
+    if len(prev_words & goal_words) / len(prev_words | goal_words) < DELTA_EVAL_MIN_OVERLAP:
+        return None
+    return goal[len(prev_goal):].strip()
+
+
+def evaluate_smart_goal_delta_with_llm(
+    goal: str,
+    added_text: str,
+    prev_result: Dict[str, Any],
+    llm_client,
+    stats: Optional[Dict[str, int]] = None
+) -> Dict[str, Any]:
+    """
+    Re-evaluate a goal after the user appended added_text to an already
+    evaluated version. The full goal is sent, but only the criteria still
+    unmet in prev_result are asked about; criteria already met are carried
+    over. A cached full evaluation of the goal is used if there is one, but
+    delta verdicts are not cached, since they rest on the earlier verdict.
+    Falls back to a full evaluation if there is nothing to carry over or the
+    delta response can't be used.
     
     Args:
-        goal: The goal text to evaluate
+        goal: The full updated goal text
+        added_text: Text appended since the previous evaluation
+        prev_result: Result of evaluating the previous version of the goal
+        llm_client: LLM client with evaluate_goal(prompt, system=...) method
+        stats: Optional dict whose "hits"/"misses" counters are updated
         
     Returns:
         Dict with same structure as evaluate_smart_goal_with_llm
     """
-    goal_lower = goal.lower()
+    prev_analysis = (prev_result or {}).get('analysis') or {}
+    try:
+        unmet = [c for c in SMART_CRITERIA if not prev_analysis[c]["met"]]
+    except (KeyError, TypeError):
+        unmet = []
+    if not unmet or len(unmet) == len(SMART_CRITERIA):
+        return evaluate_smart_goal_with_llm(goal, llm_client, stats)
+    
+    cache_key = SmartEvalCache.make_key(getattr(llm_client, 'model_id', None), goal)
+    cached = _lookup_cached(cache_key, stats)
+    if cached is not None:
+        return cached
+    
+    met = [c for c in SMART_CRITERIA if c not in unmet]
+    issues = {c: prev_analysis[c].get("issue", "") for c in unmet}
+    delta_message = (
+        f'Goal: "{goal}"\n'
+        f"An earlier version of this goal already meets: {', '.join(met)}.\n"
+        f"Still missing: {json.dumps(issues)}\n"
+        f'The user added: "{added_text}"\n'
+        f"Respond with JSON only, containing just the keys {', '.join(unmet)} "
+        f'and "suggestions", in the same format.'
+    )
     
+    try:
+        response = llm_client.evaluate_goal(delta_message, system=SMART_SYSTEM_PROMPT)
+        delta = _parse_llm_json(response, unmet)
+        analysis = copy.deepcopy(prev_analysis)
+        for criterion in unmet:
+            analysis[criterion] = delta[criterion]
+        analysis["suggestions"] = delta.get("suggestions", "")
+        return _build_smart_result(analysis)
+    
+    except Exception as e:
+        logger.debug("Delta SMART evaluation failed (%s); evaluating the full goal", e)
+        # The cache miss for this goal was already counted above
+        return evaluate_smart_goal_with_llm(goal, llm_client)
+
+
+def _lookup_cached(cache_key: SmartEvalKey, stats: Optional[Dict[str, int]]) -> Optional[Dict[str, Any]]:
+    """Check SMART_EVAL_CACHE, updating the caller's hit/miss counters"""
+    cached = SMART_EVAL_CACHE.get(cache_key)
+    if stats is not None:
+        counter = "hits" if cached is not None else "misses"
+        stats[counter] = stats.get(counter, 0) + 1
+    return cached
+
+
+def _parse_llm_json(response: str, criteria=SMART_CRITERIA) -> Dict[str, Any]:
+    """
+    Extract and parse the JSON object in an LLM response, checking that each
+    of the given criteria has a boolean "met".
+    
+    Raises:
+        SmartEvalParseError: If no valid analysis object can be extracted
+    """
+    match = _JSON_OBJECT_RE.search(response or "")
+    if not match:
+        raise SmartEvalParseError("no JSON object in response")
+    try:
+        analysis = _json_loads(match.group())
+    except ValueError as e:
+        raise SmartEvalParseError(f"invalid JSON: {e}") from e
+    
+    _check_criteria(analysis, criteria)
+    return analysis
+
+
+def _check_criteria(analysis: Any, criteria=SMART_CRITERIA) -> None:
+    """Raise SmartEvalParseError unless each criterion entry has a boolean met flag"""
+    if not isinstance(analysis, dict):
+        raise SmartEvalParseError("response is not a JSON object")
+    for criterion in criteria:
+        entry = analysis.get(criterion)
+        if not isinstance(entry, dict) or not isinstance(entry.get("met"), bool):
+            raise SmartEvalParseError(f"missing or malformed '{criterion}'")
+
+
+def _build_smart_result(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the evaluation result dict from a per-criterion analysis"""
+    # Build list of missing criteria
+    missing = [
+        label
+        for criterion, label in _MISSING_LABELS
+        if not analysis[criterion]["met"]
+    ]
+    
+    return {
+        'is_smart': not missing,
+        'analysis': analysis,
+        'suggestions': analysis.get('suggestions', ''),
+        'missing_criteria': missing
+    }
+
+
+@functools.lru_cache(maxsize=1024)
+def _heuristic_smart_flags(goal_lower: str) -> Tuple[bool, bool, bool, bool, bool]:
+    """
+    Pure heuristic checks on a normalized goal, memoized across calls.
+    Returns (has_action, has_vague, has_numbers, has_timeframe_or_days, is_smart).
+    """
     # Check for numbers
-    has_numbers = bool(re.search(r'\d+', goal))
+    has_numbers = bool(_HAS_DIGIT_RE.search(goal_lower))
     
-    # Check for timeframe words (using constants)
-    has_timeframe = any(word in goal_lower for word in TIME_WORDS)
+    # Check for timeframe words or specific days (using constants)
+    has_timeframe = bool(_TIME_WORDS_RE.search(goal_lower) or _DAYS_OF_WEEK_RE.search(goal_lower))
     
     # Check for action verbs or activity names (using constants)
-    has_action = (
-        any(verb in goal_lower for verb in ACTION_VERBS) or 
-        any(activity in goal_lower for activity in ACTIVITY_NAMES)
-    )
+    has_action = bool(_ACTION_RE.search(goal_lower))
     
     # Check for vague words (using constants)
-    has_vague = any(word in goal_lower for word in VAGUE_WORDS) and not has_numbers
-    
-    # Check for specific days (using constants)
-    has_specific_days = any(day in goal_lower for day in DAYS_OF_WEEK)
+    has_vague = bool(_VAGUE_WORDS_RE.search(goal_lower)) and not has_numbers
     
     # Determine if SMART
     is_smart = (
         has_numbers and 
-        (has_timeframe or has_specific_days) and 
+        has_timeframe and 
         has_action and 
         not has_vague and 
-        len(goal.split()) >= 5
+        len(goal_lower.split()) >= 5
+    )
+    
+    return has_action, has_vague, has_numbers, has_timeframe, is_smart
+
+
+def heuristic_smart_check(goal: str) -> Dict[str, Any]:
+    """
+    Simple heuristic-based SMART check as fallback.
+    Used when LLM is unavailable or fails.
+    
+    Args:
+        goal: The goal text to evaluate
+        
+    Returns:
+        Dict with same structure as evaluate_smart_goal_with_llm
+    """
+    has_action, has_vague, has_numbers, has_timeframe, is_smart = _heuristic_smart_flags(
+        goal.strip().lower()
     )
     
+    specific_met = has_action and not has_vague
+    
     # Build missing criteria list
     missing = []
-    if not has_action or has_vague: 
+    if not specific_met:
         missing.append("SPECIFIC")
     if not has_numbers: 
         missing.append("MEASURABLE")
-    if not (has_timeframe or has_specific_days): 
+    if not has_timeframe: 
         missing.append("TIMEBOUND")
     
     return {
         'is_smart': is_smart,
         'analysis': {
             'specific': {
-                'met': has_action and not has_vague, 
+                'met': specific_met,
                 'issue': 'Use specific action verbs or activity names, avoid vague words'
             },
             'measurable': {
@@ -153,7 +412,7 @@ def heuristic_smart_check(goal: str) -> Dict[str, Any]:
                 'issue': ''
             },
             'timebound': {
-                'met': has_timeframe or has_specific_days, 
+                'met': has_timeframe, 
                 'issue': 'Specify frequency or deadline'
             }
         },
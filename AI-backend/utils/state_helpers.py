@@ -5,6 +5,28 @@ from typing import Dict, Any, Optional
 import re
 
 
+# Keyword lists are matched by substring, as with any(word in text ...);
+# a single precompiled alternation does the scan in one pass
+_WANTS_MORE_RE = re.compile(r"yes|yeah|another|more|add|one more|i'd like|i want")
+_DONE_RE = re.compile(
+    r"no|nope|just|only|focus on|stick with|that's all|thats all|done|good"
+)
+_DIGITS_RE = re.compile(r'\d+')
+
+# Yes/no answers are classified on whole words: the utterance is tokenized
+# once and checked against each bag with a set intersection, so "ok" no
+# longer fires inside "book" or "sure" inside "unsure"
+_TOKEN_RE = re.compile(r"[a-z']+")
+_AFFIRMATIVE_WORDS = frozenset({"yes", "yeah", "yep", "sure", "yup", "ok", "okay"})
+_AFFIRMATIVE_PHRASE_RE = re.compile(r"\bi (?:do|have)\b")
+# "not"/"nothing"/"none" were previously caught by the "no" substring
+_NEGATIVE_WORDS = frozenset({"no", "nope", "nah", "not", "nothing", "none", "don't", "dont"})
+
+# Default turn result; copying it clones the key table instead of inserting
+# each key into a fresh dict
+_RESULT_TEMPLATE = {"next_state": None, "context": "", "trigger_rag": True}
+
+
 def create_state_result(next_state=None, context: str = "", trigger_rag: bool = True) -> Dict[str, Any]:
     """
     Create a standardized state transition result.
@@ -17,6 +39,8 @@ def create_state_result(next_state=None, context: str = "", trigger_rag: bool =
     Returns:
         Dictionary with state transition info
     """
+    if next_state is None and not context and trigger_rag is True:
+        return _RESULT_TEMPLATE.copy()
     return {
         "next_state": next_state,
         "context": context,
@@ -34,9 +58,10 @@ def check_affirmative(text: str) -> bool:
     Returns:
         True if affirmative
     """
-    text_lower = text.lower().strip()
-    affirmative_words = ["yes", "yeah", "yep", "sure", "yup", "ok", "okay", "i do", "i have"]
-    return any(word in text_lower for word in affirmative_words)
+    text_lower = text.lower()
+    if not _AFFIRMATIVE_WORDS.isdisjoint(_TOKEN_RE.findall(text_lower)):
+        return True
+    return bool(_AFFIRMATIVE_PHRASE_RE.search(text_lower))
 
 
 def check_negative(text: str) -> bool:
@@ -49,9 +74,7 @@ def check_negative(text: str) -> bool:
     Returns:
         True if negative
     """
-    text_lower = text.lower().strip()
-    negative_words = ["no", "nope", "nah", "not really", "don't", "dont", "no questions"]
-    return any(word in text_lower for word in negative_words)
+    return not _NEGATIVE_WORDS.isdisjoint(_TOKEN_RE.findall(text.lower()))
 
 
 def extract_number(text: str) -> Optional[int]:
@@ -64,21 +87,17 @@ def extract_number(text: str) -> Optional[int]:
     Returns:
         First number found or None
     """
-    numbers = re.findall(r'\d+', text)
-    if numbers:
-        return int(numbers[0])
+    match = _DIGITS_RE.search(text)
+    if match:
+        return int(match.group())
     return None
 
 
 def check_wants_more(text: str) -> bool:
     """Check if user wants to add more (goals, questions, etc.)"""
-    text_lower = text.lower().strip()
-    more_keywords = ["yes", "yeah", "another", "more", "add", "one more", "i'd like", "i want"]
-    return any(word in text_lower for word in more_keywords)
+    return bool(_WANTS_MORE_RE.search(text.lower()))
 
 
 def check_done(text: str) -> bool:
     """Check if user is done (no more goals, questions, etc.)"""
-    text_lower = text.lower().strip()
-    done_keywords = ["no", "nope", "just", "only", "focus on", "stick with", "that's all", "thats all", "done", "good"]
-    return any(word in text_lower for word in done_keywords)
\ No newline at end of file
+    return bool(_DONE_RE.search(text.lower()))
\ No newline at end of file
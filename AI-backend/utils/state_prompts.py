@@ -1,6 +1,9 @@
 """
 State-specific prompt templates.
 """
+import functools
+import string
+from typing import Any, Callable, Optional, Tuple
 
 
 def get_session1_prompt(state_value: str, session_data: dict, program_info: str = "") -> str:
@@ -18,20 +21,17 @@ def get_session1_prompt(state_value: str, session_data: dict, program_info: str
     user_name = session_data.get('user_name', 'them')
     
     # Build session context
-    session_context = ""
-    if session_data.get("discovery"):
-        discovery = session_data["discovery"]
-        questions_asked = discovery.get("questions_asked", [])
-        if questions_asked:
-            session_context += f"\nDiscovery questions asked: {len(questions_asked)}"
+    context_parts = []
+    if discovery := session_data.get("discovery"):
+        if questions_asked := discovery.get("questions_asked", []):
+            context_parts.append(f"\nDiscovery questions asked: {len(questions_asked)}")
     
-    goal_details = session_data.get("goal_details", [])
-    if goal_details:
-        session_context += f"\nGoals set: {len(goal_details)}"
+    if goal_details := session_data.get("goal_details", []):
+        context_parts.append(f"\nGoals set: {len(goal_details)}")
     
-    current_goal = session_data.get("current_goal")
-    if current_goal:
-        session_context += f"\nCurrent goal: {current_goal}"
+    if current_goal := session_data.get("current_goal"):
+        context_parts.append(f"\nCurrent goal: {current_goal}")
+    session_context = "".join(context_parts)
     
     # State-specific prompts
     prompts = {
@@ -208,50 +208,149 @@ Example: "I'm excited to hear how your first week goes. Remember to track your p
     return prompts.get(state_value, f"Current state: {state_value}{session_context}")
 
 
-def get_session2_prompt(state_value: str, session_data: dict) -> str:
-    """
-    Get Session 2 state-specific prompt.
-    
-    Args:
-        state_value: Current state value (e.g., "greetings", "check_in_goals")
-        session_data: Session data dictionary
-        
-    Returns:
-        State-specific prompt text
-    """
-    user_name = session_data.get('user_name', 'them')
-    
-    # Build previous goals text
-    previous_goals_text = ""
-    if session_data.get("previous_goals"):
-        if len(session_data["previous_goals"]) == 1:
-            previous_goals_text = f"\nTheir previous goal: \"{session_data['previous_goals'][0]['goal']}\""
-        else:
-            previous_goals_text = f"\nTheir previous goals:"
-            for i, g in enumerate(session_data["previous_goals"], 1):
-                previous_goals_text += f"\n  {i}. \"{g['goal']}\""
+def _previous_goals_text(session_data) -> str:
+    """Previous goal(s) as a short block for the Session 2/3 prompts"""
+    previous_goals = session_data.get("previous_goals")
+    if not previous_goals:
+        return ""
+    return _format_previous_goals(tuple(g['goal'] for g in previous_goals))
+
+
+@functools.lru_cache(maxsize=256)
+def _format_previous_goals(goals: Tuple[str, ...]) -> str:
+    if len(goals) == 1:
+        return f"\nTheir previous goal: \"{goals[0]}\""
+    return "\n".join(
+        ["\nTheir previous goals:"] + [f"  {i}. \"{goal}\"" for i, goal in enumerate(goals, 1)]
+    )
+
+
+def _session_context(session_data) -> str:
+    """Stress level and goal progress appended to most Session 2/3 prompts"""
+    return _format_session_context(
+        session_data.get("stress_level"),
+        tuple(session_data.get("goals_to_keep") or ()),
+        len(session_data.get("new_goals") or ()),
+    )
+
+
+# These inputs rarely change between turns, so the text is usually reused
+@functools.lru_cache(maxsize=256)
+def _format_session_context(stress_level, goals_to_keep: Tuple[str, ...], new_goal_count: int) -> str:
+    context_parts = []
+    if stress_level:
+        context_parts.append(f"\nStress level: {stress_level}/10")
     
-    # Build session context
-    session_context = ""
-    if session_data.get("stress_level"):
-        session_context += f"\nStress level: {session_data['stress_level']}/10"
+    if goals_to_keep:
+        context_parts.append(f"\nGoals keeping: {', '.join(goals_to_keep)}")
     
-    if session_data.get("goals_to_keep"):
-        session_context += f"\nGoals keeping: {', '.join(session_data['goals_to_keep'])}"
+    if new_goal_count:
+        context_parts.append(f"\nNew goals set: {new_goal_count}")
+    return "".join(context_parts)
+
+
+@functools.lru_cache(maxsize=256)
+def _format_goal_bullets(goals: Tuple[str, ...], placeholder: str) -> str:
+    """Goals as an indented bullet list, or the placeholder line if there are none"""
+    return "\n".join(f"  - {g}" for g in goals) or placeholder
+
+
+# Placeholders used by the Session 2-4 prompt templates
+_PROMPT_FIELD_BUILDERS = {
+    "user_name": lambda sd: sd.get('user_name', 'them'),
+    "previous_goals_text": _previous_goals_text,
+    "session_context": _session_context,
+    "discovery_options": lambda sd: ', '.join(sd.get('discovery_questions', [])[:3]),
+    "goals_keeping_list": lambda sd: _format_goal_bullets(
+        tuple(sd.get('goals_to_keep', [])), '  - (identifying)'
+    ),
+    "next_week_goals_list": lambda sd: _format_goal_bullets(
+        tuple(sd.get('goals_to_keep', []) + sd.get('new_goals', [])),
+        '  - (continuing previous goals)'
+    ),
+    "goal_parts": lambda sd: sd.get('goal_parts', []),
+    "goal_so_far": lambda sd: ' '.join(sd.get('goal_parts', [])),
+    "missing_criteria": lambda sd: ', '.join(
+        (sd.get('goal_smart_analysis') or {}).get('missing_criteria', [])
+    ),
+    "refinement_attempts": lambda sd: sd.get('smart_refinement_attempts', 0),
+    "current_goal": lambda sd: sd.get('current_goal'),
+    "current_goal_or_chosen": lambda sd: sd.get('current_goal') or 'their chosen goals',
+    "current_goal_or_not_provided": lambda sd: sd.get('current_goal', 'Not yet provided'),
+    "confidence_level": lambda sd: sd.get('confidence_level'),
+    "previous_goals_list": lambda sd: (
+        "\n".join(f"- {g['goal']}" for g in sd.get('previous_goals', [])) or "None"
+    ),
+}
+
+
+class _PromptFields(dict):
+    """
+    Template values built on first use, so formatting one state's prompt
+    only computes the placeholders that prompt contains.
+    """
     
-    if session_data.get("new_goals"):
-        session_context += f"\nNew goals set: {len(session_data['new_goals'])}"
+    def __init__(self, session_data):
+        super().__init__()
+        self.session_data = session_data
     
-    # State-specific prompts
-    prompts = {
-        "greetings": f"""
+    def __missing__(self, key):
+        value = self[key] = _PROMPT_FIELD_BUILDERS[key](self.session_data)
+        return value
+
+
+def _render_prompt(template: Optional[str], state_value: str, session_data) -> str:
+    """Fill a Session 2/3 prompt template, with a generic fallback for unknown states"""
+    fields = _PromptFields(session_data)
+    if template is None:
+        return f"Current state: {state_value}{fields['session_context']}"
+    return template.format_map(fields)
+
+
+# Placeholders that only depend on the participant's name and previous goals,
+# which stay the same for the whole session
+_STABLE_FIELDS = frozenset({"user_name", "previous_goals_text", "previous_goals_list"})
+
+
+def _uses_stable_fields_only(template: str) -> bool:
+    return {field for _, field, _, _ in string.Formatter().parse(template) if field} <= _STABLE_FIELDS
+
+
+def _render_stable_prompt(template: str, session_data) -> str:
+    """Fill a template that only uses stable fields, reusing earlier renders"""
+    return _format_stable_prompt(
+        template,
+        session_data.get('user_name', 'them'),
+        tuple(g['goal'] for g in session_data.get('previous_goals') or ()),
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _format_stable_prompt(template: str, user_name, previous_goals: Tuple[str, ...]) -> str:
+    return template.format(
+        user_name=user_name,
+        previous_goals_text=_format_previous_goals(previous_goals) if previous_goals else "",
+        previous_goals_list="\n".join(f"- {goal}" for goal in previous_goals) or "None",
+    )
+
+
+def _prompt_renderer(prompts: dict, state_value: str) -> Callable[[Any], str]:
+    template = prompts.get(state_value)
+    if template is not None and _uses_stable_fields_only(template):
+        return functools.partial(_render_stable_prompt, template)
+    return functools.partial(_render_prompt, template, state_value)
+
+
+# Session 2 state-specific prompt templates, keyed by state value
+_SESSION2_PROMPTS = {
+    "greetings": """
 Welcome {user_name} back to Session 2.
 
 Be warm and brief. Just say hi and ask how their week was.
 NO markdown, emojis, or extra questions.
 {previous_goals_text}""",
 
-        "check_in_goals": f"""
+    "check_in_goals": """
 Ask about their goal from last week.
 {previous_goals_text}
 
@@ -260,7 +359,7 @@ NO stress questions, NO other topics.
 Example: "How did it go with [goal]?"
 {session_context}""",
 
-        "stress_level": f"""
+    "stress_level": """
 Ask ONLY about stress level (1-10).
 
 "On a scale of 1 to 10, how stressed were you this week?"
@@ -268,21 +367,21 @@ Ask ONLY about stress level (1-10).
 CRITICAL: Do NOT ask about their goals, challenges, or anything else. Just stress level.
 {session_context}""",
 
-        "discovery_questions": f"""
+    "discovery_questions": """
 Ask ONE discovery question.
-Available: {', '.join(session_data.get('discovery_questions', [])[:3])}
+Available: {discovery_options}
 
 Pick most relevant. Be conversational.
 {session_context}""",
 
-        "goal_completion": f"""
+    "goal_completion": """
 Ask about goal completion.
 
 CRITICAL: Ask this ONCE. Accept their answer. Do NOT ask follow-up questions about details.
 Example: "Did you complete your goal?"
 {session_context}""",
 
-        "goals_for_next_week": f"""
+    "goals_for_next_week": """
 Ask what they want to focus on next week.
 
 Three options:
@@ -293,7 +392,7 @@ Three options:
 Be clear and simple.
 {session_context}""",
 
-        "same_goals_successes_challenges": f"""
+    "same_goals_successes_challenges": """
 They're keeping the same goal.
 
 FIRST response (when you haven't asked yet): Acknowledge their choice briefly (1 sentence), then ask: "What went well this week? What was challenging?"
@@ -307,37 +406,37 @@ CRITICAL:
 - If they mention wanting to change something, acknowledge it but let them lead
 {session_context}""",
 
-        "same_anything_to_change": f"""
+    "same_anything_to_change": """
 Ask if anything about their goal needs to be changed or worked on.
 
 Keep it simple and direct: "Is there anything about this goal that needs to be changed or worked on?"
 {session_context}""",
 
-        "same_what_concerns": f"""
+    "same_what_concerns": """
 They want to make changes. Ask what concerns they have or what solutions they're thinking about.
 
 "What concerns do you have about the goal? Or what adjustments are you thinking about making?"
 {session_context}""",
 
-        "same_explore_solutions": f"""
+    "same_explore_solutions": """
 Explore what specific adjustments would make the goal more achievable.
 
 Guide them toward a concrete modification. Ask: "What would make it more achievable?"
 {session_context}""",
 
-        "same_not_successful": f"""
+    "same_not_successful": """
 They had challenges with same goal.
 
 Empathize briefly (1-2 sentences). Be encouraging.
 {session_context}""",
 
-        "same_successful": f"""
+    "same_successful": """
 They succeeded with same goal!
 
 Celebrate briefly (1-2 sentences).
 {session_context}""",
 
-        "different_which_goals": f"""
+    "different_which_goals": """
 They want to keep some goals and add new ones.
 
 FIRST TIME: Ask which of their previous goals they want to keep.
@@ -348,11 +447,11 @@ AFTER IDENTIFIED: They're describing their new goal idea - transition to asking
 Be conversational.
 {session_context}""",
 
-        "different_keeping_and_new": f"""
+    "different_keeping_and_new": """
 They're adding a new goal while keeping previous ones.
 
 Goals they're keeping:
-{chr(10).join(f'  - {g}' for g in session_data.get('goals_to_keep', [])) if session_data.get('goals_to_keep') else '  - (identifying)'}
+{goals_keeping_list}
 
 If they haven't stated a clear new goal yet: Ask "What new goal would you like to add?"
 
@@ -364,19 +463,19 @@ CRITICAL: Help them turn vague ideas into SMART goals. Ask clarifying questions
 - Timeframe (how often, which days)
 {session_context}""",
 
-        "just_new_goals": f"""
+    "just_new_goals": """
 Ask about new goal.
 
 "What would you like to focus on?"
 {session_context}""",
 
-        "refine_goal": f"""
+    "refine_goal": """
 Goal needs refinement to be SMART.
 
-Current goal parts collected: {session_data.get('goal_parts', [])}
-Complete goal so far: {' '.join(session_data.get('goal_parts', []))}
-Missing criteria: {', '.join((session_data.get('goal_smart_analysis') or {}).get('missing_criteria', []))}
-Refinement attempts: {session_data.get('smart_refinement_attempts', 0)}/4
+Current goal parts collected: {goal_parts}
+Complete goal so far: {goal_so_far}
+Missing criteria: {missing_criteria}
+Refinement attempts: {refinement_attempts}/4
 
 CRITICAL: Your job is ONLY to help refine the goal. DO NOT ask about confidence yet.
 
@@ -388,11 +487,11 @@ Ask specific questions to get missing information:
 Keep questions simple and focused. One question at a time.
 {session_context}""",
 
-        "confidence_check": f"""
+    "confidence_check": """
 Ask about confidence level ONCE, then move on.
 
-Current goal: {session_data.get('current_goal')}
-Confidence already captured: {session_data.get('confidence_level')}
+Current goal: {current_goal}
+Confidence already captured: {confidence_level}
 
 IF confidence not yet captured:
   Ask: "On a scale of 1 to 10, how confident are you that you can achieve this goal?"
@@ -407,23 +506,23 @@ IF confidence already captured and this is a follow-up response:
 CRITICAL: Once you have the confidence number, you're done in this state.
 {session_context}""",
 
-        "low_confidence": f"""
+    "low_confidence": """
 Low confidence. Explore what would help.
 {session_context}""",
 
-        "high_confidence": f"""
+    "high_confidence": """
 High confidence! Celebrate.
 {session_context}""",
 
-        "make_achievable": f"""
+    "make_achievable": """
 Help make goal more achievable.
 {session_context}""",
 
-        "remember_goal": f"""
+    "remember_goal": """
 Ask how they'll remember/track the goal.
 {session_context}""",
 
-        "more_goals_check": f"""
+    "more_goals_check": """
 Ask if they want to set another goal.
 
 "Would you like to set another goal for this week?"
@@ -436,7 +535,7 @@ CRITICAL:
 - Wait for clear yes/no response
 {session_context}""",
 
-        "end_session": f"""
+    "end_session": """
 FINAL GOODBYE FOR SESSION 2.
 
 CRITICAL INSTRUCTIONS:
@@ -447,21 +546,19 @@ CRITICAL INSTRUCTIONS:
 - Give a warm, conclusive goodbye
 
 Your goals for next week:
-{chr(10).join(f'  - {g}' for g in (session_data.get('goals_to_keep', []) + session_data.get('new_goals', []))) or '  - (continuing previous goals)'}
+{next_week_goals_list}
 
 Say something like:
 "Great work today, {user_name}! You'll be working on [briefly mention their goal(s)]. I'll see you next week at Session 3. Take care!"
 
 Keep it to 2-3 sentences maximum. End definitively.
 {session_context}"""
-    }
-    
-    return prompts.get(state_value, f"Current state: {state_value}{session_context}")
+}
 
 
-def get_session3_prompt(state_value: str, session_data: dict) -> str:
+def get_session2_prompt(state_value: str, session_data: dict) -> str:
     """
-    Get Session 3 state-specific prompt.
+    Get Session 2 state-specific prompt.
     
     Args:
         state_value: Current state value (e.g., "greetings", "check_in_goals")
@@ -470,39 +567,27 @@ def get_session3_prompt(state_value: str, session_data: dict) -> str:
     Returns:
         State-specific prompt text
     """
-    user_name = session_data.get('user_name', 'them')
-    
-    # Build previous goals text
-    previous_goals_text = ""
-    if session_data.get("previous_goals"):
-        if len(session_data["previous_goals"]) == 1:
-            previous_goals_text = f"\nTheir previous goal: \"{session_data['previous_goals'][0]['goal']}\""
-        else:
-            previous_goals_text = f"\nTheir previous goals:"
-            for i, g in enumerate(session_data["previous_goals"], 1):
-                previous_goals_text += f"\n  {i}. \"{g['goal']}\""
-    
-    # Build session context
-    session_context = ""
-    if session_data.get("stress_level"):
-        session_context += f"\nStress level: {session_data['stress_level']}/10"
-    
-    if session_data.get("goals_to_keep"):
-        session_context += f"\nGoals keeping: {', '.join(session_data['goals_to_keep'])}"
-    
-    if session_data.get("new_goals"):
-        session_context += f"\nNew goals set: {len(session_data['new_goals'])}"
-    
-    # State-specific prompts
-    prompts = {
-        "greetings": f"""
+    return session2_prompt_renderer(state_value)(session_data)
+
+
+def session2_prompt_renderer(state_value: str) -> Callable[[Any], str]:
+    """
+    Get a function rendering the Session 2 prompt for one state from session
+    data, so callers can pick the template once per state change.
+    """
+    return _prompt_renderer(_SESSION2_PROMPTS, state_value)
+
+
+# Session 3 state-specific prompt templates, keyed by state value
+_SESSION3_PROMPTS = {
+    "greetings": """
 Welcome {user_name} back to Session 2.
 
 Be warm and brief. Just say hi and ask how their week was.
 NO markdown, emojis, or extra questions.
 {previous_goals_text}""",
 
-        "check_in_goals": f"""
+    "check_in_goals": """
 Ask about their goal from last week.
 {previous_goals_text}
 
@@ -511,7 +596,7 @@ NO stress questions, NO other topics.
 Example: "How did it go with [goal]?"
 {session_context}""",
 
-        "stress_level": f"""
+    "stress_level": """
 Ask ONLY about stress level (1-10).
 
 "On a scale of 1 to 10, how stressed were you this week?"
@@ -519,21 +604,21 @@ Ask ONLY about stress level (1-10).
 CRITICAL: Do NOT ask about their goals, challenges, or anything else. Just stress level.
 {session_context}""",
 
-        "discovery_questions": f"""
+    "discovery_questions": """
 Ask ONE discovery question.
-Available: {', '.join(session_data.get('discovery_questions', [])[:3])}
+Available: {discovery_options}
 
 Pick most relevant. Be conversational.
 {session_context}""",
 
-        "goal_completion": f"""
+    "goal_completion": """
 Ask about goal completion.
 
 CRITICAL: Ask this ONCE. Accept their answer. Do NOT ask follow-up questions about details.
 Example: "Did you complete your goal?"
 {session_context}""",
 
-        "goals_for_next_week": f"""
+    "goals_for_next_week": """
 Ask what they want to focus on next week.
 
 Three options:
@@ -544,7 +629,7 @@ Three options:
 Be clear and simple.
 {session_context}""",
 
-        "same_goals_successes_challenges": f"""
+    "same_goals_successes_challenges": """
 They're keeping the same goal.
 
 FIRST response (when you haven't asked yet): Acknowledge their choice briefly (1 sentence), then ask: "What went well this week? What was challenging?"
@@ -558,37 +643,37 @@ CRITICAL:
 - If they mention wanting to change something, acknowledge it but let them lead
 {session_context}""",
 
-        "same_anything_to_change": f"""
+    "same_anything_to_change": """
 Ask if anything about their goal needs to be changed or worked on.
 
 Keep it simple and direct: "Is there anything about this goal that needs to be changed or worked on?"
 {session_context}""",
 
-        "same_what_concerns": f"""
+    "same_what_concerns": """
 They want to make changes. Ask what concerns they have or what solutions they're thinking about.
 
 "What concerns do you have about the goal? Or what adjustments are you thinking about making?"
 {session_context}""",
 
-        "same_explore_solutions": f"""
+    "same_explore_solutions": """
 Explore what specific adjustments would make the goal more achievable.
 
 Guide them toward a concrete modification. Ask: "What would make it more achievable?"
 {session_context}""",
 
-        "same_not_successful": f"""
+    "same_not_successful": """
 They had challenges with same goal.
 
 Empathize briefly (1-2 sentences). Be encouraging.
 {session_context}""",
 
-        "same_successful": f"""
+    "same_successful": """
 They succeeded with same goal!
 
 Celebrate briefly (1-2 sentences).
 {session_context}""",
 
-        "different_which_goals": f"""
+    "different_which_goals": """
 They want to keep some goals and add new ones.
 
 FIRST TIME: Ask which of their previous goals they want to keep.
@@ -599,11 +684,11 @@ AFTER IDENTIFIED: They're describing their new goal idea - transition to asking
 Be conversational.
 {session_context}""",
 
-        "different_keeping_and_new": f"""
+    "different_keeping_and_new": """
 They're adding a new goal while keeping previous ones.
 
 Goals they're keeping:
-{chr(10).join(f'  - {g}' for g in session_data.get('goals_to_keep', [])) if session_data.get('goals_to_keep') else '  - (identifying)'}
+{goals_keeping_list}
 
 If they haven't stated a clear new goal yet: Ask "What new goal would you like to add?"
 
@@ -615,19 +700,19 @@ CRITICAL: Help them turn vague ideas into SMART goals. Ask clarifying questions
 - Timeframe (how often, which days)
 {session_context}""",
 
-        "just_new_goals": f"""
+    "just_new_goals": """
 Ask about new goal.
 
 "What would you like to focus on?"
 {session_context}""",
 
-        "refine_goal": f"""
+    "refine_goal": """
 Goal needs refinement to be SMART.
 
-Current goal parts collected: {session_data.get('goal_parts', [])}
-Complete goal so far: {' '.join(session_data.get('goal_parts', []))}
-Missing criteria: {', '.join((session_data.get('goal_smart_analysis') or {}).get('missing_criteria', []))}
-Refinement attempts: {session_data.get('smart_refinement_attempts', 0)}/4
+Current goal parts collected: {goal_parts}
+Complete goal so far: {goal_so_far}
+Missing criteria: {missing_criteria}
+Refinement attempts: {refinement_attempts}/4
 
 CRITICAL: Your job is ONLY to help refine the goal. DO NOT ask about confidence yet.
 
@@ -639,11 +724,11 @@ Ask specific questions to get missing information:
 Keep questions simple and focused. One question at a time.
 {session_context}""",
 
-        "confidence_check": f"""
+    "confidence_check": """
 Ask about confidence level ONCE, then move on.
 
-Current goal: {session_data.get('current_goal')}
-Confidence already captured: {session_data.get('confidence_level')}
+Current goal: {current_goal}
+Confidence already captured: {confidence_level}
 
 IF confidence not yet captured:
   Ask: "On a scale of 1 to 10, how confident are you that you can achieve this goal?"
@@ -658,23 +743,23 @@ IF confidence already captured and this is a follow-up response:
 CRITICAL: Once you have the confidence number, you're done in this state.
 {session_context}""",
 
-        "low_confidence": f"""
+    "low_confidence": """
 Low confidence. Explore what would help.
 {session_context}""",
 
-        "high_confidence": f"""
+    "high_confidence": """
 High confidence! Celebrate.
 {session_context}""",
 
-        "make_achievable": f"""
+    "make_achievable": """
 Help make goal more achievable.
 {session_context}""",
 
-        "remember_goal": f"""
+    "remember_goal": """
 Ask how they'll remember/track the goal.
 {session_context}""",
 
-        "more_goals_check": f"""
+    "more_goals_check": """
 Ask if they want to set another goal.
 
 "Would you like to set another goal for this week?"
@@ -687,7 +772,7 @@ CRITICAL:
 - Wait for clear yes/no response
 {session_context}""",
 
-        "end_session": f"""
+    "end_session": """
 FINAL GOODBYE FOR SESSION 3.
 
 CRITICAL INSTRUCTIONS:
@@ -698,47 +783,61 @@ CRITICAL INSTRUCTIONS:
 - Give a warm, conclusive goodbye
 
 Your goals for next week:
-{chr(10).join(f'  - {g}' for g in (session_data.get('goals_to_keep', []) + session_data.get('new_goals', []))) or '  - (continuing previous goals)'}
+{next_week_goals_list}
 
 Say something like:
 "Great work today, {user_name}! You'll be working on [briefly mention their goal(s)]. I'll see you next week at Session 4. Take care!"
 
 Keep it to 2-3 sentences maximum. End definitively.
 {session_context}"""
-    }
+}
+
+
+def get_session3_prompt(state_value: str, session_data: dict) -> str:
+    """
+    Get Session 3 state-specific prompt.
     
-    return prompts.get(state_value, f"Current state: {state_value}{session_context}")
+    Args:
+        state_value: Current state value (e.g., "greetings", "check_in_goals")
+        session_data: Session data dictionary
+        
+    Returns:
+        State-specific prompt text
+    """
+    return session3_prompt_renderer(state_value)(session_data)
+
+
+def session3_prompt_renderer(state_value: str) -> Callable[[Any], str]:
+    """
+    Get a function rendering the Session 3 prompt for one state from session
+    data, so callers can pick the template once per state change.
+    """
+    return _prompt_renderer(_SESSION3_PROMPTS, state_value)
 
 """
 State-specific prompts for Session 4 conversation flow
 """
 
-def get_session4_prompt(state_value: str, session_data: dict) -> str:
-    """
-    Get state-specific prompt for Session 4
-    """
-    user_name = session_data.get('user_name', 'them')
-    previous_goals = session_data.get('previous_goals', [])
-    
-    prompts = {
-        "greetings": f"""
+# Session 4 state-specific prompt templates, keyed by state value
+_SESSION4_PROMPTS = {
+    "greetings": """
 You are Nala, a warm and supportive health coach. This is Session 4, the final session.
 
 Welcome {user_name} back warmly and briefly. This is your last session together.
 Keep the greeting conversational and natural - just 1-2 sentences.
 
 Previous goals from last week:
-{chr(10).join([f"- {g['goal']}" for g in previous_goals]) if previous_goals else "None"}
+{previous_goals_list}
 """,
         
-        "reinforce_goal_from_last_session": f"""
+    "reinforce_goal_from_last_session": """
 Briefly remind {user_name} of their goals from last week:
-{chr(10).join([f"- {g['goal']}" for g in previous_goals]) if previous_goals else "None"}
+{previous_goals_list}
 
 Keep it conversational and brief. Then ask: "How did achieving your goals go this last week?"
 """,
         
-        "check_in_goals": f"""
+    "check_in_goals": """
 {user_name} is sharing how their goals went. Listen carefully to determine if they achieved their goals or not.
 
 Be supportive regardless of the outcome. Your next question depends on their answer:
@@ -746,19 +845,19 @@ Be supportive regardless of the outcome. Your next question depends on their ans
 - If goals weren't achieved: Move to check their stress level
 """,
         
-        "what_happened": f"""
+    "what_happened": """
 {user_name} achieved their goals! Ask with genuine curiosity: "What happened?" 
 
 Be enthusiastic and interested in their success story. Keep it brief.
 """,
         
-        "what_can_be_done_to_make_it_better": f"""
+    "what_can_be_done_to_make_it_better": """
 They've shared their success. Now ask: "That's wonderful! What can be done to make things even better?"
 
 Help them think about how to build on their success or maintain momentum.
 """,
         
-        "stress_level": f"""
+    "stress_level": """
 Goals weren't fully achieved. Check in on their stress level.
 
 Ask: "On a scale of 1-10, what was your stress level like this past week?"
@@ -766,25 +865,25 @@ Ask: "On a scale of 1-10, what was your stress level like this past week?"
 Be empathetic and non-judgmental.
 """,
         
-        "stress_high_what_happened": f"""
+    "stress_high_what_happened": """
 Stress level is high (7+). Show empathy and ask gently: "What happened?"
 
 Be supportive and understanding. Don't push too hard.
 """,
         
-        "stress_high_anything_we_can_talk_about": f"""
+    "stress_high_anything_we_can_talk_about": """
 They've shared what happened. Ask with care: "Is there anything you'd like to talk about regarding the stress?"
 
 Offer support and be a good listener. Keep it conversational.
 """,
         
-        "stress_low_what_happened": f"""
+    "stress_low_what_happened": """
 Stress level is manageable. Ask in a supportive tone: "What happened with your goals?"
 
 Be curious and empathetic, but more matter-of-fact since stress is lower.
 """,
         
-        "whats_the_focus_today": f"""
+    "whats_the_focus_today": """
 Time to identify the focus for today. Ask: "What's the focus today - would you like to work on your current goals or set new ones?"
 
 Make it clear they have two options:
@@ -794,9 +893,9 @@ Make it clear they have two options:
 Wait for them to choose a direction.
 """,
         
-        "current_goals_anything_needing_to_change": f"""
+    "current_goals_anything_needing_to_change": """
 They want to focus on current goals:
-{chr(10).join([f"- {g['goal']}" for g in previous_goals]) if previous_goals else "None"}
+{previous_goals_list}
 
 Ask: "Is there anything that needs to change with your current goals to help you be successful?"
 
@@ -809,10 +908,10 @@ Be open to adjustments while maintaining goal quality.
 - Say things like "after our program ends" or "moving forward on your own"
 """,
         
-        "new_goals_smart_check": f"""
+    "new_goals_smart_check": """
 They're sharing a new goal. Listen carefully to what they say.
 
-Current goal being discussed: {session_data.get('current_goal', 'Not yet provided')}
+Current goal being discussed: {current_goal_or_not_provided}
 
 Evaluate if it's SMART (Specific, Measurable, Achievable, Relevant, Time-bound).
 - If SMART: Acknowledge it positively
@@ -821,33 +920,33 @@ Evaluate if it's SMART (Specific, Measurable, Achievable, Relevant, Time-bound).
 Be encouraging but help them create quality goals.
 """,
         
-        "smart_yes_path": f"""
-Their goal is SMART! Acknowledge this positively: "{session_data.get('current_goal')}"
+    "smart_yes_path": """
+Their goal is SMART! Acknowledge this positively: "{current_goal}"
 
 Brief positive reinforcement, then move to ask about confidence level.
 """,
         
-        "smart_no_path": f"""
-Goal needs refinement. Current goal: {session_data.get('current_goal')}
-Missing criteria: {', '.join((session_data.get('goal_smart_analysis') or {}).get('missing_criteria', []))}
+    "smart_no_path": """
+Goal needs refinement. Current goal: {current_goal}
+Missing criteria: {missing_criteria}
 
 Gently guide them to make it more SMART. Be specific about what's missing but keep it conversational.
 
 Example: "That's a great start! To make it more actionable, could you add when and how often?"
 """,
         
-        "confidence_check": f"""
+    "confidence_check": """
 Time to check confidence. Ask: "On a scale of 1-10, how confident do you feel about achieving these goals?"
 
-Current goals context: {session_data.get('current_goal') or 'their chosen goals'}
+Current goals context: {current_goal_or_chosen}
 
 Be warm and encouraging regardless of their answer.
 
 IMPORTANT: This is Session 4, the FINAL session. Do NOT mention "next week" or future sessions.
 """,
         
-        "low_confidence_what_successes": f"""
-Confidence is below 7 ({session_data.get('confidence_level')}/10). 
+    "low_confidence_what_successes": """
+Confidence is below 7 ({confidence_level}/10). 
 
 Ask supportively: "What successes have you had in the past that you can draw on?"
 
@@ -856,14 +955,14 @@ Help them reconnect with their strengths and past wins.
 IMPORTANT: This is the FINAL session. Focus on their ability to sustain goals after the program ends.
 """,
         
-        "low_confidence_how_can_we_make_it_more_achievable": f"""
+    "low_confidence_how_can_we_make_it_more_achievable": """
 They've identified some successes. Now ask: "How can we make this goal more achievable for you?"
 
 Help them adjust the goal or identify support systems. Be collaborative.
 """,
         
-        "high_confidence_path": f"""
-Good confidence level ({session_data.get('confidence_level')}/10)! 
+    "high_confidence_path": """
+Good confidence level ({confidence_level}/10)! 
 
 Acknowledge their confidence positively and transition to tracking.
 
@@ -871,7 +970,7 @@ Acknowledge their confidence positively and transition to tracking.
 Say: "That's great confidence! Let's talk about how you'll remember to work on these goals after our program ends."
 """,
         
-        "how_will_you_remember_to_do_your_goal": f"""
+    "how_will_you_remember_to_do_your_goal": """
 FIRST TIME in this state:
 Ask: "How will you remember to work on these goals?"
 STOP. Wait for their answer. Do not say anything else.
@@ -883,7 +982,7 @@ Example: "Phone alarms are perfect. How will you keep these goals going after ou
  TWO EXCHANGES ONLY: Question → Answer → Acknowledge+NextQuestion
 """,
         
-        "how_will_you_continue_your_goals": f"""
+    "how_will_you_continue_your_goals": """
 FIRST TIME in this state:
 Ask: "How will you keep these goals going after our program ends?"
 STOP. Wait for their answer. Do not say anything else.
@@ -895,7 +994,7 @@ Example: "That confidence will serve you well. Do you have any final questions b
  TWO EXCHANGES ONLY: Question → Answer → Acknowledge+FinalQuestions
 """,
         
-        "any_final_questions": f"""
+    "any_final_questions": """
 Session is wrapping up. Ask: "Do you have any final questions or anything else you'd like to discuss?"
 
 Be open and available. This is their last chance to ask anything.
@@ -903,7 +1002,7 @@ Be open and available. This is their last chance to ask anything.
 If they say no, move to final farewell.
 """,
         
-        "end_session": f"""
+    "end_session": """
 This is the final farewell for the ENTIRE 4-session program.
 
 Thank {user_name} for their participation across all 4 sessions. 
@@ -917,6 +1016,25 @@ Example: "It's been wonderful working with you through this program, {user_name}
 
  This is a GOODBYE. There are no more sessions after this.
 """
-    }
-    
-    return prompts.get(state_value, f"You are in state: {state_value}. Continue the conversation naturally.")
+}
+
+
+def get_session4_prompt(state_value: str, session_data: dict) -> str:
+    """
+    Get state-specific prompt for Session 4
+    """
+    return session4_prompt_renderer(state_value)(session_data)
+
+
+def session4_prompt_renderer(state_value: str) -> Callable[[Any], str]:
+    """
+    Get a function rendering the Session 4 prompt for one state from session
+    data, so callers can pick the template once per state change.
+    """
+    template = _SESSION4_PROMPTS.get(state_value)
+    if template is None:
+        fallback = f"You are in state: {state_value}. Continue the conversation naturally."
+        return lambda session_data: fallback
+    if _uses_stable_fields_only(template):
+        return functools.partial(_render_stable_prompt, template)
+    return lambda session_data: template.format_map(_PromptFields(session_data))
@@ -3,9 +3,85 @@ Unified session storage with consistent JSON structure across all sessions.
 Replaces utils/session_storage.py
 """
 import json
+import os
+import sys
+import time
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+try:
+    import orjson
+except ImportError:  # Fall back to stdlib json
+    orjson = None
+
+# Timestamp format for default session filenames
+_FILENAME_TS_FMT = "%Y%m%d_%H%M%S"
+# Last formatted filename timestamp, as (epoch second, text)
+_filename_ts_cache = (None, "")
+
+
+def _filename_timestamp() -> str:
+    """Local time as _FILENAME_TS_FMT, formatted at most once per second"""
+    global _filename_ts_cache
+    now = int(time.time())
+    if _filename_ts_cache[0] != now:
+        _filename_ts_cache = (now, time.strftime(_FILENAME_TS_FMT, time.localtime(now)))
+    return _filename_ts_cache[1]
+
+
+# How the chat history is spliced into an encoded session, per pretty flag:
+# (bytes to drop from the encoded object, history key, separator before the
+# first message, separator between messages, closing bytes, closing bytes
+# for an empty history)
+_HISTORY_LAYOUTS = {
+    True: (2, b',\n  "chat_history": [', b'\n    ', b',\n    ', b'\n  ]\n}', b']\n}'),
+    False: (1, b',"chat_history":[', b'', b',', b']}', b']}'),
+}
+
+
+def _write_session_json(
+    filename: str, data: Dict[str, Any], chat_history: List[Dict[str, str]], pretty: bool = False
+) -> None:
+    """
+    Write data as JSON with a "chat_history" key added last. Output is
+    compact unless pretty is set (2-space indent, one message per line).
+    Messages are serialized and written one at a time, so the encoded
+    history is never held in memory as a whole.
+    Writes to a temp file, syncs it to disk and renames it over filename, so
+    neither a crash mid-write nor a power loss right after the rename leaves
+    a truncated session file behind.
+    """
+    tmp_filename = filename + '.tmp'
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        head = orjson.dumps(data, option=option)
+        dumps = orjson.dumps
+    else:
+        separators = None if pretty else (',', ':')
+        head = json.dumps(data, indent=2 if pretty else None, separators=separators).encode()
+        dumps = lambda obj: json.dumps(obj, separators=separators).encode()
+    
+    trim, history_key, first_sep, sep, closing, empty_closing = _HISTORY_LAYOUTS[pretty]
+    with open(tmp_filename, 'wb') as f:
+        # Reopen the outer object to append the history
+        f.write(head[:-trim])
+        f.write(history_key)
+        for i, msg in enumerate(chat_history):
+            f.write(sep if i else first_sep)
+            f.write(dumps(msg))
+        f.write(closing if chat_history else empty_closing)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+def _read_json(filename: str) -> Any:
+    """Read a JSON file, using orjson when available"""
+    # One whole-file binary read; both parsers accept bytes, so there is no text decode pass
+    with open(filename, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
 
 def save_unified_session(
     uid: str,
@@ -16,7 +92,8 @@ def save_unified_session(
     goals: List[Dict[str, Any]],
     session_metadata: Dict[str, Any],
     conversation_history: List[Dict[str, str]] = None,
-    filename: str = None
+    filename: str = None,
+    pretty: bool = False
 ) -> str:
     """
     Save session data in unified format.
@@ -31,13 +108,13 @@ def save_unified_session(
         session_metadata: Session-specific data (state info, etc.)
         conversation_history: Chat messages
         filename: Optional filename
+        pretty: Indent the JSON for reading by hand (compact by default)
         
     Returns:
         Filename that was saved
     """
     if filename is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"user_{uid}_session{session_number}_{timestamp}.json"
+        filename = f"user_{uid}_session{session_number}_{_filename_timestamp()}.json"
     
     # Build unified structure
     unified_data = {
@@ -58,17 +135,33 @@ def save_unified_session(
             "current_state": current_state,
             "timestamp": datetime.now().isoformat(),
             "metadata": session_metadata
-        },
-        "chat_history": conversation_history or []
+        }
     }
     
-    # Write to file
-    with open(filename, 'w') as f:
-        json.dump(unified_data, f, indent=2)
+    # Write to file, streaming the chat history into its "chat_history" key
+    _write_session_json(filename, unified_data, conversation_history or [], pretty)
     
     return filename
 
 
+def intern_message_roles(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Replace each loaded message's role with the interned string, so the
+    role checks run over the history compare by identity.
+    
+    Args:
+        messages: Chat messages parsed from JSON (updated in place)
+        
+    Returns:
+        The same list
+    """
+    for msg in messages:
+        role = msg.get('role')
+        if isinstance(role, str):
+            msg['role'] = sys.intern(role)
+    return messages
+
+
 def load_unified_session(filename: str) -> Dict[str, Any]:
     """
     Load unified session data.
@@ -79,8 +172,110 @@ def load_unified_session(filename: str) -> Dict[str, Any]:
     Returns:
         Dictionary with unified structure
     """
-    with open(filename, 'r') as f:
-        return json.load(f)
+    data = _read_json(filename)
+    intern_message_roles(data.get("chat_history") or [])
+    return data
+
+
+def history_log_path(filename: str) -> str:
+    """
+    Path of the append-only chat history log kept next to a session file.
+    
+    Args:
+        filename: Path to session JSON file
+        
+    Returns:
+        Path to the sibling .history.jsonl file
+    """
+    return os.path.splitext(filename)[0] + ".history.jsonl"
+
+
+def _write_history_entries(path: str, messages: List[Dict[str, str]], start: int, mode: str) -> None:
+    """Write messages as log lines tagged with their position in the full chat history"""
+    entries = [{"index": start + i, "message": msg} for i, msg in enumerate(messages)]
+    if orjson is not None:
+        with open(path, mode + 'b') as f:
+            f.write(b"".join(orjson.dumps(entry) + b"\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+    else:
+        with open(path, mode) as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def append_history_log(filename: str, messages: List[Dict[str, str]], start: int) -> None:
+    """
+    Append chat messages to a session's history log, one JSON object per line.
+    Each line records the message's position in the full chat history, so a
+    snapshot that already holds some of them can be merged without duplicates.
+    
+    Args:
+        filename: Path to session JSON file
+        messages: Messages added since the last save
+        start: Position of messages[0] in the full chat history
+    """
+    if not messages:
+        return
+    _write_history_entries(history_log_path(filename), messages, start, 'a')
+
+
+def rewrite_history_log(filename: str, messages: List[Dict[str, str]]) -> None:
+    """
+    Replace a session's history log with the full chat history.
+    Writes to a temp file and renames it over the log, so the old log stays
+    intact until the new one is complete.
+    
+    Args:
+        filename: Path to session JSON file
+        messages: Full chat history
+    """
+    log_path = history_log_path(filename)
+    tmp_path = log_path + '.tmp'
+    _write_history_entries(tmp_path, messages, 0, 'w')
+    os.replace(tmp_path, log_path)
+
+
+def load_history_log(filename: str, snapshot_len: int = 0) -> List[Dict[str, str]]:
+    """
+    Load logged messages that follow the chat history held in a session snapshot.
+    
+    Args:
+        filename: Path to session JSON file
+        snapshot_len: Number of messages in the snapshot's chat_history
+        
+    Returns:
+        List of messages past the snapshot (empty if there is no log)
+    """
+    log_path = history_log_path(filename)
+    if not os.path.exists(log_path):
+        return []
+    loads = orjson.loads if orjson is not None else json.loads
+    messages = []
+    with open(log_path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = loads(line)
+            if "message" not in entry:
+                # Older logs hold bare messages appended after the snapshot
+                messages.append(entry)
+            elif entry["index"] == snapshot_len + len(messages):
+                messages.append(entry["message"])
+    return intern_message_roles(messages)
+
+
+def clear_history_log(filename: str) -> None:
+    """
+    Remove a session's history log once a full snapshot includes its messages.
+    
+    Args:
+        filename: Path to session JSON file
+    """
+    log_path = history_log_path(filename)
+    if os.path.exists(log_path):
+        os.remove(log_path)
 
 
 def extract_user_profile(filename: str) -> Dict[str, Any]:
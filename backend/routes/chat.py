@@ -33,6 +33,9 @@ chat_router = APIRouter(prefix="/chat", tags=["chat"])
 
 # AI service cache: maintains session state per conversation
 _ai_service_cache: Dict[str, AIService] = {}
+# Per-conversation locks: a completion save runs in a worker thread and must
+# not overlap the next message mutating the same chatbot
+_ai_service_locks: Dict[str, asyncio.Lock] = {}
 
 
 def get_or_create_ai_service(
@@ -203,52 +206,57 @@ async def send_message(
         print(f"🔍 DEBUG: ai_service.session_number={ai_service.session_number}")
         print(f"🔍 DEBUG: chatbot type={type(ai_service.chatbot).__name__}")
 
-        response, sources, model_name = await ai_service.generate_response(
-            message=chat_request.message,
-            conversation_history=history,
-            user_id=user_id,
-        )
+        async with _ai_service_locks.setdefault(conv_id, asyncio.Lock()):
+            response, sources, model_name = await ai_service.generate_response(
+                message=chat_request.message,
+                conversation_history=history,
+                user_id=user_id,
+            )
 
-        # Check if session is complete
-        session_complete = False
-        session_state = None
-        if hasattr(ai_service.chatbot, "session_manager"):
-            session_state = ai_service.chatbot.session_manager.get_state().value
-            print(f"🧩 session_manager state: {session_state}")
-
-            if session_state == "end_session":
-                session_complete = True
-
-                # Mark session complete in session_progress table
-                if user_id and chat_request.session_number:
-                    session_obj = (
-                        db.query(SessionProgress)
-                        .filter_by(
-                            user_id=user_id,
-                            session_number=chat_request.session_number,
+            # Check if session is complete
+            session_complete = False
+            session_state = None
+            if hasattr(ai_service.chatbot, "session_manager"):
+                session_state = ai_service.chatbot.session_manager.get_state().value
+                print(f"🧩 session_manager state: {session_state}")
+
+                if session_state == "end_session":
+                    session_complete = True
+
+                    # Mark session complete in session_progress table
+                    if user_id and chat_request.session_number:
+                        session_obj = (
+                            db.query(SessionProgress)
+                            .filter_by(
+                                user_id=user_id,
+                                session_number=chat_request.session_number,
+                            )
+                            .first()
                         )
-                        .first()
-                    )
 
-                    if session_obj:
-                        session_obj.mark_complete()
-                    else:
-                        session_obj = SessionProgress(
+                        if session_obj:
+                            session_obj.mark_complete()
+                        else:
+                            session_obj = SessionProgress(
+                                user_id=user_id,
+                                session_number=chat_request.session_number,
+                            )
+                            session_obj.mark_complete()
+                            db.add(session_obj)
+
+                        db.commit()
+
+                        # Save session data to sessions table. The save does blocking
+                        # database and file I/O, so run it off the event loop; the
+                        # conversation's lock keeps the next message from changing
+                        # the chatbot while it is serialized.
+                        await asyncio.to_thread(
+                            _save_session_on_completion,
+                            ai_service=ai_service,
                             user_id=user_id,
                             session_number=chat_request.session_number,
+                            conversation_history=ai_service.chatbot.conversation_history,
                         )
-                        session_obj.mark_complete()
-                        db.add(session_obj)
-
-                    db.commit()
-
-                    # Save session data to sessions table
-                    _save_session_on_completion(
-                        ai_service=ai_service,
-                        user_id=user_id,
-                        session_number=chat_request.session_number,
-                        conversation_history=ai_service.chatbot.conversation_history,
-                    )
 
         # Save user message
         await conv_service.add_message(